@@ -0,0 +1,192 @@
+# pylint: disable=import-error, invalid-name, no-member
+''' The Metric DAO on asyncio gRPC '''
+import asyncio
+import threading
+
+import grpc
+from grpc import aio
+
+from alameda_api.v1alpha1.operator import server_pb2_grpc
+from framework.datastore.channel_pool import DEFAULT_CHANNEL_OPTIONS
+from framework.datastore.metric_dao import MetricDAO, get_call_options
+
+
+class AsyncMetricDAO(MetricDAO):
+    ''' Metric DAO whose calls run concurrently on an event loop of its own
+    thread.
+
+    The coroutines, e.g. list_metrics, are for asyncio callers. The methods
+    of MetricDAO keep their blocking interface, except that the writes
+    return as soon as they are sent, so that CPU work goes on while they
+    are in flight; flush() waits for them.
+    '''
+
+    def __init__(self, config=None, max_concurrency=64):
+        ''' The construct method
+        Args:
+            config: the config of MetricDAO.
+            max_concurrency: the maximum number of calls in flight.
+        '''
+        super(AsyncMetricDAO, self).__init__(config)
+        self.max_concurrency = max_concurrency
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name='async-metric-dao',
+            daemon=True)
+        self._thread.start()
+        self._pending_writes = set()
+        self._lock = threading.Lock()
+        self._channel, self._stub, self._semaphore = self._run(self._open())
+
+    async def _open(self):
+        ''' Open the channel on the loop, which it is bound to '''
+        return self._open_channel() + (
+            asyncio.Semaphore(self.max_concurrency),)
+
+    def _open_channel(self):
+        ''' Open a channel and its stub; called on the loop '''
+        channel = aio.insecure_channel(self.config["metric_server"],
+                                       options=list(DEFAULT_CHANNEL_OPTIONS))
+        return channel, server_pb2_grpc.OperatorServiceStub(channel)
+
+    def _run(self, coroutine):
+        ''' Run a coroutine on the loop and wait for its result '''
+        return asyncio.run_coroutine_threadsafe(
+            coroutine, self._loop).result()
+
+    async def _call(self, method, req):
+        ''' Call a method of the server once a call slot is free, and call
+        it again on a new channel if the server was unavailable '''
+        async with self._semaphore:
+            stub = self._stub
+            try:
+                return await getattr(stub, method)(
+                    req, **get_call_options(self.config))
+            except grpc.RpcError as e:
+                if e.code() not in self.RECONNECT_CODES:
+                    raise
+                self.logger.warning("Reconnect to %s after %s error.",
+                                    self.config["metric_server"], e.code())
+            await self._reconnect(stub)
+            return await getattr(self._stub, method)(
+                req, **get_call_options(self.config))
+
+    async def _reconnect(self, stub):
+        ''' Replace the channel of a failed stub, unless a concurrent call
+        already replaced it '''
+        if stub is not self._stub:
+            return
+        channel = self._channel
+        self._channel, self._stub = self._open_channel()
+        await channel.close()
+
+    async def list_metrics(self, metric_type, conditions, duration,
+                           columnar=False):
+        ''' List the metrics of the label conditions, in the format of
+        get_container_observed_data, or of get_container_observed_series if
+        columnar '''
+        req = self._get_list_metrics_request(metric_type, conditions,
+                                             duration)
+        try:
+            resp = await self._call("ListMetrics", req)
+            return self._parse_list_metrics_response(resp, columnar)
+        except Exception as e:
+            self.logger.error("Could not get metrics: %s", str(e))
+            raise e
+
+    async def list_pods_metrics(self, metric_types, pods, duration,
+                                columnar=False):
+        ''' List the metrics of many pods concurrently, in the format of
+        get_pods_observed_data, or of get_pods_observed_series if
+        columnar '''
+        namespace_pods = self._get_namespace_pods(pods)
+        queries = [(metric_type, namespace_name, pod_names)
+                   for metric_type in metric_types
+                   for namespace_name, pod_names in namespace_pods.items()]
+        metrics_list = await asyncio.gather(*[
+            self.list_metrics(metric_type, {"namespace": namespace_name},
+                              duration, columnar)
+            for metric_type, namespace_name, _ in queries])
+
+        result = {}
+        add_pods_metrics = self._add_pods_series if columnar \
+            else self._add_pods_metrics
+        for (metric_type, namespace_name, pod_names), metrics in zip(
+                queries, metrics_list):
+            add_pods_metrics(result, metric_type, namespace_name, pod_names,
+                             metrics)
+        return result
+
+    async def create_predict_result(self, predictions):
+        ''' Write the predictions of pods in one request '''
+        req = self._get_predict_result_request(predictions)
+        try:
+            resp = await self._call("CreatePredictResult", req)
+            self._check_predict_result_response(resp)
+        except Exception as e:
+            self.logger.error("Could not write predictions: %s", str(e))
+            raise e
+
+    def get_container_observed_data(self, metric_type, namespace_name,
+                                    pod_name, duration):
+        ''' Get the observed metrics '''
+        return self._run(self.list_metrics(
+            metric_type, {"namespace": namespace_name, "pod_name": pod_name},
+            duration))
+
+    def get_pods_observed_data(self, metric_types, pods, duration):
+        ''' Get the observed metrics of many pods, with concurrent requests
+        per namespace and metric type, see MetricDAO '''
+        return self._run(self.list_pods_metrics(metric_types, pods,
+                                                duration))
+
+    def get_container_observed_series(self, metric_type, namespace_name,
+                                      pod_name, duration):
+        ''' Get the observed metrics as series '''
+        return self._run(self.list_metrics(
+            metric_type, {"namespace": namespace_name, "pod_name": pod_name},
+            duration, columnar=True))
+
+    def get_pods_observed_series(self, metric_types, pods, duration):
+        ''' Get the observed metrics of many pods as series, with
+        concurrent requests per namespace and metric type '''
+        return self._run(self.list_pods_metrics(metric_types, pods,
+                                                duration, columnar=True))
+
+    def write_container_prediction_data(self, prediction):
+        ''' Send the prediction result to server without waiting for it '''
+        self.logger.info("Write prediction result: %s", str(prediction))
+        future = asyncio.run_coroutine_threadsafe(
+            self.create_predict_result([prediction]), self._loop)
+        with self._lock:
+            self._pending_writes.add(future)
+        future.add_done_callback(self._discard_write)
+
+    def write_pods_prediction_data(self, predictions):
+        ''' Write the results of many pods in one request, and wait for
+        it '''
+        self.logger.info("Write prediction results of %d pods.",
+                         len(predictions))
+        self._run(self.create_predict_result(predictions))
+
+    def _discard_write(self, future):
+        with self._lock:
+            self._pending_writes.discard(future)
+
+    def flush(self):
+        ''' Wait for the writes in flight.
+        Returns:
+            int: the number of failed writes, which were logged.
+        '''
+        with self._lock:
+            pending_writes = list(self._pending_writes)
+        return sum(1 for future in pending_writes
+                   if future.exception() is not None)
+
+    def close(self):
+        ''' Wait for the writes in flight, then close the channel and stop
+        the loop '''
+        self.flush()
+        self._run(self._channel.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
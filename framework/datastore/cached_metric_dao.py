@@ -0,0 +1,206 @@
+''' The metric DAO with a local cache of observed data. '''
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from framework.log.logger import Logger
+from framework.datastore.metric_dao import series_to_metrics
+from framework.datastore.series_store import SeriesStore
+
+
+class CachedMetricDAO(object):
+    # pylint: disable=invalid-name
+    ''' Keep the last window of each queried pod metric, and fetch only the
+    samples newer than it from the wrapped DAO.
+
+    Other methods, e.g. the writes, are delegated to the wrapped DAO.
+    '''
+
+    def __init__(self, dao, capacity=10000, overlap_sec=30, clock=None,
+                 series_capacity=4096, store=None):
+        ''' The construct method
+        Args:
+            dao: the wrapped DAO, e.g. MetricDAO.
+            capacity: the maximum number of cached pod metrics.
+            overlap_sec: seconds fetched before the last cached sample, so
+                that samples at the window edge are not missed.
+            clock: function of the current epoch seconds.
+            series_capacity: the maximum number of cached samples of each
+                container, which should cover the queried windows.
+            store: the SeriesStore of the cached samples, e.g. a
+                MmapSeriesStore to keep them across restarts; in memory if
+                not given.
+        '''
+        self.dao = dao
+        self.capacity = capacity
+        self.overlap_sec = overlap_sec
+        self.clock = clock or time.time
+        self.logger = Logger()
+        self.store = store if store is not None \
+            else SeriesStore(series_capacity)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._restore_entries()
+
+    def __getattr__(self, name):
+        return getattr(self.dao, name)
+
+    def get_container_observed_data(self, metric_type, namespace_name,
+                                    pod_name, duration):
+        ''' Get the observed metrics of the last duration seconds,
+        in the format of MetricDAO.get_container_observed_data. '''
+        return series_to_metrics(self.get_container_observed_series(
+            metric_type, namespace_name, pod_name, duration))
+
+    def get_pods_observed_data(self, metric_types, pods, duration):
+        ''' Get the observed metrics of the last duration seconds of many
+        pods, in the format of MetricDAO.get_pods_observed_data. '''
+        return {key: series_to_metrics(series_map) for key, series_map
+                in self.get_pods_observed_series(
+                    metric_types, pods, duration).items()}
+
+    def get_container_observed_series(self, metric_type, namespace_name,
+                                      pod_name, duration):
+        ''' Get the observed series of the last duration seconds,
+        in the format of MetricDAO.get_container_observed_series. '''
+        key = (metric_type, namespace_name, pod_name)
+        entry, fetch_duration = self._get_fetch_entry(key, duration)
+        series_map = self.dao.get_container_observed_series(
+            metric_type, namespace_name, pod_name, fetch_duration)
+        self.logger.debug("Fetched %ds of %ds observed data of %s.",
+                          fetch_duration, duration, key)
+        return self._update_entry(key, entry, series_map, duration)
+
+    def get_pods_observed_series(self, metric_types, pods, duration):
+        ''' Get the observed series of the last duration seconds of many
+        pods, in the format of MetricDAO.get_pods_observed_series.
+
+        The pods must be named. The wrapped DAO is queried for the seconds
+        since the oldest cached sample of the pods.
+        '''
+        result = {}
+        if not pods:
+            return result
+        for metric_type in metric_types:
+            fetch_entries = {}
+            for namespace_name, pod_name in pods:
+                key = (metric_type, namespace_name, pod_name)
+                fetch_entries[key] = self._get_fetch_entry(key, duration)
+            fetch_duration = max(fetch_duration for _, fetch_duration
+                                 in fetch_entries.values())
+
+            queried_map = self.dao.get_pods_observed_series(
+                [metric_type], pods, fetch_duration)
+            self.logger.debug("Fetched %ds of %ds observed data of %d pods.",
+                              fetch_duration, duration, len(pods))
+            for key, (entry, _) in fetch_entries.items():
+                result[key] = self._update_entry(
+                    key, entry, queried_map.get(key), duration)
+        return result
+
+    def _get_fetch_entry(self, key, duration):
+        ''' Get the entry of a pod metric and the seconds to fetch. '''
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None and entry['duration'] >= duration and \
+                entry['last_time'] is not None:
+            return entry, min(duration, max(0, int(math.ceil(
+                self.clock() - entry['last_time']))) + self.overlap_sec)
+
+        if entry is not None:
+            self._remove_series(key, entry)
+        return {'duration': duration, 'last_time': None, 'labels': {}}, \
+            duration
+
+    def _update_entry(self, key, entry, series_map, duration):
+        ''' Merge the fetched series of a pod metric, and get its
+        window. '''
+        self._merge_entry(key, entry, series_map or {})
+        with self._lock:
+            if not entry['labels']:
+                # No samples in the window, e.g. the pod stopped reporting.
+                self._entries.pop(key, None)
+                return {}
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._remove_series(*self._entries.popitem(last=False))
+
+        return self._get_window(key, entry, duration)
+
+    def _restore_entries(self):
+        ''' Restore the entries of the series already in the store, which
+        cover the window from their first sample. '''
+        first_times = {}
+        for key, label_key in self.store.keys():
+            series = self.store.get((key, label_key))
+            if not len(series):
+                continue
+            entry = self._entries.setdefault(
+                key, {'duration': 0, 'last_time': None, 'labels': {}})
+            entry['labels'][label_key] = dict(label_key)
+            entry['last_time'] = max(series.last_time,
+                                     entry['last_time'] or series.last_time)
+            first_time = series.base_time + int(series.window()[0][0])
+            first_times[key] = min(first_time,
+                                   first_times.get(key, first_time))
+
+        for key, first_time in first_times.items():
+            entry = self._entries[key]
+            entry['duration'] = entry['last_time'] - first_time + \
+                self.overlap_sec
+
+    def _remove_series(self, key, entry):
+        for label_key in entry['labels']:
+            self.store.remove((key, label_key))
+
+    def _merge_entry(self, key, entry, series_map):
+        ''' Append the samples newer than the cached ones of each series,
+        and trim the samples out of the window, removing the series left
+        empty. '''
+        labels_map = entry['labels']
+        for label_key, (times, values) in series_map.items():
+            labels_map.setdefault(label_key, dict(label_key))
+            series = self.store.get_or_create((key, label_key))
+            if series.last_time is not None:
+                newer = times > series.last_time
+                times, values = times[newer], values[newer]
+            series.extend(times, values)
+
+        start_time = self.clock() - entry['duration']
+        entry['last_time'] = None
+        for label_key in list(labels_map):
+            series = self.store.get((key, label_key))
+            series.trim(start_time)
+            if not len(series):
+                self.store.remove((key, label_key))
+                del labels_map[label_key]
+                continue
+            if len(series) == series.capacity and series.base_time + \
+                    int(series.window()[0][0]) > start_time + self.overlap_sec:
+                self.logger.warning(
+                    "Series capacity %d does not cover the %ds window of "
+                    "%s; its first samples are dropped.", series.capacity,
+                    entry['duration'], key)
+            if entry['last_time'] is None or \
+                    series.last_time > entry['last_time']:
+                entry['last_time'] = series.last_time
+
+    def _get_window(self, key, entry, duration):
+        ''' Get the series of the last duration seconds, copied out of
+        the store since later fetches overwrite it. '''
+        result = {}
+        start_time = self.clock() - duration
+        for label_key in entry['labels']:
+            series = self.store.get((key, label_key))
+            times, values = series.window(start_time)
+            if len(times):
+                result[label_key] = (
+                    times.astype('int64') + series.base_time,
+                    np.array(values[:, 0], dtype='float64'))
+        return result
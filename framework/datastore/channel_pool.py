@@ -0,0 +1,68 @@
+''' Long-lived gRPC channels shared by the DAOs. '''
+
+import os
+import threading
+
+import grpc
+
+
+# Keep idle connections to the operator alive, and notice dead ones
+# without waiting for a call to time out.
+DEFAULT_CHANNEL_OPTIONS = (
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+)
+
+
+class ChannelPool(object):
+    ''' One channel per target, shared by the threads of a process.
+
+    Channels must not be used across fork, so a process forked from the
+    one that opened them, e.g. a prediction worker, opens its own.
+    '''
+
+    def __init__(self, options=DEFAULT_CHANNEL_OPTIONS):
+        ''' The construct method
+        Args:
+            options: channel arguments of the channels.
+        '''
+        self.options = list(options)
+        self._channels = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def get_channel(self, target):
+        ''' Get the channel of a target, opened if it is missing. '''
+        with self._lock:
+            if self._pid != os.getpid():
+                # Channels inherited from the parent are left to it.
+                self._channels = {}
+                self._pid = os.getpid()
+
+            channel = self._channels.get(target)
+            if channel is None:
+                channel = self._channels[target] = grpc.insecure_channel(
+                    target, options=self.options)
+            return channel
+
+    def reset(self, target):
+        ''' Close the channel of a target, so that the next call opens a
+        new one, e.g. after the target was unavailable. '''
+        with self._lock:
+            channel = self._channels.pop(target, None)
+            if channel is not None and self._pid == os.getpid():
+                channel.close()
+
+    def close(self):
+        ''' Close all channels. '''
+        with self._lock:
+            channels, self._channels = self._channels, {}
+            if self._pid == os.getpid():
+                for channel in channels.values():
+                    channel.close()
+
+
+# Channels shared by the DAOs of the process.
+DEFAULT_POOL = ChannelPool()
@@ -0,0 +1,87 @@
+# pylint: disable=import-error, invalid-name, no-member, unused-argument
+''' A local stand-in of the operator service for tests and benchmarks. '''
+import threading
+import time
+from concurrent import futures
+
+import grpc
+
+from alameda_api.v1alpha1.operator import server_pb2, server_pb2_grpc
+
+
+class LocalOperatorService(server_pb2_grpc.OperatorServiceServicer):
+    ''' Serve observed metrics from memory, and keep the written prediction
+    results, in place of the operator. '''
+
+    def __init__(self, clock=None):
+        ''' The construct method
+        Args:
+            clock: function of the current epoch seconds, which durations
+                of the queries end at.
+        '''
+        self.clock = clock or time.time
+        self.series = []
+        self.predict_pods = []
+        self.list_metrics_count = 0
+        self._lock = threading.Lock()
+
+    def add_series(self, metric_type, labels, samples):
+        ''' Add an observed series.
+        Args:
+            metric_type: name of the MetricType, e.g.
+                "CONTAINER_CPU_USAGE_TOTAL".
+            labels: (dict) labels of the series, e.g. namespace, pod_name
+                and container_name.
+            samples: (time, value) samples of the series in time order.
+        '''
+        self.series.append((metric_type, dict(labels), list(samples)))
+
+    def ListMetrics(self, request, context):
+        ''' List the metrics of the type matching all label conditions. '''
+        with self._lock:
+            self.list_metrics_count += 1
+
+        metric_type = server_pb2.MetricType.Name(request.metric_type)
+        start_time = self.clock() - request.duration.seconds \
+            if request.duration.seconds else None
+        equal = server_pb2.StrOp.Value("Equal")
+        conditions = [(c.key, c.op == equal, c.value)
+                      for c in request.conditions]
+
+        resp = server_pb2.ListMetricsResponse()
+        for series_type, labels, samples in self.series:
+            if series_type != metric_type or any(
+                    (labels.get(key) == value) != is_equal
+                    for key, is_equal, value in conditions):
+                continue
+
+            metric = resp.metrics.add()
+            for key, value in labels.items():
+                metric.labels[key] = value
+            for sample_time, value in samples:
+                if start_time is None or sample_time >= start_time:
+                    sample = metric.samples.add()
+                    sample.time.FromSeconds(sample_time)
+                    sample.value = value
+        return resp
+
+    def CreatePredictResult(self, request, context):
+        ''' Keep the predicted pods. '''
+        with self._lock:
+            self.predict_pods.extend(request.predict_pods)
+        return server_pb2.CreatePredictResultResponse()
+
+    def serve(self, address='127.0.0.1:0', max_workers=10):
+        ''' Start a gRPC server of the service.
+        Args:
+            address: the address to listen on; port 0 picks a free one.
+            max_workers: the maximum number of concurrent calls.
+        Returns:
+            (server, int): the started server, and its port.
+        '''
+        server = grpc.server(futures.ThreadPoolExecutor(
+            max_workers=max_workers))
+        server_pb2_grpc.add_OperatorServiceServicer_to_server(self, server)
+        port = server.add_insecure_port(address)
+        server.start()
+        return server, port
@@ -1,12 +1,51 @@
 # pylint: disable=import-error, no-self-use, unused-argument, invalid-name, no-member
 ''' The Metric DAO '''
 import grpc
+import numpy as np
 
 from alameda_api.v1alpha1.operator import server_pb2, server_pb2_grpc
+from framework.datastore.channel_pool import DEFAULT_POOL
 from framework.log.logger import Logger
 from framework.utils.sys_utils import get_metric_server_address
 
 
+def get_call_options(config):
+    ''' Get the deadline and compression options of a call by the
+    timeout_sec and compression of a DAO config '''
+    options = {"timeout": config["timeout_sec"]}
+    if config["compression"] == "gzip":
+        options["compression"] = grpc.Compression.Gzip
+    elif config["compression"] == "deflate":
+        options["compression"] = grpc.Compression.Deflate
+    return options
+
+
+def get_label_key(labels):
+    ''' Get the compact key of series labels '''
+    return tuple(sorted(labels.items()))
+
+
+def series_to_metrics(series_map):
+    ''' Convert observed series by label key to the metrics format of
+    get_container_observed_data '''
+    return [{"labels": dict(label_key),
+             "data": [{"time": time, "value": value} for time, value
+                      in zip(times.tolist(), values.tolist())]}
+            for label_key, (times, values) in series_map.items()]
+
+
+def metrics_to_series(metrics):
+    ''' Convert metrics of get_container_observed_data to observed series
+    by label key '''
+    series_map = {}
+    for metric in metrics:
+        data = metric.get("data") or []
+        series_map[get_label_key(metric["labels"])] = (
+            np.array([sample["time"] for sample in data], dtype='int64'),
+            np.array([sample["value"] for sample in data], dtype='float64'))
+    return series_map
+
+
 class MockMetricDAO(object):
     ''' Mock DAO '''
     def __init__(self):
@@ -27,6 +66,17 @@ class MockMetricDAO(object):
                          " namespace=%s, pod_name=%s, duration=%s",
                          str(metric_type), str(namespace),
                          str(pod_name), str(duration))
+        return self.__get_metrics()
+
+    def get_container_observed_series(self, metric_type, namespace, pod_name, duration):
+        ''' Get metrics as series '''
+        return metrics_to_series(self.get_container_observed_data(
+            metric_type, namespace, pod_name, duration))
+
+    @staticmethod
+    def __get_metrics():
+        # pylint: disable=line-too-long
+        ''' The mock metrics '''
         return [
             {
                 "data": [{"time": 1540970511, "value": 0.11933598524417476}, {"time": 1540970541, "value": 0.12222222222222222}, {"time": 1540970571, "value": 0.1211138025288804}, {"time": 1540970601, "value": 0.12064253815904132}, {"time": 1540970631, "value": 0.11799999999994824}, {"time": 1540970661, "value": 0.1175581679593074}, {"time": 1540970691, "value": 0.11978842563782154}, {"time": 1540970721, "value": 0.11999733339262363}, {"time": 1540970751, "value": 0.1177777777777616}, {"time": 1540970781, "value": 0.11555812351387203}, {"time": 1540970811, "value": 0.1153358963532232}, {"time": 1540970841, "value": 0.115775204995506}, {"time": 1540970871, "value": 0.11378536346865305}, {"time": 1540970901, "value": 0.11199751116643794}, {"time": 1540970931, "value": 0.11200248894413732}, {"time": 1540970961, "value": 0.11422222222220929}, {"time": 1540970991, "value": 0.11044444444447031}, {"time": 1540971021, "value": 0.11088642474615233}, {"time": 1540971051, "value": 0.11486591570570893}, {"time": 1540971081, "value": 0.12333607413496463}, {"time": 1540971111, "value": 0.12533611858039997}, {"time": 1540971141, "value": 0.12222222222222222}, {"time": 1540971171, "value": 0.12333333333331715}, {"time": 1540971201, "value": 0.12421670147993745}, {"time": 1540971231, "value": 0.1242498332962913}, {"time": 1540971261, "value": 0.12088083016684867}, {"time": 1540971291, "value": 0.12177236567262706}, {"time": 1540971321, "value": 0.12444444444449294}, {"time": 1540971351, "value": 0.12422774345526791}, {"time": 1540971381, "value": 0.12112187750023842}, {"time": 1540971411, "value": 0.11888888888885656}, {"time": 1540971441, "value": 0.11644703215630572}, {"time": 1540971471, "value": 0.1171111111111208}, {"time": 1540971501, "value": 0.12021687924980788}, {"time": 1540971531, "value": 0.12088888888885978}, {"time": 1540971561, "value": 0.11955289882449321}, {"time": 1540971591, "value": 0.11533845948714005}, {"time": 1540971621, "value": 0.11353284898577133}, {"time": 1540971651, "value": 0.11400253338957268}, {"time": 1540971681, "value": 0.1135378941052935}, {"time": 1540971711, "value": 0.1135732225012909}, {"time": 1540971741, "value": 0.11418923422121205}, {"time": 1540971771, "value": 0.11734376389017855}, {"time": 1540971801, "value": 0.1191164051735762}, {"time": 1540971831, "value": 0.11825112805359857}, {"time": 1540971861, "value": 0.11752682677569645}, {"time": 1540971891, "value": 0.1177777777777616}, {"time": 1540971921, "value": 0.11911640517349537}, {"time": 1540971951, "value": 0.11914553093108997}, {"time": 1540971981, "value": 0.12266666666667637}, {"time": 1540972011, "value": 0.123333333333398}, {"time": 1540972041, "value": 0.1213252449837292}, {"time": 1540972071, "value": 0.1168888888888533}, {"time": 1540972101, "value": 0.11799999999994824}, {"time": 1540972131, "value": 0.12133872616558795}, {"time": 1540972161, "value": 0.12422222222222544}, {"time": 1540972191, "value": 0.12510833092600207}, {"time": 1540972221, "value": 0.12311658295926203}, {"time": 1540972251, "value": 0.12266121505711827}, {"time": 1540972281, "value": 0.12288888888886301}, {"time": 1540972311, "value": 0.1226639408012444}, {"time": 1540972341, "value": 0.12044979776883176}, {"time": 1540972371, "value": 0.11755555555557495}, {"time": 1540972401, "value": 0.11776730957254714}, {"time": 1540972431, "value": 0.11821959512010198}, {"time": 1540972461, "value": 0.11955555555557819}, {"time": 1540972491, "value": 0.1144546181882349}, {"time": 1540972521, "value": 0.1135580790684367}, {"time": 1540972551, "value": 0.11133333333329776}, {"time": 1540972581, "value": 0.11666925931687372}, {"time": 1540972611, "value": 0.1191111111110432}, {"time": 1540972641, "value": 0.12042838732617632}, {"time": 1540972671, "value": 0.12177507166506443}, {"time": 1540972701, "value": 0.12218420935708889}, {"time": 1540972731, "value": 0.11912699471041878}, {"time": 1540972761, "value": 0.11464373791907961}, {"time": 1540972791, "value": 0.11247943804742164}, {"time": 1540972821, "value": 0.11578035067444005}, {"time": 1540972851, "value": 0.1169122713432028}, {"time": 1540972881, "value": 0.11510855314326997}, {"time": 1540972911, "value": 0.10976070389047683}, {"time": 1540972941, "value": 0.10822462721391547}, {"time": 1540972971, "value": 0.10778017289269862}, {"time": 1540973001, "value": 0.11223968172825266}, {"time": 1540973031, "value": 0.11221723478954873}, {"time": 1540973061, "value": 0.11421968400700915}, {"time": 1540973091, "value": 0.11333081487082916}, {"time": 1540973121, "value": 0.11089135314121648}, {"time": 1540973151, "value": 0.10466666666672811}, {"time": 1540973181, "value": 0.10732856317492798}, {"time": 1540973211, "value": 0.10955555555556203}],
@@ -42,22 +92,48 @@ class MockMetricDAO(object):
 class MetricDAO(object):
     ''' Metric DAO '''
 
-    def __init__(self, config=None):
-        ''' The construct methdo '''
-        if not config:
-            config = {
-                "metric_server": get_metric_server_address()
-            }
-        self.config = config
+    # Status codes of calls which are retried once on a new channel.
+    RECONNECT_CODES = (grpc.StatusCode.UNAVAILABLE,)
+
+    def __init__(self, config=None, channel_pool=None):
+        ''' The construct methdo
+        Args:
+            config: metric_server address, timeout_sec deadline of each
+                call, and compression of the calls, e.g. "gzip".
+            channel_pool: the ChannelPool of the channels to the server;
+                the one shared by the process if not given.
+        '''
+        self.config = {
+            "metric_server": get_metric_server_address(),
+            "timeout_sec": 30,
+            "compression": None
+        }
+        self.config.update(config or {})
+        self.channel_pool = channel_pool or DEFAULT_POOL
         self.logger = Logger()
         self.logger.info("Metric DAO config: %s", str(self.config))
 
     def __get_client(self):
         ''' Get the grpc client '''
         conn_str = self.config["metric_server"]
-        channel = grpc.insecure_channel(conn_str)
+        channel = self.channel_pool.get_channel(conn_str)
         return server_pb2_grpc.OperatorServiceStub(channel)
 
+    def __call(self, method, req):
+        ''' Call a method of the server, and call it again on a new
+        channel if the server was unavailable '''
+        try:
+            return getattr(self.__get_client(), method)(
+                req, **get_call_options(self.config))
+        except grpc.RpcError as e:
+            if e.code() not in self.RECONNECT_CODES:
+                raise
+            self.logger.warning("Reconnect to %s after %s error.",
+                                self.config["metric_server"], e.code())
+            self.channel_pool.reset(self.config["metric_server"])
+            return getattr(self.__get_client(), method)(
+                req, **get_call_options(self.config))
+
     def __get_metric_type_value(self, metric_type):
         ''' Get the metric type '''
         if metric_type == "cpu":
@@ -164,26 +240,110 @@ class MetricDAO(object):
             result.append(r)
         return result
 
+    def __parse_metric_series(self, data):
+        ''' Parse the samples of the metrics into int64 time and float64
+        value arrays by label key '''
+        result = {}
+        for d in data or []:
+            samples = d.samples
+            times = np.fromiter((sample.time.seconds for sample in samples),
+                                dtype='int64', count=len(samples))
+            values = np.fromiter((sample.value for sample in samples),
+                                 dtype='float64', count=len(samples))
+            label_key = get_label_key(d.labels)
+            if label_key in result:
+                times = np.concatenate((result[label_key][0], times))
+                values = np.concatenate((result[label_key][1], values))
+            result[label_key] = (times, values)
+        return result
+
+    def _get_predict_result_request(self, predictions):
+        ''' Get the request to write the predictions of pods '''
+        req = server_pb2.CreatePredictResultRequest()
+        for prediction in predictions:
+            pod = req.predict_pods.add()
+            pod.uid = prediction["uid"]
+            pod.namespace = prediction["namespace"]
+            pod.name = prediction["pod_name"]
+            pod.predict_containers.extend(list(
+                map(self.__parse_container_prediction_data,
+                    prediction["containers"]
+                   )
+            ))
+        return req
+
+    @staticmethod
+    def _check_predict_result_response(resp):
+        ''' Raise the error of a failed write '''
+        if resp.status.code != 0:
+            msg = "Write prediction error [code={}]".format(resp.status.code)
+            raise Exception(msg)
+
+    def _get_list_metrics_request(self, metric_type, conditions, duration):
+        ''' Get the request to list the metrics of the label conditions '''
+        req = server_pb2.ListMetricsRequest()
+        req.metric_type = self.__get_metric_type_value(metric_type)
+        req.duration.seconds = duration
+        # setup the query conditions
+        for key, value in conditions.items():
+            condition = req.conditions.add()
+            condition.key = key
+            condition.op = self.__get_op_type_value("equal")
+            condition.value = value
+        return req
+
+    def _parse_list_metrics_response(self, resp, columnar=False):
+        ''' Parse the metrics of a response, or raise its error '''
+        if resp.status.code == 0:
+            if columnar:
+                return self.__parse_metric_series(resp.metrics)
+            return self.__parse_metrics(resp.metrics)
+        msg = "List metric error [code={}]".format(resp.status.code)
+        raise Exception(msg)
+
+    @staticmethod
+    def _get_namespace_pods(pods):
+        ''' Group pod names by namespace; None for all pods '''
+        namespace_pods = {}
+        for namespace_name, pod_name in pods:
+            pod_names = namespace_pods.setdefault(namespace_name, set())
+            if pod_name is None or pod_names is None:
+                namespace_pods[namespace_name] = None
+            else:
+                pod_names.add(pod_name)
+        return namespace_pods
+
+    @staticmethod
+    def _add_pods_metrics(result, metric_type, namespace_name, pod_names,
+                          metrics):
+        ''' Group the metrics of a namespace by pod '''
+        for pod_name in pod_names or []:
+            result.setdefault((metric_type, namespace_name, pod_name), [])
+        for metric in metrics:
+            pod_name = metric["labels"].get("pod_name")
+            if pod_names is None or pod_name in pod_names:
+                result.setdefault((metric_type, namespace_name, pod_name),
+                                  []).append(metric)
+
+    @staticmethod
+    def _add_pods_series(result, metric_type, namespace_name, pod_names,
+                         series_map):
+        ''' Group the series of a namespace by pod '''
+        for pod_name in pod_names or []:
+            result.setdefault((metric_type, namespace_name, pod_name), {})
+        for label_key, series in series_map.items():
+            pod_name = dict(label_key).get("pod_name")
+            if pod_names is None or pod_name in pod_names:
+                result.setdefault((metric_type, namespace_name, pod_name),
+                                  {})[label_key] = series
+
     def write_container_prediction_data(self, prediction):
         ''' Write the prediction result to server. '''
         self.logger.info("Write prediction result: %s", str(prediction))
-        req = server_pb2.CreatePredictResultRequest()
-        pod = req.predict_pods.add()
-
-        pod.uid = prediction["uid"]
-        pod.namespace = prediction["namespace"]
-        pod.name = prediction["pod_name"]
-        pod.predict_containers.extend(list(
-            map(self.__parse_container_prediction_data,
-                prediction["containers"]
-               )
-        ))
+        req = self._get_predict_result_request([prediction])
         try:
-            client = self.__get_client()
-            resp = client.CreatePredictResult(req)
-            if resp.status.code != 0:
-                msg = "Write prediction error [code={}]".format(resp.status.code)
-                raise Exception(msg)
+            resp = self.__call("CreatePredictResult", req)
+            self._check_predict_result_response(resp)
         except Exception as e:
             self.logger.error("Could not get metrics: %s", str(e))
             raise e
@@ -192,33 +352,98 @@ class MetricDAO(object):
         ''' Write the container recommendation result '''
         self.write_container_prediction_data(data)
 
+    def write_pods_prediction_data(self, predictions):
+        ''' Write the prediction and recommendation results of many pods
+        in one request. '''
+        self.logger.info("Write prediction results of %d pods.",
+                         len(predictions))
+        req = self._get_predict_result_request(predictions)
+        try:
+            resp = self.__call("CreatePredictResult", req)
+            self._check_predict_result_response(resp)
+        except Exception as e:
+            self.logger.error("Could not get metrics: %s", str(e))
+            raise e
+
     def get_container_observed_data(self, metric_type, namespace_name, pod_name, duration):
         ''' Get the observed metrics '''
         self.logger.info("Get observed data: metric_type=%s, "
                          " namespace=%s, pod_name=%s, duration=%s",
                          str(metric_type), str(namespace_name),
                          str(pod_name), str(duration))
-        req = server_pb2.ListMetricsRequest()
-        req.metric_type = self.__get_metric_type_value(metric_type)
-        req.duration.seconds = duration
-        # setup the query conditions
-        namespace = req.conditions.add()
-        namespace.key = u"namespace"
-        namespace.op = self.__get_op_type_value("equal")
-        namespace.value = namespace_name
-        pod = req.conditions.add()
-        pod.key = u"pod_name"
-        pod.op = self.__get_op_type_value("equal")
-        pod.value = pod_name
+        return self.__list_metrics(
+            metric_type, {"namespace": namespace_name, "pod_name": pod_name},
+            duration)
+
+    def get_pods_observed_data(self, metric_types, pods, duration):
+        ''' Get the observed metrics of many pods, with one request per
+        namespace and metric type.
+        Args:
+            metric_types: metric types, e.g. "cpu" and "memory".
+            pods: (namespace, pod_name) of the pods; pod_name None for all
+                pods of the namespace.
+            duration: seconds of the metrics.
+        Returns:
+            dict: metrics in the format of get_container_observed_data by
+                (metric_type, namespace, pod_name), including the requested
+                pods without metrics.
+        '''
+        namespace_pods = self._get_namespace_pods(pods)
+        self.logger.info("Get observed data: metric_types=%s, "
+                         "namespaces=%s, pods=%d, duration=%s",
+                         str(metric_types), str(list(namespace_pods)),
+                         len(pods), str(duration))
+        result = {}
+        for metric_type in metric_types:
+            for namespace_name, pod_names in namespace_pods.items():
+                self._add_pods_metrics(
+                    result, metric_type, namespace_name, pod_names,
+                    self.__list_metrics(metric_type,
+                                        {"namespace": namespace_name},
+                                        duration))
+        return result
 
+    def get_container_observed_series(self, metric_type, namespace_name,
+                                      pod_name, duration):
+        ''' Get the observed metrics as series, without converting the
+        samples to dicts.
+        Returns:
+            dict: (times, values) of each series by label key, where times
+                are int64 epoch seconds and values are float64.
+        '''
+        self.logger.info("Get observed series: metric_type=%s, "
+                         " namespace=%s, pod_name=%s, duration=%s",
+                         str(metric_type), str(namespace_name),
+                         str(pod_name), str(duration))
+        return self.__list_metrics(
+            metric_type, {"namespace": namespace_name, "pod_name": pod_name},
+            duration, columnar=True)
+
+    def get_pods_observed_series(self, metric_types, pods, duration):
+        ''' Get the observed metrics of many pods as series, see
+        get_pods_observed_data and get_container_observed_series. '''
+        namespace_pods = self._get_namespace_pods(pods)
+        self.logger.info("Get observed series: metric_types=%s, "
+                         "namespaces=%s, pods=%d, duration=%s",
+                         str(metric_types), str(list(namespace_pods)),
+                         len(pods), str(duration))
+        result = {}
+        for metric_type in metric_types:
+            for namespace_name, pod_names in namespace_pods.items():
+                self._add_pods_series(
+                    result, metric_type, namespace_name, pod_names,
+                    self.__list_metrics(metric_type,
+                                        {"namespace": namespace_name},
+                                        duration, columnar=True))
+        return result
+
+    def __list_metrics(self, metric_type, conditions, duration,
+                       columnar=False):
+        ''' List the metrics of the label conditions '''
+        req = self._get_list_metrics_request(metric_type, conditions, duration)
         try:
-            client = self.__get_client()
-            resp = client.ListMetrics(req)
-            if resp.status.code == 0:
-                return self.__parse_metrics(resp.metrics)
-            else:
-                msg = "List metric error [code={}]".format(resp.status.code)
-                raise Exception(msg)
+            resp = self.__call("ListMetrics", req)
+            return self._parse_list_metrics_response(resp, columnar)
         except Exception as e:
             self.logger.error("Could not get metrics: %s", str(e))
             raise e
@@ -0,0 +1,168 @@
+''' On-disk store of time series in memory-mapped ring buffers. '''
+
+import json
+import os
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from framework.datastore.series_store import RingSeries, SeriesStore
+
+
+def _to_json_key(key):
+    ''' Convert nested tuples of a key to lists. '''
+    if isinstance(key, (tuple, list)):
+        return [_to_json_key(item) for item in key]
+    return key
+
+
+def _from_json_key(key):
+    ''' Convert nested lists of a stored key back to tuples. '''
+    if isinstance(key, list):
+        return tuple(_from_json_key(item) for item in key)
+    return key
+
+
+class MmapSeriesStore(SeriesStore):
+    # pylint: disable=invalid-name
+    ''' Ring buffer series by key, each kept in a fixed-width file which is
+    memory-mapped, so that windows are views of the file pages and the
+    series survive restarts.
+
+    A file has the int64 ring state, the int32 times and the values of its
+    series. The index file maps the series keys, e.g. the labels of a
+    container metric and its granularity, to their files.
+    '''
+
+    INDEX_FILE = 'index.json'
+    SUFFIX = '.ring'
+
+    def __init__(self, directory, capacity, num_fields=1, dtype='float64',
+                 readonly=False, index_interval_sec=10):
+        ''' The construct method
+        Args:
+            directory: the directory of the series files and index.
+            capacity: the maximum number of samples of each series.
+            num_fields: the number of values of each sample.
+            dtype: data type of the values, e.g. float32 or float64.
+            readonly: map the files read-only, e.g. in predictor workers.
+            index_interval_sec: the shortest interval between index writes;
+                series created or removed in it are written by the next
+                write or by flush().
+        '''
+        super(MmapSeriesStore, self).__init__(capacity, num_fields, dtype)
+        self.directory = directory
+        self.readonly = readonly
+        self.index_interval_sec = index_interval_sec
+        self._files = {}
+        self._index_dirty = False
+        self._index_time = None
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        ''' Map the series of the index. '''
+        index_path = os.path.join(self.directory, self.INDEX_FILE)
+        if not os.path.isfile(index_path):
+            return
+
+        with open(index_path) as index_file:
+            index = json.load(index_file)
+        layout = (self.capacity, self.num_fields, np.dtype(self.dtype).name)
+        stored_layout = (index['capacity'], index['num_fields'],
+                         index['dtype'])
+        if layout != stored_layout:
+            raise ValueError('Series store {} has layout {}, not {}'.format(
+                self.directory, stored_layout, layout))
+
+        for item in index['series']:
+            if not os.path.isfile(os.path.join(self.directory,
+                                               item['file'])):
+                # Removed after the last index write.
+                continue
+            key = _from_json_key(item['key'])
+            self._files[key] = item['file']
+            self._series[key] = RingSeries(
+                self.capacity, buffers=self._map_file(item['file']))
+
+    def _write_index(self):
+        ''' Replace the index atomically, since readers may load it at the
+        same time. '''
+        index = {
+            'capacity': self.capacity,
+            'num_fields': self.num_fields,
+            'dtype': np.dtype(self.dtype).name,
+            'series': [{'key': _to_json_key(key), 'file': file_name}
+                       for key, file_name in self._files.items()],
+        }
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.json')
+        with os.fdopen(fd, 'w') as index_file:
+            json.dump(index, index_file)
+        os.replace(temp_path, os.path.join(self.directory, self.INDEX_FILE))
+        self._index_dirty = False
+        self._index_time = time.monotonic()
+
+    def _update_index(self):
+        ''' Write the changed index unless it was written within the
+        interval, so that a burst of new series, e.g. at a cold start,
+        shares a few writes instead of one each. '''
+        self._index_dirty = True
+        if self._index_time is None or time.monotonic() - \
+                self._index_time >= self.index_interval_sec:
+            self._write_index()
+
+    def _map_file(self, file_name, create=False):
+        ''' Map the state, times and values arrays of a series file. '''
+        path = os.path.join(self.directory, file_name)
+        mode = 'r' if self.readonly else 'r+'
+        if create:
+            mode = 'w+'
+        length = 2 * self.capacity
+        times_offset = 4 * 8
+        values_offset = times_offset + length * 4
+        state = np.memmap(path, dtype='int64', mode=mode, shape=(4,))
+        if create:
+            mode = 'r+'
+            size = values_offset + length * self.num_fields * \
+                np.dtype(self.dtype).itemsize
+            with open(path, 'r+b') as series_file:
+                series_file.truncate(size)
+        times = np.memmap(path, dtype='int32', mode=mode,
+                          offset=times_offset, shape=(length,))
+        values = np.memmap(path, dtype=self.dtype, mode=mode,
+                           offset=values_offset,
+                           shape=(length, self.num_fields))
+        return state, times, values
+
+    def _create_series(self, key):
+        ''' Create the empty series file of a key. '''
+        file_name = str(uuid.uuid3(uuid.NAMESPACE_DNS, json.dumps(
+            _to_json_key(key)))) + self.SUFFIX
+        series = RingSeries(self.capacity,
+                            buffers=self._map_file(file_name, create=True))
+        self._files[key] = file_name
+        self._update_index()
+        return series
+
+    def remove(self, key):
+        ''' Remove the series of a key and its file. '''
+        with self._lock:
+            self._series.pop(key, None)
+            file_name = self._files.pop(key, None)
+            if file_name is None:
+                return
+            self._update_index()
+            os.remove(os.path.join(self.directory, file_name))
+
+    def flush(self):
+        ''' Write the changed pages of all series to their files, and the
+        changed index. '''
+        with self._lock:
+            if self._index_dirty:
+                self._write_index()
+        for series in list(self._series.values()):
+            for buffer in series.buffers:
+                buffer.flush()
@@ -0,0 +1,226 @@
+''' In-memory store of time series in fixed-capacity ring buffers. '''
+
+import threading
+
+import numpy as np
+
+
+class RingSeries(object):
+    # pylint: disable=invalid-name
+    ''' A series of the last samples up to a fixed capacity.
+
+    Times are int32 seconds after the first sample of the series, and each
+    sample is written twice, at its ring position and one capacity after
+    it, so that every window of the ring is a contiguous slice of the
+    buffers. Appends are O(1) and windows are views without copies.
+    '''
+
+    # Positions of the ring state in its int64 state array.
+    BASE_TIME, START, SIZE, HAS_BASE = range(4)
+
+    def __init__(self, capacity, num_fields=1, dtype='float64',
+                 buffers=None):
+        ''' The construct method
+        Args:
+            capacity: the maximum number of samples of the series.
+            num_fields: the number of values of each sample.
+            dtype: data type of the values, e.g. float32 or float64.
+            buffers: (state, times, values) arrays of allocate() to keep
+                the series in, e.g. memory-mapped ones; new arrays if not
+                given.
+        '''
+        self.capacity = capacity
+        if buffers is None:
+            buffers = self.allocate(capacity, num_fields, dtype)
+        self._state, self._times, self._values = buffers
+
+    @staticmethod
+    def allocate(capacity, num_fields=1, dtype='float64'):
+        ''' Allocate the state, times and values arrays of a series. '''
+        return (np.zeros(4, dtype='int64'),
+                np.zeros(2 * capacity, dtype='int32'),
+                np.zeros((2 * capacity, num_fields), dtype=dtype))
+
+    @property
+    def buffers(self):
+        ''' The state, times and values arrays of the series. '''
+        return self._state, self._times, self._values
+
+    @property
+    def base_time(self):
+        ''' Epoch seconds which the int32 times are after, or None if no
+        sample was appended. '''
+        if not self._state[self.HAS_BASE]:
+            return None
+        return int(self._state[self.BASE_TIME])
+
+    @base_time.setter
+    def base_time(self, time):
+        self._state[self.BASE_TIME] = time
+        self._state[self.HAS_BASE] = 1
+
+    @property
+    def _start(self):
+        return int(self._state[self.START])
+
+    @_start.setter
+    def _start(self, start):
+        self._state[self.START] = start
+
+    @property
+    def _size(self):
+        return int(self._state[self.SIZE])
+
+    @_size.setter
+    def _size(self, size):
+        self._state[self.SIZE] = size
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        ''' Bytes of the buffers of the series. '''
+        return self._times.nbytes + self._values.nbytes
+
+    @property
+    def last_time(self):
+        ''' Epoch seconds of the last sample, or None if the series is
+        empty. '''
+        if not self._size:
+            return None
+        return self.base_time + int(self._times[self._start + self._size - 1])
+
+    def append(self, time, values):
+        ''' Append a sample, and drop the first one if the series is full.
+        Args:
+            time: epoch seconds of the sample.
+            values: values of the sample fields.
+        '''
+        if self.base_time is None:
+            self.base_time = int(time)
+        end = (self._start + self._size) % self.capacity
+        for index in (end, end + self.capacity):
+            self._times[index] = int(time) - self.base_time
+            self._values[index] = values
+
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def extend(self, times, values):
+        ''' Append samples, and drop the first ones beyond the capacity.
+        Args:
+            times: (array) epoch seconds of the samples.
+            values: (array) samples x fields values.
+        '''
+        if not len(times):
+            return
+        times = np.asarray(times, dtype='int64')[-self.capacity:]
+        values = np.asarray(values).reshape(len(values), -1)[-self.capacity:]
+        if self.base_time is None:
+            self.base_time = int(times[0])
+
+        end = (self._start + self._size) % self.capacity
+        positions = (end + np.arange(len(times))) % self.capacity
+        for offset in (0, self.capacity):
+            self._times[positions + offset] = times - self.base_time
+            self._values[positions + offset] = values
+
+        overflow = max(0, self._size + len(times) - self.capacity)
+        self._start = (self._start + overflow) % self.capacity
+        self._size = min(self.capacity, self._size + len(times))
+
+    def trim(self, start_time):
+        ''' Drop the samples before a time.
+        Args:
+            start_time: epoch seconds of the first sample to keep.
+        '''
+        times, _ = self.window()
+        dropped = int(np.searchsorted(times, start_time - self.base_time)) \
+            if self._size else 0
+        self._start = (self._start + dropped) % self.capacity
+        self._size -= dropped
+
+    def window(self, start_time=None):
+        ''' Get the samples from a time.
+        Args:
+            start_time: epoch seconds of the first sample; all samples if
+                not given.
+        Returns:
+            (array, array): views of the int32 times after base_time, and
+                the samples x fields values.
+        '''
+        end = self._start + self._size
+        times = self._times[self._start:end]
+        start = self._start
+        if start_time is not None and self._size:
+            start += int(np.searchsorted(times, start_time - self.base_time))
+        return self._times[start:end], self._values[start:end]
+
+
+class SeriesStore(object):
+    ''' Ring buffer series by key, e.g. the labels of a container metric. '''
+
+    def __init__(self, capacity, num_fields=1, dtype='float64'):
+        ''' The construct method
+        Args:
+            capacity: the maximum number of samples of each series.
+            num_fields: the number of values of each sample.
+            dtype: data type of the values, e.g. float32 or float64.
+        '''
+        self.capacity = capacity
+        self.num_fields = num_fields
+        self.dtype = dtype
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._series)
+
+    def __contains__(self, key):
+        return key in self._series
+
+    def keys(self):
+        ''' Get the series keys. '''
+        return list(self._series)
+
+    @property
+    def nbytes(self):
+        ''' Bytes of the buffers of all series. '''
+        return sum(series.nbytes for series in self._series.values())
+
+    def get(self, key):
+        ''' Get the series of a key, or None if it is missing. '''
+        return self._series.get(key)
+
+    def get_or_create(self, key):
+        ''' Get the series of a key, created empty if it is missing. '''
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = self._create_series(key)
+            return series
+
+    def _create_series(self, key):
+        ''' Create the empty series of a key. '''
+        return RingSeries(self.capacity, self.num_fields, self.dtype)
+
+    def append(self, key, time, values):
+        ''' Append a sample to the series of a key. '''
+        self.get_or_create(key).append(time, values)
+
+    def extend(self, key, times, values):
+        ''' Append samples to the series of a key. '''
+        self.get_or_create(key).extend(times, values)
+
+    def window(self, key, start_time=None):
+        ''' Get the window views of the series of a key, see
+        RingSeries.window. '''
+        return self._series[key].window(start_time)
+
+    def remove(self, key):
+        ''' Remove the series of a key. '''
+        with self._lock:
+            self._series.pop(key, None)
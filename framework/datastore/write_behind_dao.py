@@ -0,0 +1,194 @@
+''' The metric DAO which batches the writes of many pods. '''
+
+import threading
+import time
+from collections import OrderedDict
+
+from framework.log.logger import Logger
+
+
+class WriteBehindDAO(object):
+    # pylint: disable=invalid-name, broad-except
+    ''' Queue the prediction and recommendation writes, merged per pod, and
+    write many pods per request from a thread of its own.
+
+    A batch is written when max_batch_pods pods are queued, or
+    flush_interval_sec after its first write was queued. Writers block
+    while max_queue_pods pods are queued. Other methods, e.g. the queries,
+    are delegated to the wrapped DAO.
+    '''
+
+    def __init__(self, dao, max_batch_pods=100, flush_interval_sec=1.0,
+                 max_queue_pods=1000, max_retries=3, backoff_sec=0.5):
+        ''' The construct method
+        Args:
+            dao: the wrapped DAO, which has write_pods_prediction_data.
+            max_batch_pods: the maximum number of pods of a request.
+            flush_interval_sec: the longest wait of a queued write.
+            max_queue_pods: the maximum number of queued pods.
+            max_retries: retries of a failed request, after which its pods
+                are dropped.
+            backoff_sec: wait before the first retry, doubled by each one.
+        '''
+        self.dao = dao
+        self.max_batch_pods = max_batch_pods
+        self.flush_interval_sec = flush_interval_sec
+        self.max_queue_pods = max_queue_pods
+        self.max_retries = max_retries
+        self.backoff_sec = backoff_sec
+        self.logger = Logger()
+        self.dropped_pods = 0
+        # Payloads by pod; writes of a pod are merged into its last payload
+        # unless they write the same metric, e.g. of the next cycle.
+        self._queue = OrderedDict()
+        self._queue_pods = 0
+        self._first_queued = None
+        self._writing = 0
+        self._flushing = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run,
+                                        name='write-behind-dao', daemon=True)
+        self._thread.start()
+
+    def __getattr__(self, name):
+        return getattr(self.dao, name)
+
+    def write_container_prediction_data(self, prediction):
+        ''' Queue the prediction result of a pod '''
+        self._put(prediction)
+
+    def write_container_recommendation_result(self, data):
+        ''' Queue the recommendation result of a pod '''
+        self._put(data)
+
+    def _put(self, data):
+        key = (data.get("uid"), data.get("namespace"), data.get("pod_name"))
+        with self._condition:
+            payloads = self._queue.get(key)
+            if payloads and self._merge(payloads[-1], data):
+                return
+
+            self._condition.wait_for(
+                lambda: self._queue_pods < self.max_queue_pods or
+                self._closed)
+            payload = dict(data, containers=[])
+            self._merge(payload, data)
+            self._queue.setdefault(key, []).append(payload)
+            self._queue_pods += 1
+            if self._first_queued is None:
+                self._first_queued = time.monotonic()
+            self._condition.notify_all()
+
+    @staticmethod
+    def _merge(payload, data):
+        ''' Merge the containers of a write into a payload of its pod.
+        Returns:
+            bool: False if both write a metric or recommendations of a
+                container, and nothing is merged.
+        '''
+        containers = {container["container_name"]: container
+                      for container in payload["containers"]}
+        for container in data.get("containers", []):
+            merged = containers.get(container["container_name"], {})
+            if set(merged.get("raw_predict", {})) & \
+                    set(container.get("raw_predict", {})):
+                return False
+            if merged.get("recommendations") and \
+                    container.get("recommendations"):
+                return False
+
+        for container in data.get("containers", []):
+            merged = containers.get(container["container_name"])
+            if merged is None:
+                merged = containers[container["container_name"]] = {}
+                payload["containers"].append(merged)
+            for field, value in container.items():
+                if field == "raw_predict":
+                    merged.setdefault(field, {}).update(value)
+                elif field == "recommendations":
+                    merged.setdefault(field, []).extend(value)
+                else:
+                    merged[field] = value
+        return True
+
+    def _take_batch(self):
+        ''' Wait for a full or due batch, and take it off the queue '''
+        with self._condition:
+            while True:
+                if self._queue_pods >= self.max_batch_pods or \
+                        ((self._closed or self._flushing) and
+                         self._queue_pods):
+                    break
+                if self._closed:
+                    return None
+                if self._first_queued is None:
+                    self._condition.wait()
+                    continue
+                timeout = self._first_queued + self.flush_interval_sec - \
+                    time.monotonic()
+                if timeout <= 0:
+                    break
+                self._condition.wait(timeout)
+
+            batch = []
+            while self._queue and len(batch) < self.max_batch_pods:
+                key = next(iter(self._queue))
+                payloads = self._queue[key]
+                batch.append(payloads.pop(0))
+                if not payloads:
+                    del self._queue[key]
+            self._queue_pods -= len(batch)
+            self._first_queued = time.monotonic() if self._queue_pods \
+                else None
+            self._writing += 1
+            self._condition.notify_all()
+            return batch
+
+    def _write_batch(self, batch):
+        ''' Write a batch, retrying with backoff '''
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.dao.write_pods_prediction_data(batch)
+                return
+            except Exception as e:
+                self.logger.warning("Write %d pods error (attempt %d): %s",
+                                    len(batch), attempt + 1, str(e))
+                if attempt < self.max_retries:
+                    time.sleep(self.backoff_sec * 2 ** attempt)
+
+        self.logger.error("Dropped the results of %d pods.", len(batch))
+        self.dropped_pods += len(batch)
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            try:
+                self._write_batch(batch)
+            finally:
+                with self._condition:
+                    self._writing -= 1
+                    self._condition.notify_all()
+
+    def flush(self):
+        ''' Write the queued results, and wait for them. '''
+        with self._condition:
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                self._condition.wait_for(
+                    lambda: not self._queue_pods and not self._writing)
+            finally:
+                self._flushing -= 1
+
+    def close(self):
+        ''' Write the queued results, and stop the writing thread. '''
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        close = getattr(self.dao, "close", None)
+        if close is not None:
+            close()
@@ -1,11 +1,43 @@
 '''Main entrypoint for workload prediction.'''
 
 # pylint: disable=E0611
-import time
 from framework.log.logger import Logger, LogLevel
 from framework.datastore.file_dao import FileDataStore
+from framework.datastore.async_metric_dao import AsyncMetricDAO
+from framework.datastore.cached_metric_dao import CachedMetricDAO
+from framework.datastore.mmap_series_store import MmapSeriesStore
+from framework.datastore.write_behind_dao import WriteBehindDAO
 from services.arima.workload_prediction.workload_predictor \
     import WorkloadPredictor
+from services.arima.workload_prediction.worker_pool \
+    import PredictionWorkerPool
+from services.arima.workload_prediction.scheduler import PredictionScheduler
+
+
+def get_pod_list(log, dao, predictor=None):
+    '''Get the pods to be predicted from the datastore, and prefetch their
+    observed data in bulk if a predictor is given.'''
+
+    pod_list = []
+    for k, v in dao.read_data().items():
+        try:
+            pod = {
+                "namespace": k[0],
+                "uid": k[1],
+                "pod_name": k[2],
+                "type": v["type"],
+                "policy": v["policy"]
+            }
+        except (IndexError, KeyError):
+            log.error("Not predicting POD %s:%s, "
+                      "due to wrong format of pod info.", k, v)
+            continue
+
+        pod_list.append(pod)
+
+    if predictor is not None:
+        predictor.prefetch(pod_list)
+    return pod_list
 
 
 def main():
@@ -18,31 +50,42 @@ def main():
     predictor_log = Logger(name='workload_prediction',
                            logfile='/var/log/workload_prediction.log',
                            level=LogLevel.LV_DEBUG)
-    predictor = WorkloadPredictor(log=predictor_log)
+    # prediction worker processes are forked before the DAOs start their
+    # threads, since a child forked with them may deadlock on their locks
+    worker_pool = PredictionWorkerPool(predictor_log)
+    worker_pool.start()
+
+    # only the samples newer than the cached window are queried each cycle,
+    # and the cached windows are kept on disk across restarts; queries run
+    # concurrently, and results of many pods are written per request
+    metric_dao = WriteBehindDAO(CachedMetricDAO(
+        AsyncMetricDAO(), store=MmapSeriesStore(
+            '/alameda-ai/.fs/observed', capacity=4096)))
+    # coarser granularities are rolled up from the queried 30s series, and
+    # the rolled up series are kept on disk across restarts
+    predictor = WorkloadPredictor(
+        log=predictor_log, dao=metric_dao, in_memory=True,
+        worker_pool=worker_pool, granularities=('30s', '1h', '6h', '12h'),
+        rollup_store=MmapSeriesStore('/alameda-ai/.fs/rollup',
+                                     capacity=1024))
 
     # file datastore to get pod list
     dao = FileDataStore()
 
-    while True:
-
-        pod_list = dao.read_data()
-        for k, v in pod_list.items():
-            try:
-                pod = {
-                    "namespace": k[0],
-                    "uid": k[1],
-                    "pod_name": k[2],
-                    "type": v["type"],
-                    "policy": v["policy"]
-                }
-            except (IndexError, KeyError):
-                log.error("Not predicting POD %s:%s, "
-                          "due to wrong format of pod info.", k, v)
-                continue
-
-            predictor.predict(pod)
-
-        time.sleep(60)
+    # pods are predicted concurrently, and cycles start on a fixed cadence;
+    # series left when a cycle is over its budget are predicted fast
+    scheduler = PredictionScheduler.from_config(log)
+    try:
+        scheduler.run_forever(
+            lambda: get_pod_list(log, dao, predictor),
+            lambda pod: predictor.predict(
+                pod, deadline=scheduler.cycle_deadline))
+    finally:
+        scheduler.close()
+        predictor.close()
+        metric_dao.close()
+        metric_dao.store.flush()
+        predictor.rollup_store.flush()
 
     log.info("Workload prediction is completed.")
 
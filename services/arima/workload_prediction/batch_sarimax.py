@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+""" Batched SARIMAX engine """
+# pylint: disable=E0401
+import numpy as np
+
+
+# Initial variance of the approximate diffuse state of the filter.
+DIFFUSE_VARIANCE = 1e6
+
+# Lower bound of the one-step forecast variance of the filter.
+MIN_FORECAST_VARIANCE = 1e-12
+
+
+class BatchSARIMAX:
+    """SARIMA models of the same orders over many series of the same length.
+
+    The series are stacked into arrays of series x time steps, and the
+    differencing, fitting, Kalman filtering and forecasting run over all of
+    them in vectorized passes, instead of building one statsmodels model per
+    series.
+
+    Parameters of each series are laid out as in statsmodels SARIMAX without
+    trend, i.e. ar, ma, seasonal ar, seasonal ma and sigma2, so that stored
+    parameters are exchangeable with SARIMAXPredictor.predict. Unlike
+    statsmodels, the series are differenced explicitly, the parameters are
+    fitted by conditional sum of squares, and the filter starts from an
+    approximate diffuse state.
+    """
+
+    def __init__(self, order, seasonal_order, max_iter=50, tol=1e-8):
+        """Initialize the engine.
+
+        Args:
+            order: (p, d, q) of the models.
+            seasonal_order: (P, D, Q, s) of the models.
+            max_iter: the maximum number of fitting iterations.
+            tol: relative decrease of the sum of squares below which a fit
+                is converged.
+        """
+        self.order = tuple(order)
+        self.seasonal_order = tuple(seasonal_order)
+        self.max_iter = max_iter
+        self.tol = tol
+
+        p, _, q = self.order
+        s_p, _, s_q, period = self.seasonal_order
+        self.k_params = p + q + s_p + s_q + 1
+        self.k_ar = p + period * s_p
+        self.k_ma = q + period * s_q
+        self.k_states = max(self.k_ar, self.k_ma + 1)
+
+    def difference(self, endog):
+        """Difference the series by the differencing orders.
+
+        Args:
+            endog: (array) series x time steps.
+
+        Returns:
+            array: the differenced series.
+        """
+        diffed = np.asarray(endog, dtype='float64')
+        for _ in range(self.order[1]):
+            diffed = diffed[:, 1:] - diffed[:, :-1]
+        period = self.seasonal_order[3]
+        for _ in range(self.seasonal_order[1]):
+            diffed = diffed[:, period:] - diffed[:, :-period]
+        return diffed
+
+    def integrate(self, endog, diffed_forecast):
+        """Integrate forecasts of the differenced series back.
+
+        Args:
+            endog: (array) observed series x time steps.
+            diffed_forecast: (array) forecasts of the differenced series.
+
+        Returns:
+            array: forecasts of the series.
+        """
+        coefs = np.array([1.])
+        for _ in range(self.order[1]):
+            coefs = np.convolve(coefs, [1., -1.])
+        period = self.seasonal_order[3]
+        for _ in range(self.seasonal_order[1]):
+            coefs = np.convolve(coefs, np.r_[1., np.zeros(period - 1), -1.])
+
+        num_obs = endog.shape[1]
+        steps = diffed_forecast.shape[1]
+        # Lags of each step, from the last one.
+        lag_coefs = coefs[:0:-1]
+        extended = np.concatenate((endog, diffed_forecast), axis=1)
+        for step in range(num_obs, num_obs + steps):
+            extended[:, step] -= np.dot(
+                extended[:, step - len(lag_coefs):step], lag_coefs)
+        return extended[:, num_obs:]
+
+    def get_polynomials(self, params):
+        """Get the lag coefficients of the reduced ARMA models.
+
+        Args:
+            params: (array) series x parameters, sigma2 may be left out.
+
+        Returns:
+            (array, array): ar and ma coefficients of lags 1, 2, ..., where
+                w(t) = sum ar(i) w(t-i) + e(t) + sum ma(j) e(t-j).
+        """
+        p, _, q = self.order
+        s_p, _, s_q, period = self.seasonal_order
+        params = np.atleast_2d(params)
+        num_series = len(params)
+        splits = np.cumsum([p, q, s_p, s_q])
+        ar, ma, s_ar, s_ma = np.split(params[:, :splits[-1]], splits[:-1],
+                                      axis=1)
+
+        ar_poly = _lag_polynomial(-ar, 1, num_series)
+        s_ar_poly = _lag_polynomial(-s_ar, period, num_series)
+        ma_poly = _lag_polynomial(ma, 1, num_series)
+        s_ma_poly = _lag_polynomial(s_ma, period, num_series)
+        return (-_multiply_polynomials(ar_poly, s_ar_poly)[:, 1:],
+                _multiply_polynomials(ma_poly, s_ma_poly)[:, 1:])
+
+    def fit(self, endog, start_params=None):
+        """Fit the models by conditional sum of squares.
+
+        The ARMA parameters of all series are fitted together by
+        Levenberg-Marquardt iterations with finite-difference Jacobians.
+
+        Args:
+            endog: (array) series x time steps.
+            start_params: (array) series x parameters to start from; zeros
+                if not given.
+
+        Returns:
+            array: fitted series x parameters; rows of series which could not
+                be fitted are NaN.
+        """
+        diffed = self.difference(endog)
+        num_series = len(diffed)
+        k_arma = self.k_params - 1
+        if start_params is None:
+            params = np.zeros((num_series, k_arma))
+        else:
+            params = np.array(start_params, dtype='float64')[:, :k_arma]
+            params[~np.isfinite(params)] = 0
+
+        resid = self._css_residuals(diffed, params)
+        ssr = np.sum(resid ** 2, axis=1)
+        damping = np.full(num_series, 1e-3)
+        active = np.isfinite(ssr)
+        for _ in range(self.max_iter if k_arma else 0):
+            if not active.any():
+                break
+
+            index = np.nonzero(active)[0]
+            jac = self._css_jacobian(diffed[index], params[index],
+                                     resid[index])
+            hess = np.matmul(jac.transpose(0, 2, 1), jac)
+            grad = np.matmul(jac.transpose(0, 2, 1),
+                             resid[index][:, :, None])[:, :, 0]
+            diag = np.diagonal(hess, axis1=1, axis2=2)
+            hess = hess + (damping[index, None] * diag + 1e-12)[:, :, None] * \
+                np.eye(k_arma)
+            new_params = params[index] - np.linalg.solve(
+                hess, grad[:, :, None])[:, :, 0]
+
+            new_resid = self._css_residuals(diffed[index], new_params)
+            new_ssr = np.sum(new_resid ** 2, axis=1)
+            better = np.isfinite(new_ssr) & (new_ssr < ssr[index])
+            decrease = (ssr[index] - new_ssr) / np.maximum(ssr[index], 1e-300)
+
+            updated = index[better]
+            params[updated] = new_params[better]
+            resid[updated] = new_resid[better]
+            ssr[updated] = new_ssr[better]
+            damping[index] = np.where(better, damping[index] / 10,
+                                      damping[index] * 10)
+            active[index[(better & (decrease < self.tol)) |
+                         (damping[index] > 1e10)]] = False
+
+        sigma2 = ssr / max(resid.shape[1], 1)
+        params = np.column_stack((params, sigma2))
+        params[~np.isfinite(params).all(axis=1)] = np.nan
+        return params
+
+    def filter(self, endog, params, steps=0):
+        """Run the Kalman filter and forecast the series.
+
+        Args:
+            endog: (array) series x time steps.
+            params: (array) series x parameters.
+            steps: the number of forecast steps.
+
+        Returns:
+            (array, array): log-likelihood of each series, and series x steps
+                forecasts.
+        """
+        endog = np.asarray(endog, dtype='float64')
+        diffed = self.difference(endog)
+        ar, ma = self.get_polynomials(params)
+        ar, selection = self._get_state_space(ar, ma)
+        sigma2 = np.asarray(params, dtype='float64')[:, -1]
+        state_cov = sigma2[:, None, None] * \
+            selection[:, :, None] * selection[:, None, :]
+
+        num_series, num_obs = diffed.shape
+        state = np.zeros((num_series, self.k_states))
+        state_var = np.tile(DIFFUSE_VARIANCE * np.eye(self.k_states),
+                            (num_series, 1, 1))
+        loglike = np.zeros(num_series)
+        for step in range(num_obs):
+            forecast_error = diffed[:, step] - state[:, 0]
+            forecast_var = np.maximum(state_var[:, 0, 0],
+                                      MIN_FORECAST_VARIANCE)
+            gain = state_var[:, :, 0] / forecast_var[:, None]
+            state = state + gain * forecast_error[:, None]
+            state_var = state_var - gain[:, :, None] * state_var[:, None, 0, :]
+            if step >= self.k_states:
+                loglike -= 0.5 * (np.log(2 * np.pi * forecast_var) +
+                                  forecast_error ** 2 / forecast_var)
+
+            state = _transition(state[:, :, None], ar)[:, :, 0]
+            state_var = _transition(
+                _transition(state_var, ar).transpose(0, 2, 1), ar) + state_cov
+
+        diffed_forecast = np.empty((num_series, steps))
+        for step in range(steps):
+            diffed_forecast[:, step] = state[:, 0]
+            state = _transition(state[:, :, None], ar)[:, :, 0]
+        return loglike, self.integrate(endog, diffed_forecast)
+
+    def _get_state_space(self, ar, ma):
+        """Get the first column of the transition matrix and the selection
+        vector of the Harvey representation."""
+        num_series = len(ar)
+        transition = np.zeros((num_series, self.k_states))
+        transition[:, :ar.shape[1]] = ar
+        selection = np.zeros((num_series, self.k_states))
+        selection[:, 0] = 1
+        selection[:, 1:ma.shape[1] + 1] = ma
+        return transition, selection
+
+    def _css_residuals(self, diffed, params):
+        """Get the residuals of the series given the ARMA parameters."""
+        ar, ma = self.get_polynomials(params)
+        num_obs = diffed.shape[1]
+        resid = diffed[:, self.k_ar:].copy()
+        for lag in range(1, self.k_ar + 1):
+            resid -= ar[:, lag - 1:lag] * \
+                diffed[:, self.k_ar - lag:num_obs - lag]
+        if not self.k_ma:
+            return resid
+
+        # Moving average terms are recursive in the residuals, which start
+        # from zeros.
+        padded = np.zeros((len(diffed), self.k_ma + resid.shape[1]))
+        ma_lags = ma[:, ::-1]
+        for step in range(resid.shape[1]):
+            padded[:, self.k_ma + step] = resid[:, step] - np.einsum(
+                'ij,ij->i', ma_lags, padded[:, step:self.k_ma + step])
+        return padded[:, self.k_ma:]
+
+    def _css_jacobian(self, diffed, params, resid):
+        """Get the forward-difference Jacobian of the residuals."""
+        jac = np.empty(resid.shape + (params.shape[1],))
+        for index in range(params.shape[1]):
+            delta = 1e-6 * np.maximum(np.abs(params[:, index]), 1)
+            shifted = params.copy()
+            shifted[:, index] += delta
+            jac[:, :, index] = (self._css_residuals(diffed, shifted) -
+                                resid) / delta[:, None]
+        return jac
+
+
+def _lag_polynomial(coefs, period, num_series):
+    """Get the coefficients of 1 + sum coefs(i) B^(period * i)."""
+    poly = np.zeros((num_series, coefs.shape[1] * period + 1))
+    poly[:, 0] = 1
+    poly[:, period::period] = coefs
+    return poly
+
+
+def _multiply_polynomials(left, right):
+    """Multiply the polynomials of each series."""
+    product = np.zeros((len(left), left.shape[1] + right.shape[1] - 1))
+    for power in range(left.shape[1]):
+        product[:, power:power + right.shape[1]] += \
+            left[:, power:power + 1] * right
+    return product
+
+
+def _transition(matrix, ar):
+    """Multiply the companion transition matrices by the matrices.
+
+    The transition matrix has the ar coefficients in its first column and
+    ones on its superdiagonal, so the product only takes the first row of
+    the matrix and shifts the others up.
+    """
+    product = ar[:, :, None] * matrix[:, None, 0, :]
+    product[:, :-1, :] += matrix[:, 1:, :]
+    return product
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+""" Fallback predictor """
+# pylint: disable=E0401
+import os
+import yaml
+import numpy as np
+
+from framework.log.logger import Logger
+from services.arima.workload_prediction.preprocessor import Preprocessor
+
+
+class FallbackCase:  # pylint: disable=too-few-public-methods
+    """ Cases of series which are not predicted by SARIMAX """
+    SHORT = 'short'
+    FAST = 'fast'
+    DEADLINE = 'deadline'
+    ERROR = 'error'
+
+
+class SeasonalNaiveForecaster:  # pylint: disable=too-few-public-methods
+    """ Repeat the last season of each series """
+
+    def __init__(self, season=16):
+        self.season = season
+
+    def forecast(self, values, steps):
+        """Forecast series of the same length.
+
+        Args:
+            values: (array) series x time steps.
+            steps: the number of forecast steps.
+
+        Returns:
+            array: series x steps forecasts.
+        """
+        season = max(1, min(self.season, values.shape[1]))
+        repeats = -(-steps // season)
+        return np.tile(values[:, -season:], (1, repeats))[:, :steps]
+
+
+class EWMAForecaster:  # pylint: disable=too-few-public-methods
+    """ Repeat the exponentially weighted moving average of each series """
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+
+    def forecast(self, values, steps):
+        """Forecast series of the same length.
+
+        Args:
+            values: (array) series x time steps.
+            steps: the number of forecast steps.
+
+        Returns:
+            array: series x steps forecasts.
+        """
+        num_sample = values.shape[1]
+        # The average starts from the first sample.
+        weights = self.alpha * (1 - self.alpha) ** np.arange(
+            num_sample - 1, -1, -1)
+        weights[0] = (1 - self.alpha) ** (num_sample - 1)
+        level = np.dot(values, weights)
+        return np.repeat(level[:, None], steps, axis=1)
+
+
+class HoltWintersForecaster:  # pylint: disable=too-few-public-methods
+    """ Additive Holt-Winters smoothing with a damped trend """
+
+    def __init__(self, alpha=0.5, beta=0.1, gamma=0.1, damping=0.9,
+                 season=16):
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.damping = damping
+        self.season = season
+
+    def forecast(self, values, steps):
+        """Forecast series of the same length.
+
+        Series shorter than two seasons are smoothed without seasonality.
+
+        Args:
+            values: (array) series x time steps.
+            steps: the number of forecast steps.
+
+        Returns:
+            array: series x steps forecasts.
+        """
+        num_sample = values.shape[1]
+        if num_sample >= 2 * self.season:
+            period = self.season
+            level = values[:, :period].mean(axis=1)
+            trend = (values[:, period:2 * period].mean(axis=1) - level) / \
+                period
+            seasonal = values[:, :period] - level[:, None]
+            gamma = self.gamma
+        else:
+            period = 1
+            level = values[:, 0]
+            trend = np.zeros(len(values))
+            seasonal = np.zeros((len(values), 1))
+            gamma = 0
+
+        for step in range(period, num_sample):
+            index = step % period
+            last_level = level
+            level = self.alpha * (values[:, step] - seasonal[:, index]) + \
+                (1 - self.alpha) * (level + self.damping * trend)
+            trend = self.beta * (level - last_level) + \
+                (1 - self.beta) * self.damping * trend
+            seasonal[:, index] = gamma * (values[:, step] - level) + \
+                (1 - gamma) * seasonal[:, index]
+
+        horizons = np.arange(1, steps + 1)
+        damped = np.cumsum(self.damping ** horizons)
+        return level[:, None] + damped * trend[:, None] + \
+            seasonal[:, (num_sample - 1 + horizons) % period]
+
+
+# Forecasters by name, which the configuration refers to.
+FORECASTERS = {
+    'seasonal_naive': SeasonalNaiveForecaster,
+    'ewma': EWMAForecaster,
+    'holt_winters': HoltWintersForecaster,
+}
+
+
+class FallbackPredictor:
+    """Cheap forecasters of the series which are not predicted by SARIMAX,
+    run over many series at once."""
+
+    def __init__(self, log=None, config_file=None):
+        """Initialize the predictor.
+
+        Args:
+            config_file: configuration file of the forecaster of each case
+
+        Returns: none
+        """
+
+        self.TIMES = 'times'
+        self.VALUES = 'values'
+
+        self.log = log or Logger()
+
+        if config_file is None:
+            config_file = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                'config/fallback_conf.yaml')
+
+        try:
+            with open(config_file, 'r') as stream:
+                self.cfg = yaml.safe_load(stream)
+        except FileNotFoundError:
+            self.log.error("Fallback predictor's configure file not found.")
+            raise
+
+        self.forecasters = {
+            case: FORECASTERS[name](**(self.cfg.get(name) or {}))
+            for case, name in self.cfg['cases'].items()}
+
+    def predict(self, observed_data, predict_steps, case):
+        """ Make predictions of a series
+
+        Args:
+            observed_data: observed data in the format of
+                SARIMAXPredictor.predict.
+            predict_steps: indicate predicting how many time steps
+            case: (FallbackCase) why the series is not predicted by SARIMAX
+
+        Return:
+            predicted_data with the same data format as observed_data
+        """
+        return self.predict_batch([observed_data], [predict_steps], case)[0]
+
+    def predict_batch(self, observed_list, predict_steps, case):
+        """ Make predictions of many series of the same case
+
+        Series of the same length are forecast together.
+
+        Args:
+            observed_list: (list) observed_data of each series.
+            predict_steps: (list) the number of prediction steps of each
+                series.
+            case: (FallbackCase) why the series are not predicted by SARIMAX
+
+        Return:
+            list: predicted_data of each series
+        """
+
+        forecaster = self.forecasters[case]
+        pre = Preprocessor()
+        groups = {}
+        for index, observed_data in enumerate(observed_list):
+            observed_data[self.VALUES] = pre.impute_missing_value(
+                observed_data[self.VALUES])
+            observed_data[self.TIMES] = np.array(
+                observed_data[self.TIMES], dtype='int64')
+            groups.setdefault(len(observed_data[self.VALUES]), []).append(
+                index)
+
+        predicted_list = [None] * len(observed_list)
+        for indexes in groups.values():
+            values = np.array([observed_list[i][self.VALUES][:, 0]
+                               for i in indexes], dtype='float64')
+            predictions = forecaster.forecast(
+                values, max(predict_steps[i] for i in indexes))
+            for index, prediction in zip(indexes, predictions):
+                steps = predict_steps[index]
+                predicted_list[index] = {
+                    self.VALUES: prediction[:steps].reshape(-1, 1),
+                    self.TIMES: observed_list[index][self.TIMES][-1] +
+                                np.arange(steps) + 1
+                }
+
+        self.log.debug("%d series predicted by %s fallback forecaster.",
+                       len(observed_list), case)
+        return predicted_list
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+""" Store of fitted model parameters """
+# pylint: disable=E0401
+import os
+import tempfile
+import numpy as np
+
+
+class ModelStore:
+    """Store fitted parameters per series model path, so that the next fit
+    of the series can start from them."""
+
+    SUFFIX = '.npz'
+
+    def __init__(self, log=None):
+        self.log = log
+
+    def load(self, model_path, version):
+        """Load the parameters of a model.
+
+        Args:
+            model_path: (str) model path of the series.
+            version: (str) version of the model, e.g. its orders.
+
+        Returns:
+            dict: the stored arrays, or None if the model is missing or of
+                another version.
+        """
+        file_path = model_path + self.SUFFIX
+        if not os.path.isfile(file_path):
+            return None
+
+        try:
+            with np.load(file_path) as stored:
+                if str(stored['version']) != version:
+                    return None
+                return {k: stored[k] for k in stored.files if k != 'version'}
+        except Exception as err:  # pylint: disable=W0703
+            if self.log:
+                self.log.warning('Load model %s error: %s', file_path, err)
+            return None
+
+    def save(self, model_path, version, **arrays):
+        """Save the parameters of a model.
+
+        The file is replaced atomically, since workers of other series may
+        read it at the same time.
+
+        Args:
+            model_path: (str) model path of the series.
+            version: (str) version of the model, e.g. its orders.
+            arrays: arrays to be stored, e.g. params.
+        """
+        file_path = model_path + self.SUFFIX
+        file_dir = os.path.dirname(file_path)
+        try:
+            if file_dir and not os.path.exists(file_dir):
+                os.makedirs(file_dir, exist_ok=True)
+
+            fd, temp_path = tempfile.mkstemp(dir=file_dir or None,
+                                             suffix=self.SUFFIX)
+            with os.fdopen(fd, 'wb') as outfile:
+                np.savez(outfile, version=np.array(version), **arrays)
+            os.replace(temp_path, file_path)
+        except Exception as err:  # pylint: disable=W0703
+            if self.log:
+                self.log.warning('Save model %s error: %s', file_path, err)
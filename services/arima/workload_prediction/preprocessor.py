@@ -2,7 +2,15 @@
 """ For Preprocessing of data before entering the predictor """
 # pylint: disable=E0401
 import numpy as np
-from sklearn.preprocessing import Imputer
+
+
+class ImputePolicy:  # pylint: disable=too-few-public-methods
+    """Policies to impute missing values of a field"""
+    NONE = 'none'
+    ZERO = 'zero'
+    MEAN = 'mean'
+    FFILL = 'ffill'
+    INTERPOLATE = 'interpolate'
 
 
 class Preprocessor:
@@ -27,31 +35,173 @@ class Preprocessor:
         return data
 
     def impute_missing_value(self, data):
-        """ Impute missing values using sklearn
+        """ Impute missing values of data read from files by field means
 
         Args:
             data: an numpy array
         Returns: data where missing values been imputed
         """
         # Missing value is '' in the array
-        # index_null = np.where('' == data)
-
-        # If there is missing value
-        # if index_null[0].size > 0:
         data_dtype = str(data.dtype)
         if data_dtype.find('float') == -1 and data_dtype.find('int') == -1:
-            # Replace '' with np.nan
-            np.place(data, data == '', np.nan)
+            data = np.where(data == '', 'nan', data).astype('float32')
+            self.impute_missing_fields(data, ImputePolicy.MEAN)
+
+        return data
 
-            data = np.array(data, dtype='float32')
+    def resample_series(self, times, values, offsets):
+        """ Resample series onto their regular time grid in one pass
 
-            # Create the imputer
-            imp = Imputer(missing_values=np.nan, strategy='mean', axis=0)
+        Samples are snapped to the grid by their time index, samples of the
+        same index are averaged per field, and the indexes between the first
+        and last sample of a series without any sample become gaps, whose
+        values are NaN.
 
-            # Train/fit the imputer
-            imp.fit(data)
+        Args:
+            times: (array) time index of the samples of all series.
+            values: (array) samples x fields values, NaN if missing.
+            offsets: (array) start of each series in the samples, followed by
+                the number of samples.
+        Returns: (times, values, offsets, gaps) of the resampled series,
+            where gaps is a mask of the time indexes without any sample
+        """
+        times = np.floor(times).astype('int64')
+        counts = np.diff(offsets)
+        series_index = np.repeat(np.arange(len(counts)), counts)
 
-            # Impute missing values in data
-            data = imp.transform(data)
+        # Samples are usually sorted, but duplicated or late samples are not
+        # assumed to be adjacent.
+        order = np.lexsort((times, series_index))
+        times = times[order]
+        values = values[order]
+        series_index = series_index[order]
 
-        return data
+        starts = np.asarray(offsets[:-1])
+        has_samples = counts > 0
+        first = np.zeros(len(counts), dtype='int64')
+        last = np.full(len(counts), -1, dtype='int64')
+        first[has_samples] = times[starts[has_samples]]
+        last[has_samples] = times[starts[has_samples] +
+                                  counts[has_samples] - 1]
+
+        grid_offsets = np.concatenate(([0], np.cumsum(last - first + 1)))
+        positions = grid_offsets[series_index] + times - first[series_index]
+        grid_size = grid_offsets[-1]
+
+        observed = ~np.isnan(values)
+        grid_values = np.empty((grid_size, values.shape[1]), dtype='float64')
+        for index_field in range(values.shape[1]):
+            sums = np.bincount(
+                positions, minlength=grid_size,
+                weights=np.where(observed[:, index_field],
+                                 values[:, index_field], 0))
+            field_counts = np.bincount(positions, minlength=grid_size,
+                                       weights=observed[:, index_field])
+            with np.errstate(invalid='ignore'):
+                grid_values[:, index_field] = sums / field_counts
+
+        grid_times = np.arange(grid_size) + np.repeat(
+            first - grid_offsets[:-1], last - first + 1)
+        gaps = np.bincount(positions, minlength=grid_size) == 0
+        return grid_times, grid_values, grid_offsets, gaps
+
+    def downsample_mean(self, times, values, factor):
+        """ Downsample a series by averaging buckets of samples
+
+        Buckets end at the last sample, and the oldest samples which do not
+        fill a bucket are dropped.
+
+        Args:
+            times: (array) time index of the samples.
+            values: (array) samples x fields values.
+            factor: the number of samples per bucket.
+        Returns: (times, values) of the buckets, where the time of a bucket
+            is the time of its last sample
+        """
+        num_bucket = len(times) // factor
+        start = len(times) - num_bucket * factor
+        values = values[start:].reshape(num_bucket, factor, -1).mean(axis=1)
+        return times[start + factor - 1::factor], values
+
+    def downsample_lttb(self, times, values, num_out):
+        """ Downsample a series by largest-triangle-three-buckets
+
+        The first and last samples are kept, and each bucket in between
+        keeps the sample forming the largest triangle with the sample kept
+        in the previous bucket and the average of the next bucket, taken on
+        the first field.
+
+        Args:
+            times: (array) time index of the samples.
+            values: (array) samples x fields values.
+            num_out: the number of samples to keep.
+        Returns: (times, values) of the kept samples
+        """
+        num_sample = len(times)
+        if num_out >= num_sample or num_out < 3:
+            return times, values
+
+        field = values[:, 0]
+        edges = np.linspace(1, num_sample - 1, num_out - 1).astype('int64')
+        kept = [0]
+        for index in range(num_out - 2):
+            start, end = edges[index], edges[index + 1]
+            next_end = edges[index + 2] if index + 2 < len(edges) \
+                else num_sample
+            next_time = np.mean(times[end:next_end])
+            next_value = np.mean(field[end:next_end])
+            last = kept[-1]
+            areas = np.abs(
+                (times[last] - next_time) * (field[start:end] - field[last]) -
+                (times[last] - times[start:end]) * (next_value - field[last]))
+            kept.append(start + int(np.argmax(areas)))
+        kept.append(num_sample - 1)
+        return times[kept], values[kept]
+
+    def impute_missing_fields(self, values, policy=ImputePolicy.MEAN):
+        """ Impute missing values (NaN) of each field in place
+
+        Args:
+            values: a float numpy array of samples x fields
+            policy: (ImputePolicy) imputation of fields which are partially
+                missing; fields missing in every sample are zero-filled
+        Returns: values where missing values been imputed
+        """
+        missing = np.isnan(values)
+        if not missing.any():
+            return values
+
+        all_missing = missing.all(axis=0)
+        values[:, all_missing] = 0
+        missing[:, all_missing] = False
+
+        if policy == ImputePolicy.NONE or not missing.any():
+            return values
+
+        if policy == ImputePolicy.ZERO:
+            values[missing] = 0
+        elif policy == ImputePolicy.MEAN:
+            means = np.nanmean(values, axis=0)
+            values[missing] = np.take(means, np.nonzero(missing)[1])
+        elif policy == ImputePolicy.FFILL:
+            # Index of the last observed sample of each field, where the
+            # leading missing samples take the first observed one.
+            index = np.where(missing, 0, np.arange(len(values))[:, None])
+            np.maximum.accumulate(index, axis=0, out=index)
+            first_index = np.argmin(missing, axis=0)
+            index = np.where(missing & (index == 0), first_index, index)
+            values[:] = np.take_along_axis(values, index, axis=0)
+        elif policy == ImputePolicy.INTERPOLATE:
+            # Missing samples are linearly interpolated, and the leading and
+            # trailing ones take the nearest observed value.
+            steps = np.arange(len(values))
+            for index_field in np.nonzero(missing.any(axis=0))[0]:
+                field = values[:, index_field]
+                observed = ~missing[:, index_field]
+                field[~observed] = np.interp(steps[~observed],
+                                             steps[observed], field[observed])
+        else:
+            raise ValueError('impute policy {} not implemented!\n'.
+                             format(policy))
+
+        return values
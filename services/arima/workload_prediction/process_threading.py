@@ -1,14 +1,24 @@
 # -*- coding: utf-8 -*-
 """ Process threading """
 # pylint: disable=E0401
+import math
 import os
 import threading
+import time
+from collections import OrderedDict
 import numpy as np
 
 from services.arima.workload_prediction.sarimax_predictor \
     import SARIMAXPredictor
+from services.arima.workload_prediction.fallback_predictor \
+    import FallbackCase
+from services.arima.workload_prediction.series_classifier \
+    import SeriesClassifier
+from services.arima.workload_prediction.preprocessor import Preprocessor
 from services.arima.workload_prediction.workload_utils \
-    import get_csv_data
+    import get_csv_data, get_series_fingerprint
+from services.arima.workload_prediction.worker_pool \
+    import PredictionWorkerPool, WorkerMode
 
 
 # Minimum sample number for both model training and prediction
@@ -18,96 +28,384 @@ MIN_SAMPLE_SIZE = 6
 # PREDICT_DATA_RATE
 PREDICT_DATA_RATE = 0.5
 
+# SARIMAX fitting holds the GIL most of the time, so series are predicted
+# in worker processes unless the executor says otherwise.
+SERIES_EXECUTOR_MODE = WorkerMode.PROCESS
 
-class PredictionThread(threading.Thread):
-    """ Thread for prediction """
-    def __init__(self, target_fun, log, predictor, observed_data,
-                 file_name, output_file_folder,
-                 config, time_scaling_ns, filename_tags_map):
-        threading.Thread.__init__(self)
-        self.log = log
-        self.target_fun = target_fun
-        self.predictor = predictor
-        self.observed_data = observed_data
-        self.file_name = file_name
-        self.output_file_folder = output_file_folder
-        self.config = config
-        self.time_scaling_ns = time_scaling_ns
-        self.filename_tags_map = filename_tags_map
-
-    def run(self):
-        self.target_fun(self.log, self.predictor, self.observed_data,
-                        self.file_name, self.output_file_folder, self.config)
+# Predictor and classifier of each worker thread, whose configuration files
+# are read once.
+_WORKER_PREDICTORS = threading.local()
 
 
 def predict_by_series(log, measurement_conf, granularity_conf, input_file_list,
-                      filename_tags_map, file_folder_name, time_scaling_ns):
-    """Predict by identical device"""
-
-    thread_pool = []
-    filename_tags_map_o = filename_tags_map.copy()
+                      filename_tags_map, file_folder_name, time_scaling_ns,
+                      executor=None, chunk_size=1, deadline=None,
+                      deadline_misses=None):
+    """Predict by identical device
+
+    Series are predicted by the given executor, or by a temporary one
+    running SERIES_EXECUTOR_MODE workers when no executor is given. Series
+    whose prediction starts after the deadline, a time.monotonic() value,
+    are predicted by the fast fallback forecaster, and fits still running
+    at the deadline are abandoned and counted in deadline_misses.
+    """
+
+    series_args = []
     file_folder_name = file_folder_name.copy()
     for file_path in input_file_list:
-        ignored = False
-
         file_name = file_path.replace(file_folder_name['input'], '')
         metric_name, file_name = os.path.split(file_name)
-        config = measurement_conf[metric_name].copy()
-        config.update(granularity_conf)
-
-        file_folder_name['model'] = \
-            'models/online/workload_prediction/{}/{}/{}'.format(
-                config['mid'], config['name'], file_name)
-        log.info("Prediction: %s", file_folder_name['model'])
 
         observed_data = get_csv_data(file_path)
-        # pylint: disable=W0612
-        config['sample_size'], _ = observed_data.shape
-        # pylint: enable=W0612
-        observed_data = {
-            'times': observed_data[:, 0],
-            'values': observed_data[:, 1:],
-        }
-
-        config_prdt = _get_prediction_conf(config)
-
-        if 'minimal_sample_size' in config.keys():
-            if config['sample_size'] < MIN_SAMPLE_SIZE:
-                ignored = True
-                log.warning(
-                    'number of data sample of %s less than %d, thus not '
-                    'predicted\n', file_folder_name['model'], MIN_SAMPLE_SIZE)
-            else:
-                if config['sample_size'] < \
-                        config['minimal_sample_size'] - 1:
-                    filename_tags_map[file_name] = '{}_ini'.format(
-                        filename_tags_map_o[file_name])
-
-                    log.warning(
-                        'number of data sample of %s is %d and less than '
-                        'minimal_sample_size(%s), thus may result in poor '
-                        'prediction\n',
-                        file_folder_name['model'], config['sample_size'],
-                        config['minimal_sample_size'])
-        else:
-            raise ValueError(
-                'minimal_sample_size not defined in {}\n'.format(
-                    config['name']))
-
-        if not ignored:
-            predictor = SARIMAXPredictor(log=log)
-
-            prediction_thread = PredictionThread(
-                _predict_write_file, log, predictor, observed_data, file_name,
-                file_folder_name['output'], config_prdt,
-                time_scaling_ns, filename_tags_map)
-            thread_pool.append(prediction_thread)
-
-    if thread_pool:
-        for thread in thread_pool:
-            thread.start()
-        for thread in thread_pool:
-            thread.join()
+        config_prdt, observed_data = _get_series_conf(
+            log, measurement_conf, granularity_conf, metric_name, file_name,
+            observed_data, filename_tags_map)
+
+        series_args.append((observed_data, file_name,
+                            file_folder_name['output'], config_prdt))
+
+    _run_series(log, _predict_write_file, series_args, executor, chunk_size,
+                deadline, deadline_misses)
+
+
+def predict_by_series_data(log, measurement_conf, granularity_conf,
+                           series_list, executor=None, chunk_size=1,
+                           deadline=None, deadline_misses=None):
+    """Predict series held in memory, without any file round-trip.
+
+    Args:
+        log: logger.
+        measurement_conf: (dict) measurement configuration.
+        granularity_conf: (dict) granularity configuration.
+        series_list: (list) tuples of (metric_name, file_name,
+            observed_data), where observed_data is an array whose first
+            column is the timestep index and the others are field values.
+        executor: (PredictionWorkerPool) executor of the series; a
+            temporary one running SERIES_EXECUTOR_MODE workers is used if
+            not given.
+        chunk_size: the number of series per executor task.
+        deadline: time.monotonic() after which series are predicted by the
+            fast fallback forecaster, and running fits are abandoned.
+        deadline_misses: (Counter) number of fits which missed their
+            deadline, counted by (metric_name, file_name).
+
+    Returns:
+        dict: predicted data keyed by (metric_name, file_name), in the same
+            layout as observed_data.
+    """
+
+    series_args = []
+    for metric_name, file_name, observed_data in series_list:
+        config_prdt, observed_data = _get_series_conf(
+            log, measurement_conf, granularity_conf, metric_name, file_name,
+            observed_data)
+
+        series_args.append((observed_data, file_name, None, config_prdt))
+
+    results = _run_series(log, _predict_result, series_args, executor,
+                          chunk_size, deadline, deadline_misses)
+    return dict(result for result in results if result is not None)
+
+
+def _run_series(log, target_fun, series_args, executor, chunk_size,
+                deadline=None, deadline_misses=None):
+    """Run target_fun over the series on the executor.
+
+    Flat and step series are predicted analytically beforehand. Series with
+    identical observed data and configuration, e.g. replicas of the same
+    deployment, are fitted once and the prediction is handed over to each
+    of them.
+    """
+    series_args, results = _predict_classified(log, target_fun, series_args)
+    if not series_args:
+        return results
+
+    series_args = _group_identical_series(log, series_args)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = PredictionWorkerPool(
+            log, min(len(series_args), os.cpu_count() or 1),
+            mode=SERIES_EXECUTOR_MODE)
+
+    try:
+        chunk_results = executor.run(
+            _predict_series_chunk,
+            [(target_fun, series_args[i:i + chunk_size], deadline)
+             for i in range(0, len(series_args), chunk_size)])
+    finally:
+        if own_executor:
+            executor.close()
+
+    for chunk_result in chunk_results:
+        if chunk_result is not None:
+            results += chunk_result[0]
+            _count_deadline_misses(log, chunk_result[1], deadline_misses)
+    return results
+
+
+def _count_deadline_misses(log, missed_keys, deadline_misses):
+    """Count the fits which missed their deadline of each series."""
+    for key in missed_keys:
+        if deadline_misses is not None:
+            deadline_misses[key] += 1
+        log.warning('Fit of series %s missed its deadline.', key)
+
+
+def _predict_classified(log, target_fun, series_args):
+    """Predict the flat and step series by their last level, without
+    fitting any model.
+
+    Returns:
+        (list, list): the arguments of the other series, and the results of
+            target_fun over the predicted series.
+    """
+    indexes = [index for index, (_, _, _, config) in enumerate(series_args)
+               if not config.get('fallback')]
+    if not indexes:
+        return series_args, []
+
+    predicted_list = _get_worker_classifier(log).predict_batch(
+        [series_args[i][0] for i in indexes],
+        [series_args[i][3]['prediction_steps'] for i in indexes])
+
+    results = []
+    classified = set()
+    for index, predicted_data in zip(indexes, predicted_list):
+        if predicted_data is None:
+            continue
+
+        observed_data, file_name, output, config = series_args[index]
+        prediction = _predict(log, None, observed_data, config,
+                              predicted_data)
+        results.append(target_fun(prediction, file_name, output, config))
+        classified.add(index)
+
+    return [args for index, args in enumerate(series_args)
+            if index not in classified], results
+
+
+def _group_identical_series(log, series_args):
+    """Group the series by the fingerprint of their input.
+
+    Returns:
+        list: tuples of (observed_data, config, targets) of each group, where
+            targets are the (file_name, output) of the series in the group;
+            the model path of the first series is used for the fit.
+    """
+    groups = OrderedDict()
+    for observed_data, file_name, output, config in series_args:
+        fingerprint = get_series_fingerprint(
+            np.column_stack((observed_data['times'], observed_data['values'])),
+            {k: v for k, v in config.items() if k != 'model_path'})
+        if fingerprint not in groups:
+            groups[fingerprint] = (observed_data, config, [])
+        groups[fingerprint][2].append((file_name, output))
+
+    if len(groups) < len(series_args):
+        log.info('%d of %d series share their input with another series, '
+                 'thus predicted once.', len(series_args) - len(groups),
+                 len(series_args))
+    return list(groups.values())
+
+
+def _predict_series_chunk(log, target_fun, series_args, deadline=None):
+    """Predict a chunk of series in an executor worker.
+
+    Returns:
+        (list, list): the results of target_fun, and the keys of the series
+            whose fit missed its deadline.
+    """
+    predictor = _get_worker_predictor(log)
+    predicted_list = _predict_batch(predictor, series_args, deadline)
+
+    results = []
+    missed_keys = []
+    for (observed_data, config, targets), predicted_data in zip(
+            series_args, predicted_list):
+        # Only a fit of this series may miss its deadline.
+        predictor.deadline_missed = False
+        if predicted_data is None and _is_over_deadline(deadline):
+            predicted_data = predictor.fallback.predict(
+                observed_data.copy(), config['prediction_steps'],
+                FallbackCase.FAST)
+        prediction = _predict(log, predictor, observed_data, config,
+                              predicted_data, deadline)
+        for file_name, output in targets:
+            results.append(target_fun(prediction, file_name, output, config))
+            if predictor.deadline_missed:
+                missed_keys.append((config['name'], file_name))
+    return results, missed_keys
+
+
+def _get_worker_predictor(log):
+    """Get the predictor of the current worker thread, created at its first
+    chunk."""
+    predictor = getattr(_WORKER_PREDICTORS, 'predictor', None)
+    if predictor is None:
+        predictor = _WORKER_PREDICTORS.predictor = SARIMAXPredictor(log=log)
+    return predictor
+
+
+def _get_worker_classifier(log):
+    """Get the series classifier of the current thread, created at its first
+    classification."""
+    classifier = getattr(_WORKER_PREDICTORS, 'classifier', None)
+    if classifier is None:
+        classifier = _WORKER_PREDICTORS.classifier = SeriesClassifier(log=log)
+    return classifier
+
+
+def _is_over_deadline(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _predict_batch(predictor, series_args, deadline=None):
+    """Predict the series together by the fallback forecasters, and by the
+    batch engine if it is configured.
+
+    Returns:
+        list: predicted data of each series, or None for series left to be
+            predicted one by one.
+    """
+    predicted_list = [None] * len(series_args)
+
+    # Series of each fallback case are forecast together.
+    over_deadline = _is_over_deadline(deadline)
+    case_indexes = OrderedDict()
+    for index, (_, config, _) in enumerate(series_args):
+        case = config.get('fallback') or \
+            (FallbackCase.FAST if over_deadline else None)
+        if case is not None:
+            case_indexes.setdefault(case, []).append(index)
+    for case, indexes in case_indexes.items():
+        fallback_list = predictor.fallback.predict_batch(
+            [series_args[i][0].copy() for i in indexes],
+            [series_args[i][1]['prediction_steps'] for i in indexes], case)
+        for index, predicted_data in zip(indexes, fallback_list):
+            predicted_list[index] = predicted_data
+
+    if predictor.cfg.get('engine') != 'batch':
+        return predicted_list
+
+    indexes = [index for index, (_, config, _) in enumerate(series_args)
+               if not config.get('diff') and predicted_list[index] is None]
+    if not indexes:
+        return predicted_list
+
+    batch_list = predictor.predict_batch(
+        [series_args[i][0].copy() for i in indexes],
+        [series_args[i][1]['prediction_steps'] for i in indexes],
+        [series_args[i][1]['model_path'] for i in indexes])
+    for index, predicted_data in zip(indexes, batch_list):
+        predicted_list[index] = predicted_data
+    return predicted_list
+
+
+def _get_series_conf(log, measurement_conf, granularity_conf, metric_name,
+                     file_name, observed_data, filename_tags_map=None):
+    """Get prediction config and observed data of a series.
+
+    Returns:
+        (dict, dict): prediction config and observed data; the 'fallback'
+            case of the config is set if the series is not predicted by
+            SARIMAX.
+    """
+    config = measurement_conf[metric_name].copy()
+    config.update(granularity_conf)
+
+    model_path = 'models/online/workload_prediction/{}/{}/{}'.format(
+        config['mid'], config['name'], file_name)
+    log.info("Prediction: %s", model_path)
+
+    # pylint: disable=W0612
+    config['sample_size'], _ = observed_data.shape
+    # pylint: enable=W0612
+    observed_data = {
+        'times': observed_data[:, 0],
+        'values': observed_data[:, 1:],
+    }
+
+    config['model_path'] = model_path
+    config_prdt = _get_prediction_conf(config)
+
+    if 'minimal_sample_size' not in config.keys():
+        raise ValueError(
+            'minimal_sample_size not defined in {}\n'.format(
+                config['name']))
+
+    if config['sample_size'] < MIN_SAMPLE_SIZE:
+        log.warning(
+            'number of data sample of %s less than %d, thus predicted by '
+            'fallback forecaster\n', model_path, MIN_SAMPLE_SIZE)
+        config_prdt['fallback'] = FallbackCase.SHORT
+        config_prdt['prediction_steps'] = max(
+            1, config_prdt['prediction_steps'])
+        return config_prdt, observed_data
+
+    observed_data, config_prdt = _get_training_window(
+        log, observed_data, config_prdt)
+
+    if config['sample_size'] < config['minimal_sample_size'] - 1:
+        if filename_tags_map is not None:
+            filename_tags_map[file_name] = '{}_ini'.format(
+                filename_tags_map[file_name])
+
+        log.warning(
+            'number of data sample of %s is %d and less than '
+            'minimal_sample_size(%s), thus may result in poor '
+            'prediction\n',
+            model_path, config['sample_size'],
+            config['minimal_sample_size'])
+
+    return config_prdt, observed_data
+
+
+def _get_training_window(log, observed_data, config):
+    """Bound the observed data to config['training_steps'] samples.
+
+    Longer histories are tail-sliced, or downsampled by
+    config['training_downsample'] ('mean' or 'lttb'); downsampled series
+    are predicted in coarse steps, which are upsampled back by _predict.
+
+    Returns:
+        (dict, dict): observed data and prediction config of the window.
+    """
+    training_steps = config.get('training_steps')
+    num_sample = len(observed_data['times'])
+    if not training_steps or num_sample <= training_steps:
+        return observed_data, config
+
+    method = config.get('training_downsample') or 'none'
+    if method == 'none':
+        return {'times': observed_data['times'][-training_steps:],
+                'values': observed_data['values'][-training_steps:]}, config
+
+    factor = int(math.ceil(num_sample / training_steps))
+    config = config.copy()
+    config['downsample'] = {
+        'factor': factor,
+        'last_time': int(observed_data['times'][-1]),
+        'steps': config['prediction_steps'],
+    }
+    config['prediction_steps'] = int(
+        math.ceil(config['prediction_steps'] / factor))
+
+    pre = Preprocessor()
+    if method == 'mean':
+        times, values = pre.downsample_mean(
+            observed_data['times'], observed_data['values'], factor)
+    elif method == 'lttb':
+        times, values = pre.downsample_lttb(
+            observed_data['times'], observed_data['values'],
+            num_sample // factor)
+    else:
+        raise ValueError('training downsample {} not implemented!\n'.
+                         format(method))
+
+    log.debug('%d samples of %s downsampled by %s to %d.', num_sample,
+              config['model_path'], method, len(times))
+    return {'times': times, 'values': values}, config
 
 
 def _get_prediction_conf(config):
@@ -143,41 +441,80 @@ def _get_diff_data(observed_data):
     return data_copy
 
 
-def _predict_write_file(log, predictor, observed_data,
-                        file_name, output_file_folder, config):
+def _predict(log, predictor, observed_data, config, predicted_data=None,
+             deadline=None):
+    """Predict a series.
+
+    The predictor is not run if predicted_data is already given, e.g. by
+    the batch engine.
+
+    Returns:
+        (array, array): predicted times and values, or None if the series
+            could not be predicted.
+    """
 
     # pylint: disable=W0612
-    if 'diff' in config.keys() and config['diff']:
+    if predicted_data is None and 'diff' in config.keys() and config['diff']:
         diffs = _diff_times_values(observed_data.copy())
         predicted_data = _predict_diff(predictor,
                                        observed_data.copy(),
                                        diffs.copy(),
-                                       config['prediction_steps'])
+                                       config['prediction_steps'],
+                                       config['model_path'], deadline)
         if not predicted_data:
-            return
+            return None
 
         prdt_times = predicted_data['times']
         prdt_values = predicted_data['values']
         if np.isnan(prdt_values).any():
             log.warning("Predicted data exists NaN, thus not "
                         "writing predicted data onto DB.\n")
-            return
+            return None
     else:
-        predicted_data = predictor.predict(
-            observed_data.copy(), config['prediction_steps'])
+        if predicted_data is None:
+            predicted_data = predictor.predict(
+                observed_data.copy(), config['prediction_steps'],
+                config['model_path'], deadline)
         if not predicted_data:
-            return
+            return None
 
         prdt_times = predicted_data['times']
         prdt_values = predicted_data['values']
         if np.isnan(prdt_values).any():
             log.warning("Predicted data exists NaN, thus not "
                         "writing predicted data onto DB.\n")
-            return
+            return None
 
         # Prediction value lower bound should be 0.
         prdt_values = np.maximum(prdt_values, 0)
 
+    downsample = config.get('downsample')
+    if downsample:
+        # Coarse steps of downsampled series are upsampled by repetition.
+        prdt_values = np.repeat(prdt_values, downsample['factor'],
+                                axis=0)[:downsample['steps']]
+        prdt_times = downsample['last_time'] + \
+            np.arange(len(prdt_values)) + 1
+
+    return prdt_times, prdt_values
+
+
+def _predict_result(prediction, file_name, output,
+                    config):  # pylint: disable=W0613
+    if prediction is None:
+        return None
+
+    prdt_times, prdt_values = prediction
+    return (config['name'], file_name), np.column_stack(
+        (prdt_times, prdt_values))
+
+
+def _predict_write_file(prediction, file_name, output_file_folder, config):
+    if prediction is None:
+        return
+
+    prdt_times, prdt_values = prediction
+
     # Write prediction data to file
     out_prdt_file = '{}{}/{}.prdt'.format(
         output_file_folder, config['name'], file_name)
@@ -220,11 +557,11 @@ def _diff_times_values(observed_data):
 
 
 def _predict_diff(predictor, observed_data, observed_diffs,
-                  prediction_steps):
+                  prediction_steps, model_path=None, deadline=None):
     num_sample, num_fea = observed_data['values'].shape
     # pylint: disable=W0612
     predicted_diffs = predictor.predict(
-        observed_diffs.copy(), prediction_steps)
+        observed_diffs.copy(), prediction_steps, model_path, deadline)
     if not predicted_diffs:
         return predicted_diffs
     # pylint: enable=W0612
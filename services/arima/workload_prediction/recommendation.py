@@ -63,9 +63,7 @@ class Recommender:
 
         # [1.1] Get pod policy.
         policy = pod_info.get("policy")
-        if Policy.has_val(policy):
-            self.set_policy(policy)
-        else:
+        if not Policy.has_val(policy):
             self.log.error("[Recommender] Policy \"%s\" "
                            "is not supported", policy)
             return
@@ -93,27 +91,106 @@ class Recommender:
                 self.init_stage(file_path, prdt_file_path, metric_name)
             if is_exist:
                 init_resource, resource_set = self.prediction_stage(
-                    prdt_file_path, metric_name, requests, limits)
+                    prdt_file_path, metric_name, requests, limits, policy)
+                self.__update_container_set(
+                    container_name, init_resource, resource_set,
+                    container_init_set, container_set)
+
+        # [3] Format the pod recommendation result again.
+        self.write_recommendation_result(pod_info,
+                                         container_init_set, container_set)
+
+    def recommend_series(self, pod_info, observed_map, predicted_map,
+                         filename_tags_map, resource_map=None):
+        """Get containers recommendation result from in-memory series.
+
+        :param pod_info: (dict) the info of the pod.
+        :param observed_map: (dict) observed data arrays keyed by
+                             (metric config name, file name).
+        :param predicted_map: (dict) predicted data arrays keyed the same
+                              way as observed_map.
+        :param filename_tags_map: (dict) tags of each series file name.
+        :param resource_map: (dict) recommended resources of each series
+                             under the pod policy; series found there are
+                             not computed again, and the computed ones are
+                             added to it.
+        """
+        if resource_map is None:
+            resource_map = {}
+
+        # [1.1] Get pod policy.
+        policy = pod_info.get("policy")
+        if not Policy.has_val(policy):
+            self.log.error("[Recommender] Policy \"%s\" "
+                           "is not supported", policy)
+            return
+
+        container_set = dict()
+        container_init_set = dict()
+        for (metric, file_name), prdt_data in predicted_map.items():
 
-                if container_name not in container_init_set:
-                    container_init_set[container_name] = init_resource
-                    container_set[container_name] = resource_set
-                else:
-                    container_init_set[container_name].update(init_resource)
-                    container_set[container_name].update(resource_set)
+            # [1.2] Get corresponding container name and metric name.
+            container_name = get_container_name(file_name, filename_tags_map)
+            metric_name, _ = get_metric_name_and_conf(
+                metric, self.measurement_conf)
+
+            if container_name is None or metric_name is None:
+                continue
+            if not Metric.has_val(metric_name):
+                self.log.warning("[Recommender] Metric \"%s\" "
+                                 "are not supported", metric_name)
+                continue
+
+            # [2] Compute requests/limits from observed/prediction data.
+            if (metric, file_name) not in resource_map:
+                resource_map[(metric, file_name)] = self._recommend_resources(
+                    observed_map[(metric, file_name)], prdt_data,
+                    metric_name, policy)
+            if resource_map[(metric, file_name)] is not None:
+                init_resource, resource_set = resource_map[(metric, file_name)]
+                self.__update_container_set(
+                    container_name, init_resource, resource_set,
+                    container_init_set, container_set)
 
         # [3] Format the pod recommendation result again.
         self.write_recommendation_result(pod_info,
                                          container_init_set, container_set)
 
+    def _recommend_resources(self, observed_data, prdt_data, metric_name,
+                             policy):
+        """Get the recommended resources of a series, or None if the
+        container is not running long enough."""
+        is_exist, requests, limits = self._init_stage_data(
+            observed_data, prdt_data, metric_name)
+        if not is_exist:
+            return None
+        return self._prediction_stage_data(
+            prdt_data, metric_name, requests, limits, policy)
+
+    @staticmethod
+    def __update_container_set(container_name, init_resource, resource_set,
+                               container_init_set, container_set):
+        """Merge the metric resources into the container sets."""
+        if container_name not in container_init_set:
+            container_init_set[container_name] = dict(init_resource)
+            container_set[container_name] = dict(resource_set)
+        else:
+            container_init_set[container_name].update(init_resource)
+            container_set[container_name].update(resource_set)
+
     def init_stage(self, file_path, prdt_file_path, metric_name):
         """Initial stage requests/limits"""
+        return self._init_stage_data(get_csv_data(file_path),
+                                     get_csv_data(prdt_file_path),
+                                     metric_name)
+
+    def _init_stage_data(self, data, prdt_data, metric_name):
+        """Initial stage requests/limits from observed/prediction data"""
         is_exist = False
         requests = 0
         limits = 0
 
-        data = get_csv_data(prdt_file_path)
-        num_sample, _ = data.shape
+        num_sample, _ = prdt_data.shape
 
         # When this container is running more than specific time,
         # recommender would start to compute recommended resources.
@@ -122,7 +199,6 @@ class Recommender:
         if num_sample >= num_sample_needed:
             is_exist = True
 
-            data = get_csv_data(file_path)
             values = data[:, 1]
 
             requests, limits = self.__compute_requests_limits(
@@ -130,11 +206,21 @@ class Recommender:
 
         return is_exist, requests, limits
 
-    def prediction_stage(self, file_path, metric_name, requests, limits):
+    def prediction_stage(self, file_path, metric_name, requests, limits,
+                         policy=None):
         """Prediction stage requests/limits"""
+        return self._prediction_stage_data(get_csv_data(file_path),
+                                           metric_name, requests, limits,
+                                           policy)
+
+    def _prediction_stage_data(self, data, metric_name, requests, limits,
+                               policy=None):
+        """Prediction stage requests/limits from prediction data"""
+        # The policy is passed along rather than set on the recommender,
+        # since pods of different policies are recommended concurrently.
+        policy = policy or self.policy
         list_resource_set = []
 
-        data = get_csv_data(file_path)
         times = data[:, 0]
         values = data[:, 1]
 
@@ -147,7 +233,7 @@ class Recommender:
         init_resource = self.format_container_resources(
             metric_name, timestamp, prdt_requests, prdt_limits)
 
-        if self.policy == Policy.COMPACT:
+        if policy == Policy.COMPACT:
             times = np.array_split(times, self.policy_partition)
             values = np.array_split(values, self.policy_partition)
 
@@ -2,26 +2,39 @@
 """ SARIMAX predictor """
 # pylint: disable=E0401
 import os
+import time
 import yaml
 import numpy as np
 import statsmodels.api as sm
 
 from framework.log.logger import Logger
 from services.arima.workload_prediction.preprocessor import Preprocessor
+from services.arima.workload_prediction.model_store import ModelStore
+from services.arima.workload_prediction.batch_sarimax import BatchSARIMAX
+from services.arima.workload_prediction.fallback_predictor \
+    import FallbackPredictor, FallbackCase
 
 
 OBSERVATION_MULTIPLE = 3
 MIN_OBSERVATION_NUM = 6
 
 
+class FitDeadlineExceeded(Exception):
+    """ The fit of a model ran out of its wall-clock budget """
+
+
 class SARIMAXPredictor:
     """The SARIMAX predictor"""
 
-    def __init__(self, log=None, config_file=None):
+    def __init__(self, log=None, config_file=None, model_store=None,
+                 fallback=None):
         """Initialize the predictor.
 
         Args:
             config_file: configuration file of parameters
+            model_store: store of fitted parameters for warm starts
+            fallback: (FallbackPredictor) predictor of series whose fit
+                failed
 
         Returns: none
         """
@@ -46,7 +59,13 @@ class SARIMAXPredictor:
             self.log.error("SARIMAX predictor's configure file not found.")
             raise
 
-    def predict(self, observed_data, predict_steps):
+        self.model_store = model_store or ModelStore(log=self.log)
+        self.fallback = fallback or FallbackPredictor(log=self.log)
+        # Whether the fit of the last prediction missed its deadline.
+        self.deadline_missed = False
+
+    def predict(self, observed_data, predict_steps, model_path=None,
+                deadline=None):
         """ Make predictions
         Args:
             observed_data: {
@@ -61,12 +80,20 @@ class SARIMAXPredictor:
                         ], where fea_j(t) denotes the value of the jth feature
                         at time step t.
             predict_steps: indicate predicting how many time steps
+            model_path: model path of the series; when given, the fitted
+                parameters are stored there and the next fit of the same
+                orders starts from them
+            deadline: time.monotonic() after which the fit is abandoned,
+                e.g. the end of the prediction cycle; the fit is also
+                abandoned after fit_timeout_sec of the configuration
 
         Return:
             predicted_data with the same data format as observed_data
 
         """
 
+        self.deadline_missed = False
+
         # Impute missing values
         pre = Preprocessor()
         observed_data[self.VALUES] = pre.impute_missing_value(
@@ -74,41 +101,244 @@ class SARIMAXPredictor:
         observed_data[self.TIMES] = np.array(
             observed_data[self.TIMES], dtype='int64')
 
-        # To avoid 'maxlag should be < nobs' error
-        if len(observed_data[self.VALUES]) < (
-                self.cfg[self.SEASONAL_ORDER]['s']*OBSERVATION_MULTIPLE):
-            self.cfg[self.SEASONAL_ORDER]['s'] = \
-                int(len(observed_data[self.VALUES]) / OBSERVATION_MULTIPLE)
-
         # Make prediction with SARIMAX
+        order = (self.cfg[self.ORDER]['p'], self.cfg[self.ORDER]['d'],
+                 self.cfg[self.ORDER]['q'])
+        # To avoid 'maxlag should be < nobs' error; the period is of this
+        # series only, so that the predictor is reused across series.
+        seasonal_order = (
+            self.cfg[self.SEASONAL_ORDER]['P'],
+            self.cfg[self.SEASONAL_ORDER]['D'],
+            self.cfg[self.SEASONAL_ORDER]['Q'],
+            min(self.cfg[self.SEASONAL_ORDER]['s'],
+                int(len(observed_data[self.VALUES]) / OBSERVATION_MULTIPLE)))
         try:
             model = sm.tsa.statespace.SARIMAX(
                 observed_data[self.VALUES],
-                order=(self.cfg[self.ORDER]['p'], self.cfg[self.ORDER]['d'],
-                       self.cfg[self.ORDER]['q']),
-                seasonal_order=(
-                    self.cfg[self.SEASONAL_ORDER]['P'],
-                    self.cfg[self.SEASONAL_ORDER]['D'],
-                    self.cfg[self.SEASONAL_ORDER]['Q'],
-                    self.cfg[self.SEASONAL_ORDER]['s']),
+                order=order,
+                seasonal_order=seasonal_order,
                 enforce_stationarity=False,
                 enforce_invertibility=False)
 
-            mdl_fit = model.fit(disp=0)
+            version = self._get_model_version(order, seasonal_order)
+            stored = self._load_model(model.k_params, model_path, version)
+            prdt_times = observed_data[self.TIMES][-1] + \
+                np.arange(predict_steps) + 1
+
+            if self._is_refit_needed(stored, observed_data):
+                start_params = stored['params'] if stored else None
+                mdl_fit = model.fit(
+                    start_params=start_params, disp=0,
+                    callback=self._get_fit_callback(deadline))
+                refit_age = 0
+                self.log.debug(
+                    "SARIMAX fit of %s took %s iterations (%s).", model_path,
+                    (mdl_fit.mle_retvals or {}).get('iterations'),
+                    'warm' if start_params is not None else 'cold')
+            else:
+                # Run the state-space filter over the new window with the
+                # stored parameters instead of re-optimizing them.
+                mdl_fit = model.filter(stored['params'])
+                refit_age = int(stored['refit_age']) + 1
+
             pred_temp = mdl_fit.get_forecast(steps=predict_steps)
             predictions = pred_temp.predicted_mean
+
+            if model_path and self.cfg.get('warm_start'):
+                self.model_store.save(
+                    model_path, version, params=np.asarray(mdl_fit.params),
+                    refit_age=np.array(refit_age),
+                    forecast_times=prdt_times,
+                    forecast_values=np.asarray(predictions).reshape(-1))
+        except FitDeadlineExceeded:
+            self.log.warning("SARIMAX fit of %s missed its deadline, thus "
+                             "predicted by fallback forecaster.", model_path)
+            self.deadline_missed = True
+            predictions = self.fallback.predict(
+                observed_data, predict_steps,
+                FallbackCase.DEADLINE)[self.VALUES]
         except np.linalg.linalg.LinAlgError:
             self.log.debug("Variance of observed data is: %s",
                            np.var(observed_data[self.VALUES]))
-            predictions = np.mean(observed_data[self.VALUES], axis=0)
-            predictions = np.tile(predictions, (predict_steps, 1))
+            predictions = self.fallback.predict(
+                observed_data, predict_steps, FallbackCase.ERROR)[self.VALUES]
         except Exception as err:  # pylint: disable=W0703
             self.log.error(err)
             return None
 
         predicted_data = {
-            self.VALUES: predictions.reshape(-1, 1),
+            self.VALUES: np.asarray(predictions).reshape(-1, 1),
             self.TIMES: observed_data[self.TIMES][-1] + range(predict_steps) + 1
         }
 
         return predicted_data
+
+    def predict_batch(self, observed_list, predict_steps, model_paths=None):
+        """ Make predictions of many series with the batched engine
+
+        Series of the same length share their seasonal period and are fitted,
+        filtered and forecast together by BatchSARIMAX. Stored parameters
+        and the refit policy are the same as in predict.
+
+        Args:
+            observed_list: (list) observed_data of each series, in the format
+                of predict.
+            predict_steps: the number of prediction steps, or a list of the
+                number of each series.
+            model_paths: (list) model path of each series, or None.
+
+        Return:
+            list: predicted_data of each series, with the same data format as
+                observed_data
+        """
+
+        num_series = len(observed_list)
+        if isinstance(predict_steps, int):
+            predict_steps = [predict_steps] * num_series
+        if model_paths is None:
+            model_paths = [None] * num_series
+
+        pre = Preprocessor()
+        groups = {}
+        for index, observed_data in enumerate(observed_list):
+            observed_data[self.VALUES] = pre.impute_missing_value(
+                observed_data[self.VALUES])
+            observed_data[self.TIMES] = np.array(
+                observed_data[self.TIMES], dtype='int64')
+            groups.setdefault(len(observed_data[self.VALUES]), []).append(
+                index)
+
+        predicted_list = [None] * num_series
+        for num_sample, indexes in groups.items():
+            for index, predictions in zip(indexes, self._predict_group(
+                    [observed_list[i] for i in indexes],
+                    max(predict_steps[i] for i in indexes),
+                    [model_paths[i] for i in indexes], num_sample)):
+                observed_data = observed_list[index]
+                steps = predict_steps[index]
+                predicted_list[index] = {
+                    self.VALUES: predictions[:steps].reshape(-1, 1),
+                    self.TIMES: observed_data[self.TIMES][-1] +
+                                np.arange(steps) + 1
+                }
+        return predicted_list
+
+    def _predict_group(self, observed_list, predict_steps, model_paths,
+                       num_sample):
+        """Predict series of the same length with the batched engine."""
+        order = (self.cfg[self.ORDER]['p'], self.cfg[self.ORDER]['d'],
+                 self.cfg[self.ORDER]['q'])
+        # To avoid 'maxlag should be < nobs' error
+        seasonal_order = (
+            self.cfg[self.SEASONAL_ORDER]['P'],
+            self.cfg[self.SEASONAL_ORDER]['D'],
+            self.cfg[self.SEASONAL_ORDER]['Q'],
+            min(self.cfg[self.SEASONAL_ORDER]['s'],
+                int(num_sample / OBSERVATION_MULTIPLE)))
+        engine = BatchSARIMAX(order, seasonal_order)
+        version = self._get_model_version(order, seasonal_order)
+        endog = np.array([observed_data[self.VALUES][:, 0]
+                          for observed_data in observed_list])
+
+        params = np.full((len(endog), engine.k_params), np.nan)
+        refit_ages = np.zeros(len(endog), dtype='int64')
+        for index, (observed_data, model_path) in enumerate(
+                zip(observed_list, model_paths)):
+            stored = self._load_model(engine.k_params, model_path, version)
+            if stored is not None:
+                params[index] = stored['params']
+                if not self._is_refit_needed(stored, observed_data):
+                    refit_ages[index] = int(stored['refit_age']) + 1
+
+        refit = refit_ages == 0
+        if refit.any():
+            params[refit] = engine.fit(endog[refit],
+                                       start_params=params[refit])
+            self.log.debug("Batched SARIMAX fit of %d of %d series.",
+                           refit.sum(), len(endog))
+
+        _, predictions = engine.filter(endog, params, predict_steps)
+        failed = ~np.isfinite(predictions).all(axis=1)
+        if failed.any():
+            predictions[failed] = np.array([
+                predicted_data[self.VALUES][:, 0]
+                for predicted_data in self.fallback.predict_batch(
+                    [observed_list[i] for i in np.nonzero(failed)[0]],
+                    [predict_steps] * failed.sum(), FallbackCase.ERROR)])
+
+        prdt_times = np.array([observed_data[self.TIMES][-1]
+                               for observed_data in observed_list])[:, None] \
+            + np.arange(predict_steps) + 1
+        for index, model_path in enumerate(model_paths):
+            if model_path and self.cfg.get('warm_start') and \
+                    not failed[index]:
+                self.model_store.save(
+                    model_path, version, params=params[index],
+                    refit_age=np.array(refit_ages[index]),
+                    forecast_times=prdt_times[index],
+                    forecast_values=predictions[index])
+        return predictions
+
+    def _get_fit_callback(self, deadline=None):
+        """Get the callback of fit iterations, which abandons the fit when
+        its wall-clock budget runs out."""
+        timeout = self.cfg.get('fit_timeout_sec')
+        if timeout is not None:
+            fit_deadline = time.monotonic() + timeout
+            deadline = fit_deadline if deadline is None \
+                else min(deadline, fit_deadline)
+        if deadline is None:
+            return None
+
+        def callback(*_):
+            if time.monotonic() >= deadline:
+                raise FitDeadlineExceeded()
+        return callback
+
+    @staticmethod
+    def _get_model_version(order, seasonal_order):
+        """Get the model version, which changes with the model orders."""
+        return 'sarimax:order={};seasonal_order={}'.format(
+            tuple(order), tuple(seasonal_order))
+
+    def _load_model(self, k_params, model_path, version):
+        """Load the stored model of the series, if it has k_params
+        parameters."""
+        if not model_path or not self.cfg.get('warm_start'):
+            return None
+
+        stored = self.model_store.load(model_path, version)
+        if stored is None or 'params' not in stored:
+            return None
+
+        if stored['params'].shape != (k_params,) or \
+                not np.isfinite(stored['params']).all():
+            return None
+        return stored
+
+    def _is_refit_needed(self, stored, observed_data):
+        """Check whether the model should be fitted again, or the stored
+        parameters can be used to filter the new observations.
+
+        A full refit is needed every refit interval, or when the last
+        forecast drifts from the observations it covered.
+        """
+        refit_cfg = self.cfg.get('refit') or {}
+        if stored is None or 'refit_age' not in stored or \
+                int(stored['refit_age']) + 1 >= refit_cfg.get('interval', 1):
+            return True
+
+        _, index_observed, index_forecast = np.intersect1d(
+            observed_data[self.TIMES], stored['forecast_times'],
+            return_indices=True)
+        if index_observed.size == 0:
+            return False
+
+        observed = observed_data[self.VALUES][index_observed, 0]
+        forecast = stored['forecast_values'][index_forecast]
+        error = np.mean(np.abs(observed - forecast)) / \
+            max(np.mean(np.abs(observed)), np.finfo('float64').eps)
+        if error > refit_cfg.get('error_threshold', np.inf):
+            self.log.debug("Forecast error %.3f drifted, thus refit.", error)
+            return True
+        return False
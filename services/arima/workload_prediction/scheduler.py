@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+""" Prediction cycle scheduler """
+# pylint: disable=E0401
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import yaml
+
+
+class PredictionScheduler:
+    """ Run prediction cycles over pods on a fixed cadence """
+
+    def __init__(self, log, period_sec=60, max_concurrent_pods=4,
+                 budget_ratio=1.0):
+        """Initialize the scheduler.
+
+        Args:
+            log: logger.
+            period_sec: cycle period in seconds, measured from cycle start.
+            max_concurrent_pods: the number of pods predicted concurrently.
+            budget_ratio: ratio of the period after which the cycle is over
+                its budget.
+        """
+        self.log = log
+        self.period_sec = period_sec
+        self.max_concurrent_pods = max_concurrent_pods
+        self.budget_ratio = budget_ratio
+        # time.monotonic() at which the running cycle is over its budget.
+        self.cycle_deadline = None
+        self.cycle_num = 0
+        self.overrun_num = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_pods)
+
+    @classmethod
+    def from_config(cls, log, config_file=None):
+        """Create the scheduler from its configuration file."""
+        if config_file is None:
+            config_file = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                'config/scheduler_conf.yaml')
+
+        with open(config_file) as yaml_file:
+            config = yaml.safe_load(yaml_file)
+        return cls(log, period_sec=config['period_sec'],
+                   max_concurrent_pods=config['max_concurrent_pods'],
+                   budget_ratio=config.get('budget_ratio', 1.0))
+
+    def run_cycle(self, pod_list, predict_fun):
+        """Predict the pods concurrently and wait for all of them.
+
+        Args:
+            pod_list: (list) the info of the pods.
+            predict_fun: function called with the info of each pod.
+
+        Returns:
+            float: elapsed seconds of the cycle.
+        """
+        start = time.monotonic()
+        self.cycle_deadline = start + self.period_sec * self.budget_ratio
+        futures = [(pod, self._executor.submit(predict_fun, pod))
+                   for pod in pod_list]
+        for pod, future in futures:
+            try:
+                future.result()
+            except Exception as err:  # pylint: disable=W0703
+                self.log.error('Predict POD %s error: %s', pod, err)
+        return time.monotonic() - start
+
+    def run_forever(self, get_pod_list, predict_fun):
+        """Run a cycle at every period.
+
+        A cycle overrunning its period is reported and the next cycle starts
+        at the following period boundary.
+
+        Args:
+            get_pod_list: function returning the pods of a cycle.
+            predict_fun: function called with the info of each pod.
+        """
+        next_start = time.monotonic()
+        while True:
+            cycle_start = next_start
+            pod_list = get_pod_list()
+            elapsed = self.run_cycle(pod_list, predict_fun)
+            self.cycle_num += 1
+
+            next_start = self._get_next_start(cycle_start, time.monotonic())
+            if next_start - cycle_start > self.period_sec:
+                self.overrun_num += 1
+                self.log.warning(
+                    'Prediction cycle %d of %d pods took %.1fs and overran '
+                    'its %ss period (%d of %d cycles overran).',
+                    self.cycle_num, len(pod_list), elapsed, self.period_sec,
+                    self.overrun_num, self.cycle_num)
+            else:
+                self.log.info('Prediction cycle %d of %d pods took %.1fs.',
+                              self.cycle_num, len(pod_list), elapsed)
+
+            time.sleep(max(0, next_start - time.monotonic()))
+
+    def _get_next_start(self, cycle_start, now):
+        """Get the first period boundary after now."""
+        periods = max(1, math.ceil((now - cycle_start) / self.period_sec))
+        return cycle_start + periods * self.period_sec
+
+    def close(self):
+        """Wait for the running pods and stop the scheduler threads."""
+        self._executor.shutdown(wait=True)
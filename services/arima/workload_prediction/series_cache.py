@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+""" Cache of the last prediction of each series """
+# pylint: disable=E0401
+import threading
+from collections import OrderedDict
+
+
+class SeriesCache:
+    """Bounded LRU cache of the last output of each series, valid as long
+    as the fingerprint of the series input does not change."""
+
+    def __init__(self, capacity=10000):
+        """Initialize the cache.
+
+        Args:
+            capacity: the maximum number of cached series.
+        """
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self):
+        """Ratio of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key, fingerprint):
+        """Get the cached entry of a series.
+
+        Args:
+            key: the series key.
+            fingerprint: (str) fingerprint of the current series input.
+
+        Returns:
+            dict: the cached entry, or None if the series is missing or its
+                input changed.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['fingerprint'] != fingerprint:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, fingerprint, **outputs):
+        """Cache the outputs of a series for its current input.
+
+        Args:
+            key: the series key.
+            fingerprint: (str) fingerprint of the series input.
+            outputs: outputs of the series, e.g. prediction.
+        """
+        with self._lock:
+            entry = dict(outputs, fingerprint=fingerprint)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
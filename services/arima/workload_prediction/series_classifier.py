@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+""" Series classifier """
+# pylint: disable=E0401
+import os
+import yaml
+import numpy as np
+
+from framework.log.logger import Logger
+
+
+class SeriesClass:  # pylint: disable=too-few-public-methods
+    """ Classes of series """
+    ZERO = 'zero'
+    CONSTANT = 'constant'
+    NEAR_CONSTANT = 'near_constant'
+    STEP = 'step'
+    REGULAR = 'regular'
+
+
+class SeriesClassifier:
+    """Classify flat and step series, whose forecast is their last level,
+    so that no model has to be fitted for them."""
+
+    def __init__(self, log=None, config_file=None):
+        """Initialize the classifier.
+
+        Args:
+            config_file: configuration file of the tolerances
+
+        Returns: none
+        """
+
+        self.TIMES = 'times'
+        self.VALUES = 'values'
+
+        self.log = log or Logger()
+
+        if config_file is None:
+            config_file = os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                'config/classifier_conf.yaml')
+
+        try:
+            with open(config_file, 'r') as stream:
+                self.cfg = yaml.safe_load(stream)
+        except FileNotFoundError:
+            self.log.error("Series classifier's configure file not found.")
+            raise
+
+    def classify(self, values):
+        """Classify series of the same length.
+
+        Args:
+            values: (array) series x time steps.
+
+        Returns:
+            (array, array): SeriesClass and forecast level of each series;
+                the level of regular series is their mean.
+        """
+        num_series, num_sample = values.shape
+        scale = np.maximum(np.mean(np.abs(values), axis=1),
+                           self.cfg['min_scale'])
+        tolerance = self.cfg['tolerance'] * scale
+        value_range = np.ptp(values, axis=1)
+
+        classes = np.full(num_series, SeriesClass.REGULAR, dtype=object)
+        levels = np.mean(values, axis=1)
+
+        # Step series have two near-constant segments around their largest
+        # change.
+        if num_sample > 1:
+            shift = np.argmax(np.abs(np.diff(values, axis=1)), axis=1)
+            after = np.arange(num_sample) > shift[:, None]
+            before_range = _masked_range(values, ~after)
+            after_range = _masked_range(values, after)
+            step = (before_range <= tolerance) & \
+                (after_range <= tolerance) & \
+                (num_sample - 1 - shift >= self.cfg['min_step_samples'])
+            classes[step] = SeriesClass.STEP
+            levels[step] = np.sum(np.where(after, values, 0), axis=1)[step] / \
+                (num_sample - 1 - shift[step])
+
+        near_constant = value_range <= tolerance
+        classes[near_constant] = SeriesClass.NEAR_CONSTANT
+        levels[near_constant] = np.mean(values[near_constant], axis=1)
+
+        constant = value_range == 0
+        classes[constant] = SeriesClass.CONSTANT
+        levels[constant] = values[constant, -1]
+
+        zero = constant & (values[:, -1] == 0)
+        classes[zero] = SeriesClass.ZERO
+        levels[zero] = 0
+        return classes, levels
+
+    def predict_batch(self, observed_list, predict_steps):
+        """ Make predictions of the flat and step series
+
+        Series of the same length are classified together; series with
+        missing values are left as regular.
+
+        Args:
+            observed_list: (list) observed_data of each series, in the format
+                of SARIMAXPredictor.predict.
+            predict_steps: (list) the number of prediction steps of each
+                series.
+
+        Return:
+            list: predicted_data of each series, or None for regular series
+        """
+
+        groups = {}
+        for index, observed_data in enumerate(observed_list):
+            values = observed_data[self.VALUES]
+            if values.dtype.kind == 'f' and np.isfinite(values).all():
+                groups.setdefault(len(values), []).append(index)
+
+        predicted_list = [None] * len(observed_list)
+        class_counts = {}
+        for indexes in groups.values():
+            classes, levels = self.classify(np.array(
+                [observed_list[i][self.VALUES][:, 0] for i in indexes]))
+            for index, series_class, level in zip(indexes, classes, levels):
+                class_counts[series_class] = \
+                    class_counts.get(series_class, 0) + 1
+                if series_class == SeriesClass.REGULAR:
+                    continue
+
+                steps = predict_steps[index]
+                predicted_list[index] = {
+                    self.VALUES: np.full((steps, 1), level),
+                    self.TIMES: np.array(observed_list[index][self.TIMES],
+                                         dtype='int64')[-1] +
+                                np.arange(steps) + 1
+                }
+
+        self.log.debug("Series classes: %s", class_counts)
+        return predicted_list
+
+
+def _masked_range(values, mask):
+    """Get the range of the values of each series within the mask."""
+    return np.max(np.where(mask, values, -np.inf), axis=1) - \
+        np.min(np.where(mask, values, np.inf), axis=1)
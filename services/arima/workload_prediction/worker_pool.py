@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+""" Persistent worker pool for prediction """
+# pylint: disable=E0401
+import gc
+import os
+import threading
+from multiprocessing import Pool, current_process
+from multiprocessing.pool import ThreadPool
+
+
+class WorkerMode:  # pylint: disable=too-few-public-methods
+    """ Kinds of workers of the pool """
+    PROCESS = 'process'
+    THREAD = 'thread'
+
+
+# Logger of the worker process, set by the pool initializer.
+_WORKER_LOG = None
+
+
+def _init_worker(log):
+    # pylint: disable=W0603
+    global _WORKER_LOG
+    _WORKER_LOG = log
+
+
+def _run_task(target_fun, args):
+    return target_fun(_WORKER_LOG, *args)
+
+
+class PredictionWorkerPool:
+    """ Pool of long-lived workers shared across pods and cycles """
+
+    def __init__(self, log, worker_num=None, mode=WorkerMode.PROCESS):
+        """Initialize the pool.
+
+        Args:
+            log: logger, also handed over to the workers.
+            worker_num: the maximum number of concurrent workers; default is
+                the number of CPU cores.
+            mode: (WorkerMode) run tasks on worker processes or threads.
+        """
+        self.log = log
+        self.worker_num = worker_num or os.cpu_count() or 1
+        self.mode = mode
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the workers now instead of at the first task.
+
+        Worker processes are forked, so a process with other threads, e.g.
+        of gRPC channels or DAO writers, should start them before those
+        threads; its children may otherwise deadlock on locks held by them.
+        """
+        self._get_pool()
+
+    def _get_pool(self):
+        with self._lock:
+            return self.__get_pool()
+
+    def __get_pool(self):
+        if self._pool is None:
+            if self.mode == WorkerMode.PROCESS and current_process().daemon:
+                # Daemonic processes, e.g. workers of another pool, are not
+                # allowed to have children.
+                self.log.debug('Run prediction workers as threads in '
+                               'daemonic process %s.', current_process().name)
+                self.mode = WorkerMode.THREAD
+            elif self.mode == WorkerMode.PROCESS and \
+                    threading.active_count() > 1:
+                self.log.warning('Prediction worker processes are forked '
+                                 'from a process with %d threads; start the '
+                                 'pool before other threads.',
+                                 threading.active_count())
+
+            pool_class = Pool if self.mode == WorkerMode.PROCESS \
+                else ThreadPool
+            # Objects of the parent are not collected by the forked workers,
+            # whose finalizers, e.g. joining threads of the parent, would
+            # hang them.
+            freeze = self.mode == WorkerMode.PROCESS and \
+                hasattr(gc, 'freeze')
+            if freeze:
+                gc.freeze()
+            try:
+                self._pool = pool_class(processes=self.worker_num,
+                                        initializer=_init_worker,
+                                        initargs=(self.log,))
+            finally:
+                if freeze:
+                    gc.unfreeze()
+            self.log.info('Prediction worker pool with %d %s workers '
+                          'started.', self.worker_num, self.mode)
+        return self._pool
+
+    def run(self, target_fun, args_list):
+        """Run tasks concurrently and wait for all of them.
+
+        Args:
+            target_fun: module-level function called in the workers as
+                target_fun(log, *args).
+            args_list: (list) arguments of each task.
+
+        Returns:
+            list: the result of each task, or None for failed tasks.
+        """
+        pool = self._get_pool()
+        async_results = [pool.apply_async(_run_task, (target_fun, args))
+                         for args in args_list]
+
+        results = []
+        for async_result in async_results:
+            try:
+                results.append(async_result.get())
+            except Exception as err:  # pylint: disable=W0703
+                self.log.error('Prediction task error: %s', err)
+                results.append(None)
+        return results
+
+    def close(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
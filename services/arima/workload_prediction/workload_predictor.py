@@ -2,29 +2,40 @@
 """ Workload predictor """
 # pylint: disable=E0401
 import os
-import sys
 from datetime import datetime
-from multiprocessing import Process
 import shutil
+import threading
+import time
 import uuid
+from collections import Counter
 import yaml
-import regex as re
+import numpy as np
 
 
 from framework.log.logger import Logger, LogLevel
 from framework.datastore.metric_dao import MetricDAO
+from framework.datastore.series_store import SeriesStore
 from services.arima.workload_prediction.process_threading \
-    import predict_by_series
-from services.arima.workload_prediction.preprocessor import Preprocessor
+    import predict_by_series, predict_by_series_data, SERIES_EXECUTOR_MODE
+from services.arima.workload_prediction.preprocessor \
+    import Preprocessor, ImputePolicy
 from services.arima.workload_prediction.workload_utils \
-    import get_csv_data, get_container_name, get_metric_name_and_conf
+    import get_csv_data, get_container_name, get_metric_name_and_conf, \
+    get_series_fingerprint
 from services.arima.workload_prediction.recommendation import Recommender
+from services.arima.workload_prediction.worker_pool \
+    import PredictionWorkerPool
+from services.arima.workload_prediction.series_cache import SeriesCache
 
 
 class WorkloadPredictor:
     """ Workload predictor """
 
-    def __init__(self, log=None, dao=None, preprocesser=None, recommender=None):
+    def __init__(self, log=None, dao=None, preprocesser=None, recommender=None,
+                 in_memory=False, worker_num=None,
+                 worker_mode=SERIES_EXECUTOR_MODE, series_cache_size=10000,
+                 granularities=('30s',), rollup_store=None,
+                 worker_pool=None):
         # Max filename length of linux is 255;
         # reserve capacity 20 character for further name appending
         # e.g., .prdt_log in _predict_write_influx()
@@ -39,8 +50,20 @@ class WorkloadPredictor:
         with open(os.path.join(
                 self.APP_PATH, 'config/granularity_conf.yaml')) as yaml_file:
             granularity_conf = yaml.load(yaml_file)
-            granularity_conf = granularity_conf['30s']
-        self.granularity_conf = granularity_conf
+        # The first granularity is queried, and each coarser one is rolled
+        # up from the one before it.
+        self.granularity_conf = granularity_conf[granularities[0]]
+        self.rollup_confs = [granularity_conf[granularity]
+                             for granularity in granularities[1:]]
+        # Rolled up series by file name, appended with the buckets completed
+        # since the last cycle instead of querying their whole data amount.
+        self.rollup_store = rollup_store if rollup_store is not None \
+            else SeriesStore(self._get_rollup_capacity())
+        self._check_rollup_store()
+        # Schedule slot of the last prediction of each pod and granularity.
+        self.predicted_slots = {}
+        # Guard of the state shared by concurrent predictions of pods.
+        self._lock = threading.Lock()
 
         self.log = log or Logger(name='workload_prediction',
                                  logfile='/var/log/workload_prediction.log',
@@ -50,15 +73,66 @@ class WorkloadPredictor:
         self.target_metrics = measurement_conf.keys()
         self.recommender = recommender or Recommender(
             self.measurement_conf, log=self.log, dao=self.dao)
+        # Keep series as arrays from query to recommendation instead of
+        # exporting them to files under bridge/prediction/.
+        self.in_memory = in_memory
+        # Series are predicted by workers reused across pods and cycles.
+        self.worker_pool = worker_pool or PredictionWorkerPool(
+            self.log, worker_num, mode=worker_mode)
+        # Outputs of series whose input window did not change are reused.
+        self.series_cache = SeriesCache(series_cache_size)
+        # Number of fits which missed their deadline of each series.
+        self.deadline_misses = Counter()
+        # Observed data queried in bulk for the pods of a cycle, by
+        # (measurement, namespace, pod_name).
+        self.prefetched_data = {}
+
+    def close(self):
+        """ Stop the prediction workers. """
+        self.worker_pool.close()
+
+    def prefetch(self, pods):
+        """ Query the observed data of the pods of a cycle in bulk, which
+        their predictions then take instead of querying one by one.
+        :param pods: (list) the info of the pods of the cycle.
+        """
+
+        measurements = [self.measurement_conf[metric]['measurement']
+                        for metric in self.target_metrics]
+        data_amount_sec = self.granularity_conf['data_amount_sec']
+        try:
+            observed_map = self.dao.get_pods_observed_series(
+                measurements,
+                [(pod['namespace'], pod['pod_name']) for pod in pods],
+                data_amount_sec)
+        except Exception as e:  # pylint: disable=W0703
+            self.log.error(e)
+            return
+
+        self.prefetched_data = {
+            key: (data_amount_sec, queried_data)
+            for key, queried_data in observed_map.items()}
+        self.log.info('Observed data of %d pods were queried in bulk.',
+                      len(pods))
 
-    def predict(self, pod, thread_num=1, target_labels=None):
+    def predict(self, pod, thread_num=1, target_labels=None, deadline=None):
         """ Prediction
         :param pod: (dict) the info of the pod that need train/predict.
-        :param thread_num: the number of threading.
+        :param thread_num: the number of series per prediction task.
         :param target_labels: (list) target labels.
+        :param deadline: time.monotonic() after which series are predicted
+                         by the fast fallback forecaster.
         """
 
-        current_time = datetime.now().strftime('%Y%m%d%H%M%S')
+        if self.in_memory:
+            self._predict_in_memory(pod, thread_num, target_labels,
+                                    deadline)
+            return
+
+        # Pods are predicted concurrently, so each prediction gets its own
+        # folders.
+        current_time = '{}_{}'.format(
+            datetime.now().strftime('%Y%m%d%H%M%S'), uuid.uuid4().hex)
         file_folder_name = {
             'input': 'bridge/prediction/input/{}/{}/'.format(
                 self.granularity_conf['mid'], current_time),
@@ -86,7 +160,7 @@ class WorkloadPredictor:
                 self._group_data_to_series_map(queried_data, config)
             filename_tags_map.update(filename_tags_submap)
 
-            # [3] Impute missing series to zeros
+            # [3] Impute missing values by the impute policy
             series_map = self._impute_missing_series(series_map, config)
 
             # [4] Export series to files
@@ -105,26 +179,18 @@ class WorkloadPredictor:
                 os.path.join(file_folder_name['input'], folder, file_name)
                 for file_name in os.listdir(
                     os.path.join(file_folder_name['input'], folder))]
-        input_file_list = list(self._chunks(input_file_list, thread_num))
-
         if not input_file_list:
             return
-        for subinput_files in input_file_list:
-            filename_tags_submap = {
-                os.path.basename(k): filename_tags_map[os.path.basename(k)]
-                for k in subinput_files}
-
-            p = Process(target=predict_by_series,
-                        args=(self.log, self.measurement_conf,
-                              self.granularity_conf, subinput_files,
-                              filename_tags_submap, file_folder_name,
-                              time_scaling_sec))
-            p.start()
-            p.join()
+        deadline_misses = Counter()
+        predict_by_series(self.log, self.measurement_conf,
+                          self.granularity_conf, input_file_list,
+                          filename_tags_map, file_folder_name,
+                          time_scaling_sec, executor=self.worker_pool,
+                          chunk_size=thread_num, deadline=deadline,
+                          deadline_misses=deadline_misses)
+        self._add_deadline_misses(deadline_misses)
 
         # [7] write prediction result via GRPC client.
-        input_file_list = [item for sublist in input_file_list
-                           for item in sublist]
         output_file_list = []
         for file_name in input_file_list:
 
@@ -147,16 +213,288 @@ class WorkloadPredictor:
         if os.path.exists(file_folder_name['output']):
             shutil.rmtree(file_folder_name['output'], ignore_errors=True)
 
-    def _chunks(self, _list, num):
-        try:
-            for i in range(0, len(_list), num):
-                yield _list[i:i + num]
-        except Exception as e:  # pylint: disable=W0703
-            self.log.warning(sys.exc_info()[0])
-            self.log.warning(e)
+    def _predict_in_memory(self, pod, thread_num=1, target_labels=None,
+                           deadline=None):
+        """ Prediction without writing series to files.
+
+        The series of the base granularity are queried, their completed
+        buckets are appended to the rolled up series of the coarser
+        granularities, and the granularities due in this cycle are predicted.
+        :param pod: (dict) the info of the pod that need train/predict.
+        :param thread_num: the number of series per prediction task.
+        :param target_labels: (list) target labels.
+        """
+
+        # [1] Retrieve data from influxdb
+        base_series = {}
+        filename_tags_map = {}
+        for metric in self.target_metrics:
+            config = self.measurement_conf[metric].copy()
+            config.update(self.granularity_conf)
+
+            queried_data = self._query_data(config, pod, target_labels)
+            if not queried_data:
+                self.log.debug('Pod "%s" query results in "%s" is empty; '
+                               'thus not predicted\n',
+                               pod, config['measurement'])
+                continue
+            self.log.info('Pod "{%s}" data in "%s" were queried.',
+                          pod, config['measurement'])
+
+            # [2] Group data to series arrays
+            series_map, _, filename_tags_submap = \
+                self._group_data_to_series_map(queried_data, config)
+            filename_tags_map.update(filename_tags_submap)
+            base_series[metric] = series_map
+
+        # [2] Roll up the completed buckets of each coarser granularity
+        granularity_series = {self.granularity_conf['mid']: base_series}
+        source_conf = self.granularity_conf
+        for granularity_conf in self.rollup_confs:
+            granularity_series[granularity_conf['mid']] = {
+                metric: self._rollup_series_map(
+                    metric, series_map, filename_tags_map, source_conf,
+                    granularity_conf)
+                for metric, series_map in granularity_series[
+                    source_conf['mid']].items()}
+            source_conf = granularity_conf
+
+        for granularity_conf, slot in self._get_due_granularities(pod):
+            if self._predict_granularity(
+                    pod, granularity_conf,
+                    granularity_series[granularity_conf['mid']],
+                    filename_tags_map, thread_num, deadline) and \
+                    slot is not None:
+                with self._lock:
+                    self.predicted_slots[
+                        (pod.get('uid'), granularity_conf['mid'])] = slot
+
+    def _predict_granularity(self, pod, granularity_conf, series,
+                             filename_tags_map, thread_num=1, deadline=None):
+        """ Predict the series of a granularity. Recommendations are made
+        from the base granularity only.
+        :return: (bool) whether any prediction was written.
+        """
+
+        observed_map = {}
+        fingerprint_map = {}
+        time_scaling_sec = self._get_granularity_sec(granularity_conf)
+        is_base = granularity_conf is self.granularity_conf
+        for metric, series_map in series.items():
+            config = self.measurement_conf[metric].copy()
+            config.update(granularity_conf)
+
+            series_map = self._get_window_series(series_map, config)
+
+            # [3] Impute missing values by the impute policy
+            series_map = self._impute_missing_series(series_map, config)
+
+            for file_name, observed_data in series_map.items():
+                observed_map[(config['name'], file_name)] = observed_data
+                fingerprint_map[(config['name'], file_name)] = \
+                    get_series_fingerprint(observed_data, config,
+                                           config['minimal_sample_size'])
+
+        if not observed_map:
+            return False
+
+        # [4] Reuse the outputs of series without new or changed samples in
+        # their trailing minimal_sample_size steps
+        predicted_map, resource_map = self._get_cached_outputs(
+            pod, fingerprint_map)
+
+        # [5] Conduct prediction for each series with sufficient data
+        series_list = [(metric_name, file_name, observed_data)
+                       for (metric_name, file_name), observed_data
+                       in observed_map.items()
+                       if (metric_name, file_name) not in predicted_map]
+        deadline_misses = Counter()
+        predicted_map.update(predict_by_series_data(
+            self.log, self.measurement_conf, granularity_conf,
+            series_list, executor=self.worker_pool, chunk_size=thread_num,
+            deadline=deadline, deadline_misses=deadline_misses))
+        self._add_deadline_misses(deadline_misses)
+
+        # [6] write prediction result via GRPC client.
+        self.write_pod_series(
+            pod, predicted_map, filename_tags_map, time_scaling_sec,
+            granularity_mid=None if is_base else granularity_conf['mid'])
+
+        # [7] write recommendation result via GRPC client
+        if is_base:
+            self.recommender.set_time_scaling_sec(time_scaling_sec)
+            self.recommender.recommend_series(
+                pod, observed_map, predicted_map, filename_tags_map,
+                resource_map)
+
+        # [8] Cache the outputs for the next cycle
+        for key, prediction in predicted_map.items():
+            self.series_cache.put(
+                key, fingerprint_map[key], prediction=prediction,
+                recommendation=(pod.get('policy'), resource_map.get(key)))
+        self.log.info('Series cache hit rate: %.3f (%d hits, %d misses).',
+                      self.series_cache.hit_rate, self.series_cache.hits,
+                      self.series_cache.misses)
+        return bool(predicted_map)
+
+    def _get_due_granularities(self, pod):
+        """Get the granularities due in this cycle of the pod, with their
+        schedule slots.
+
+        The base granularity is due in every cycle, and a rolled up one when
+        the slot of its schedule_period_sec changed since its last written
+        prediction of the pod; the slot is recorded once it is written.
+        """
+        due_confs = [(self.granularity_conf, None)]
+        now = time.time()
+        for granularity_conf in self.rollup_confs:
+            period_sec = granularity_conf.get('schedule_period_sec')
+            slot = int(now // period_sec) if period_sec else None
+            key = (pod.get('uid'), granularity_conf['mid'])
+            with self._lock:
+                predicted_slot = self.predicted_slots.get(key)
+            if slot is None or predicted_slot != slot:
+                due_confs.append((granularity_conf, slot))
+        return due_confs
+
+    def _add_deadline_misses(self, deadline_misses):
+        """Add the deadline misses of a prediction to the totals."""
+        if deadline_misses:
+            with self._lock:
+                self.deadline_misses.update(deadline_misses)
+
+    def _get_rollup_capacity(self):
+        """Get the number of time steps of the longest rolled up window."""
+        return max([conf['data_amount_sec'] // self._get_granularity_sec(conf)
+                    for conf in self.rollup_confs] or [1])
+
+    def _check_rollup_store(self):
+        """Raise ValueError if the rolled up series cannot be kept in the
+        rollup store, or rolled up from the granularity before them."""
+        capacity = self._get_rollup_capacity()
+        if self.rollup_store.capacity < capacity:
+            raise ValueError(
+                'rollup store capacity {} is less than the {} time steps '
+                'of the rolled up data amount'.format(
+                    self.rollup_store.capacity, capacity))
+        for conf in self.measurement_conf.values():
+            if len(conf['fields']) != self.rollup_store.num_fields:
+                raise ValueError(
+                    'rollup store has {} fields, not the {} of {}'.format(
+                        self.rollup_store.num_fields, len(conf['fields']),
+                        conf['name']))
+
+        source_sec = self._get_granularity_sec(self.granularity_conf)
+        for conf in self.rollup_confs:
+            granularity_sec = self._get_granularity_sec(conf)
+            if granularity_sec <= source_sec or granularity_sec % source_sec:
+                raise ValueError(
+                    'granularity {} is not rolled up from {}s steps'.format(
+                        conf['data_granularity'], source_sec))
+            source_sec = granularity_sec
+
+    def _rollup_series_map(self, metric, series_map, filename_tags_map,
+                           source_conf, config):
+        """Roll up series of a metric of source_conf to the granularity of
+        config, and get the rolled up series of the rollup store, where they
+        are kept by (metric, file name).
+
+        The buckets which the source series cover from their first to last
+        time step, and which are newer than the stored ones, are averaged
+        for all series at once and appended to the store. The tags and file
+        names of the rolled up series are those of the source series with
+        the mid of config.
+        """
+        source_names = [name for name, source in series_map.items()
+                        if len(source)]
+        if not source_names:
+            return {}
+
+        file_names = []
+        for source_name in source_names:
+            tags = '{},mid={}'.format(
+                filename_tags_map[source_name].rsplit(',mid=', 1)[0],
+                config['mid'])
+            file_name = str(uuid.uuid3(uuid.NAMESPACE_DNS, tags))
+            filename_tags_map[file_name] = tags
+            file_names.append(file_name)
+
+        granularity_sec = self._get_granularity_sec(config)
+        factor = granularity_sec // self._get_granularity_sec(source_conf)
+        block = np.concatenate([series_map[name] for name in source_names])
+        offsets = np.concatenate(([0], np.cumsum(
+            [len(series_map[name]) for name in source_names])))
+        times, values, offsets, _ = self.preprocessor.resample_series(
+            np.floor_divide(block[:, 0], factor), block[:, 1:], offsets)
+
+        for index, source_name in enumerate(source_names):
+            source = series_map[source_name]
+            buckets = times[offsets[index]:offsets[index + 1]]
+            complete = (buckets * factor >= source[0, 0]) & \
+                ((buckets + 1) * factor - 1 <= source[-1, 0])
+            stored = self.rollup_store.get((metric, file_names[index]))
+            if stored is not None and stored.last_time is not None:
+                complete &= buckets * granularity_sec > stored.last_time
+            if complete.any():
+                self.rollup_store.extend(
+                    (metric, file_names[index]),
+                    buckets[complete] * granularity_sec,
+                    values[offsets[index]:offsets[index + 1]][complete])
+
+        return self._get_rollup_series(metric, file_names, granularity_sec)
+
+    def _get_rollup_series(self, metric, file_names, granularity_sec):
+        """Get the rolled up series of a metric as arrays of time index plus
+        field values, copied and with their gaps as NaN rows."""
+        windows = []
+        for file_name in file_names:
+            stored = self.rollup_store.get((metric, file_name))
+            if stored is None or not len(stored):
+                continue
+            times, values = stored.window()
+            windows.append((file_name, (times.astype('int64') +
+                                        stored.base_time) // granularity_sec,
+                            values))
+        if not windows:
+            return {}
+
+        offsets = np.concatenate(([0], np.cumsum(
+            [len(times) for _, times, _ in windows])))
+        times, values, offsets, _ = self.preprocessor.resample_series(
+            np.concatenate([times for _, times, _ in windows]),
+            np.concatenate([values for _, _, values in windows]), offsets)
+        block = np.column_stack((times, values))
+        return {file_name: block[offsets[index]:offsets[index + 1]]
+                for index, (file_name, _, _) in enumerate(windows)}
+
+    def _get_window_series(self, series_map, config):
+        """Keep the time steps of the data amount of config in each
+        series, copied since they are imputed in place while the series are
+        shared by the granularities."""
+        num_steps = config['data_amount_sec'] // \
+            self._get_granularity_sec(config)
+        return {file_name: series[-num_steps:].copy()
+                for file_name, series in series_map.items()}
+
+    def _get_cached_outputs(self, pod, fingerprint_map):
+        """Get the cached prediction and recommendation of the series whose
+        fingerprint did not change."""
+        predicted_map = {}
+        resource_map = {}
+        for key, fingerprint in fingerprint_map.items():
+            entry = self.series_cache.get(key, fingerprint)
+            if entry is None:
+                continue
+
+            predicted_map[key] = entry['prediction']
+            policy, resources = entry['recommendation']
+            if policy == pod.get('policy'):
+                resource_map[key] = resources
+        return predicted_map, resource_map
 
     def _export_input_files(self, series_map, input_file_folder, metric_name):
-        for series in series_map.keys():
+        point_map = self._format_series_points(series_map)
+        for series in point_map.keys():
             file_dir = os.path.join(input_file_folder, metric_name)
             if not os.path.exists(file_dir):
                 os.makedirs(file_dir)
@@ -164,51 +502,31 @@ class WorkloadPredictor:
             file_name = os.path.join(file_dir, str(series))
 
             with open(file_name, 'a') as outfile:
-                for point in series_map[series]:
+                for point in point_map[series]:
                     outfile.write(point + '\n')
 
+    @staticmethod
+    def _format_series_points(series_map):
+        """Format series arrays to points of "<timestep>,<value>,..." """
+        point_map = {}
+        for series, data in series_map.items():
+            point_map[series] = [
+                ','.join([str(int(point[0]))] + [
+                    '' if np.isnan(value) else str(value)
+                    for value in point[1:]])
+                for point in data]
+        return point_map
+
     def _impute_missing_series(self, series_map, config):
-        field_str = ''
-        for field in config['fields']:  # pylint: disable=W0612
-            field_str += ',([\\d\\.\\e\\+\\-]*)'
-        regex = '^(\\d+){}'.format(field_str)
-
-        imputed_series_map = {}
-        # Initial values correspond to re mached grop(0) and group(1),
-        # respectively, where group(1) correspond to timestep index
-        # of the point
-        field_num = len(config['fields'])
-
-        for series in series_map.keys():
-            imputed_series_map[series] = []
-            augmented_field_all_none = ['False', 'False']
-            for field in config['fields']:
-                augmented_field_all_none.append('True')
-
-            for point in series_map[series]:
-                match = re.search(regex, point)
-
-                # There is timestep, in addition to the metrics/fields other
-                # than time
-                group_num = field_num + 1
-
-                # Group(0) correspond to original string, and group(1)
-                # corresponds to timestep
-                for i in range(2, group_num + 1):
-                    if not not match.group(i):
-                        augmented_field_all_none[i] = 'False'
-
-            regex_sub = '\\1'
-            for i in range(2, group_num + 1):
-                regex_sub += ',\\{}'.format(i)
-            for point in series_map[series]:
-                for i in range(2, group_num + 1):
-                    if augmented_field_all_none[i]:
-                        regex_sub.replace('\\{}'.format(i), '0')
-                        point = re.sub(regex, regex_sub, point)
-
-                imputed_series_map[series].append(point)
-        return imputed_series_map
+        """Impute missing (NaN) field values of each series in place.
+
+        Fields missing in every point of a series are zero-filled, and the
+        other missing values are imputed by config['impute_policy'].
+        """
+        policy = config.get('impute_policy', ImputePolicy.MEAN)
+        for series in series_map.values():
+            self.preprocessor.impute_missing_fields(series[:, 1:], policy)
+        return series_map
 
     @staticmethod
     def _get_granularity_sec(config):
@@ -235,51 +553,86 @@ class WorkloadPredictor:
         return predict_granularity_sec
 
     def _group_data_to_series_map(self, queried_data, config):
+        """Group data to arrays of time index plus one column per field,
+        where missing field values are NaN.
+
+        The queried data are (times, values) arrays by label key. The
+        samples of all containers are copied and resampled onto the
+        granularity grid in one pass, so that duplicated time indexes are
+        averaged and gaps are NaN rows. Each series is a contiguous slice of
+        the same float64 block.
+        """
         series_map = {}
         filename_tags_map = {}
 
         time_scaling_sec = self._get_granularity_sec(config)
 
-        for container_data in queried_data:
-            labels = container_data['labels']
-            file_name = ''
-            for tag in sorted(labels):
-                tag_value = labels[tag]
-                file_name += ',{}={}'.format(tag, tag_value)
-            file_name += ',mid={}'.format(config['mid'])
-            tags = file_name
-
-            file_name = str(uuid.uuid3(uuid.NAMESPACE_DNS, file_name))
+        file_names = []
+        containers = []
+        offsets = [0]
+        for label_key, (times, values) in queried_data.items():
+            file_name, tags = self._get_series_file_name(
+                dict(label_key), config)
             filename_tags_map[file_name] = tags
 
-            for point in container_data.get('data'):
-                point_timestep = int(point.get('time') / time_scaling_sec)
-
-                if file_name not in series_map:
-                    series_map[file_name] = []
+            if not len(times):
+                continue
+            file_names.append(file_name)
+            containers.append((times, values))
+            offsets.append(offsets[-1] + len(times))
+
+        if not containers:
+            return series_map, time_scaling_sec, filename_tags_map
+
+        block = np.full((offsets[-1], len(config['fields']) + 1), np.nan)
+        for index, (times, values) in enumerate(containers):
+            rows = block[offsets[index]:offsets[index + 1]]
+            rows[:, 0] = times
+            for index_field, field in enumerate(config['fields']):
+                # Samples have a value only, other fields are missing.
+                if field['name'] == 'value':
+                    rows[:, index_field + 1] = values
+        np.floor_divide(block[:, 0], time_scaling_sec, out=block[:, 0])
+
+        times, values, offsets, gaps = self.preprocessor.resample_series(
+            block[:, 0], block[:, 1:], offsets)
+        if gaps.any():
+            self.log.debug('%d of %d time steps of "%s" series are gaps.',
+                           gaps.sum(), len(gaps), config['measurement'])
+        block = np.column_stack((times, values))
+
+        for index, file_name in enumerate(file_names):
+            series_map[file_name] = block[offsets[index]:offsets[index + 1]]
+        return series_map, time_scaling_sec, filename_tags_map
 
-                point_str = str(point_timestep)
-                for field in config['fields']:
-                    field_value = point.get(field['name'])
-                    if field_value is None:
-                        field_value = ''
-                    point_str += ',{}'.format(
-                        ('', str(field_value))[not not str(field_value)])
+    @staticmethod
+    def _get_series_file_name(labels, config):
+        """Get the series file name and its tags from the labels."""
+        tags = ''
+        for tag in sorted(labels):
+            tag_value = labels[tag]
+            tags += ',{}={}'.format(tag, tag_value)
+        tags += ',mid={}'.format(config['mid'])
 
-                series_map[file_name].append(point_str)
-        return series_map, time_scaling_sec, filename_tags_map
+        file_name = str(uuid.uuid3(uuid.NAMESPACE_DNS, tags))
+        return file_name, tags
 
     # pylint: disable=W0613
     def _query_data(self, config, pod, target_labels=None, target_mid=None):
 
-        self.log.debug('DAO get_container_observed_data INPUT: '
+        self.log.debug('DAO get_container_observed_series INPUT: '
                        'metric_name=%s, namespace=%s, '
                        'pod_name=%s, data_amount=%d',
                        config['measurement'], pod['namespace'],
                        pod['pod_name'], config['data_amount_sec'])
 
+        prefetched = self.prefetched_data.pop(
+            (config['measurement'], pod['namespace'], pod['pod_name']), None)
+        if prefetched and prefetched[0] >= config['data_amount_sec']:
+            return prefetched[1]
+
         try:
-            queried_result = self.dao.get_container_observed_data(
+            queried_result = self.dao.get_container_observed_series(
                 config['measurement'], pod['namespace'], pod['pod_name'],
                 config['data_amount_sec'])
 
@@ -293,6 +646,21 @@ class WorkloadPredictor:
         ''' write the json data to alameda, convert infxludb posting
         data format into json(dict) object '''
 
+        container_result = self.format_container_prediction_result(
+            output_file_list, filename_tags_map, time_scaling_sec)
+        self._write_container_result(pod_info, container_result)
+
+    def write_pod_series(self, pod_info, predicted_map,
+                         filename_tags_map, time_scaling_sec,
+                         granularity_mid=None):
+        ''' write the in-memory prediction arrays to alameda '''
+
+        container_result = self.format_container_prediction_series(
+            predicted_map, filename_tags_map, time_scaling_sec,
+            granularity_mid)
+        self._write_container_result(pod_info, container_result)
+
+    def _write_container_result(self, pod_info, container_result):
         out_data = {
             'uid': pod_info.get('uid'),
             'namespace': pod_info.get('namespace'),
@@ -300,8 +668,6 @@ class WorkloadPredictor:
             'containers': []
         }
 
-        container_result = self.format_container_prediction_result(
-            output_file_list, filename_tags_map, time_scaling_sec)
         if container_result:
             out_data['containers'] = list(container_result.values())
             self.log.debug('Write prediction data: %s', out_data)
@@ -320,43 +686,69 @@ class WorkloadPredictor:
            each file is in the same metric name."""
         container_set = dict()
         for file_path in container_files:
-            metric_set = dict()
             data = get_csv_data(file_path)
+            self._update_container_set(container_set, file_path, data,
+                                       filename_tags_map, time_scaling_sec)
 
-            container_name = get_container_name(file_path, filename_tags_map)
-            metric_name, config = get_metric_name_and_conf(
-                file_path, self.measurement_conf)
-
-            if container_name is None or metric_name is None:
-                continue
-
-
-            metric_set[metric_name] = []
+        return container_set
 
-            prdt_times = data[:, 0]
-            prdt_values = data[:, 1:]
-            for index_time, target_time in enumerate(prdt_times):
-                data_pair = dict()
-                data_pair['time'] = int(target_time * time_scaling_sec)
+    def format_container_prediction_series(self, predicted_map,
+                                           filename_tags_map,
+                                           time_scaling_sec,
+                                           granularity_mid=None):
+        """format the in-memory prediction arrays keyed by
+           (metric config name, file name) per container.
+
+           Predictions of a granularity other than the base one, whose mid
+           is given, are written under "<metric>_<mid>", e.g. "cpu_1h",
+           since the prediction result carries no granularity."""
+        container_set = dict()
+        for (metric, file_name), data in predicted_map.items():
+            self._update_container_set(container_set, file_name, data,
+                                       filename_tags_map, time_scaling_sec,
+                                       metric=metric,
+                                       granularity_mid=granularity_mid)
 
-                for index_field in range(len(config['fields'])):
-                    data_type = config['fields'][index_field]['data_type']
-                    field_name = config['fields'][index_field]['name']
-                    if data_type == 'i':
-                        field_value = str(
-                            int(round(prdt_values[index_time, index_field])))
-                    else:
-                        field_value = str(prdt_values[index_time, index_field])
+        return container_set
 
-                    data_pair[field_name] = field_value
-                metric_set[metric_name].append(data_pair)
+    def _update_container_set(self, container_set, file_path, data,
+                              filename_tags_map, time_scaling_sec,
+                              metric=None, granularity_mid=None):
+        metric_set = dict()
 
-            if container_name not in container_set:
-                container_set[container_name] = {
-                    'container_name': container_name,
-                    'raw_predict': metric_set
-                }
-            else:
-                container_set[container_name]['raw_predict'].update(metric_set)
+        container_name = get_container_name(file_path, filename_tags_map)
+        metric_name, config = get_metric_name_and_conf(
+            metric or file_path, self.measurement_conf)
 
-        return container_set
+        if container_name is None or metric_name is None:
+            return
+        if granularity_mid is not None:
+            metric_name = '{}_{}'.format(metric_name, granularity_mid)
+
+        metric_set[metric_name] = []
+
+        prdt_times = data[:, 0]
+        prdt_values = data[:, 1:]
+        for index_time, target_time in enumerate(prdt_times):
+            data_pair = dict()
+            data_pair['time'] = int(target_time * time_scaling_sec)
+
+            for index_field in range(len(config['fields'])):
+                data_type = config['fields'][index_field]['data_type']
+                field_name = config['fields'][index_field]['name']
+                if data_type == 'i':
+                    field_value = str(
+                        int(round(prdt_values[index_time, index_field])))
+                else:
+                    field_value = str(prdt_values[index_time, index_field])
+
+                data_pair[field_name] = field_value
+            metric_set[metric_name].append(data_pair)
+
+        if container_name not in container_set:
+            container_set[container_name] = {
+                'container_name': container_name,
+                'raw_predict': metric_set
+            }
+        else:
+            container_set[container_name]['raw_predict'].update(metric_set)
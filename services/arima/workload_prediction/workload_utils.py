@@ -3,6 +3,7 @@
 # pylint: disable=E0401
 import os
 import csv
+import hashlib
 import numpy as np
 
 
@@ -50,3 +51,20 @@ def get_metric_name_and_conf(file_path, measurement_conf):
             break
 
     return metric_name, config
+
+
+def get_series_fingerprint(observed_data, config, num_steps=None):
+    """Get the fingerprint of an observed window and its configuration.
+
+    If num_steps is given, only the samples within num_steps time steps of
+    the last one are taken, so that the fingerprint does not change while
+    older samples slide out of the window without any newer sample.
+    """
+    data = np.ascontiguousarray(observed_data, dtype='float64')
+    if num_steps is not None and len(data):
+        data = data[data[:, 0] > data[-1, 0] - num_steps]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(sorted(config.items())).encode())
+    digest.update(repr(data.shape).encode())
+    digest.update(data.tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,103 @@
+'''Benchmark of observed series queries of many pods, served by a local
+operator service.
+
+Usage:
+    python -m tests.benchmark.benchmark_metric_dao [pod_num]
+'''
+
+import sys
+import time
+
+from framework.datastore.async_metric_dao import AsyncMetricDAO
+from framework.datastore.local_operator import LocalOperatorService
+from framework.datastore.metric_dao import MetricDAO
+
+METRIC_TYPES = {'cpu': 'CONTAINER_CPU_USAGE_TOTAL',
+                'memory': 'CONTAINER_MEMORY_USAGE'}
+NAMESPACE_NUM = 4
+SAMPLE_SIZE = 240
+DURATION = 30 * SAMPLE_SIZE
+
+
+def generate_service(pod_num):
+    '''Generate a service of the series of two containers per pod.'''
+
+    end_time = int(time.time())
+    service = LocalOperatorService(clock=lambda: end_time)
+    samples = [(end_time - 30 * i, 0.5) for i in range(SAMPLE_SIZE)][::-1]
+    for index in range(pod_num):
+        for metric_type in METRIC_TYPES.values():
+            for container_index in range(2):
+                service.add_series(
+                    metric_type,
+                    {'namespace': 'ns{}'.format(index % NAMESPACE_NUM),
+                     'pod_name': 'pod{}'.format(index),
+                     'container_name': 'container{}'.format(container_index)},
+                    samples)
+    return service
+
+
+def query_per_pod(dao, pods):
+    '''Query the series of each pod and metric type.'''
+
+    return {(metric_type, namespace_name, pod_name):
+            dao.get_container_observed_series(
+                metric_type, namespace_name, pod_name, DURATION)
+            for metric_type in METRIC_TYPES
+            for namespace_name, pod_name in pods}
+
+
+def query_bulk(dao, pods):
+    '''Query the series of all pods in bulk.'''
+
+    return dao.get_pods_observed_series(list(METRIC_TYPES), pods, DURATION)
+
+
+def run(service, query, dao, pods):
+    '''Query the series of the pods and return the elapsed seconds and the
+    number of requests.'''
+
+    list_metrics_count = service.list_metrics_count
+    start = time.time()
+    result = query(dao, pods)
+    elapsed = time.time() - start
+    assert len(result) == len(METRIC_TYPES) * len(pods)
+    return elapsed, service.list_metrics_count - list_metrics_count
+
+
+def main():
+    '''Compare per-pod, bulk and concurrent bulk queries.'''
+
+    pod_num = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    service = generate_service(pod_num)
+    server, port = service.serve()
+    config = {'metric_server': '127.0.0.1:{}'.format(port)}
+    pods = [('ns{}'.format(index % NAMESPACE_NUM), 'pod{}'.format(index))
+            for index in range(pod_num)]
+
+    metric_dao = MetricDAO(config)
+    async_metric_dao = AsyncMetricDAO(config)
+    cases = [
+        ('per pod', query_per_pod, metric_dao),
+        ('bulk', query_bulk, metric_dao),
+        ('bulk async', query_bulk, async_metric_dao),
+    ]
+
+    print('{} pods in {} namespaces, {} samples per series'.format(
+        pod_num, NAMESPACE_NUM, SAMPLE_SIZE))
+    baseline = None
+    try:
+        for name, query, dao in cases:
+            # Warm up the channel so that connecting is not measured.
+            run(service, query, dao, pods[:1])
+            elapsed, requests = run(service, query, dao, pods)
+            baseline = baseline or elapsed
+            print('{:<16}{:>8} requests{:>8.2f}s{:>8.2f}x'.format(
+                name, requests, elapsed, baseline / elapsed))
+    finally:
+        async_metric_dao.close()
+        server.stop(None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+'''Benchmark of series executors on the 30s granularity config.
+
+Usage:
+    python -m tests.benchmark.benchmark_series_executor [series_num]
+'''
+
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import yaml
+
+from framework.log.logger import Logger
+from services.arima.workload_prediction.process_threading \
+    import predict_by_series_data
+from services.arima.workload_prediction.worker_pool \
+    import PredictionWorkerPool, WorkerMode
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           '../../services/arima/workload_prediction/config')
+
+
+def load_config():
+    '''Load the measurement config and the 30s granularity config.'''
+
+    with open(os.path.join(CONFIG_PATH, 'measurement_conf.yaml')) as f_conf:
+        measurement_conf = yaml.safe_load(f_conf)
+    with open(os.path.join(CONFIG_PATH, 'granularity_conf.yaml')) as f_conf:
+        granularity_conf = yaml.safe_load(f_conf)['30s']
+    return measurement_conf, granularity_conf
+
+
+def generate_series(series_num, granularity_conf):
+    '''Generate noisy periodic series covering data_amount_sec.'''
+
+    sample_size = granularity_conf['data_amount_sec'] // 30
+    rand = np.random.RandomState(0)
+    times = np.arange(sample_size, dtype='float64')
+    series_list = []
+    for index in range(series_num):
+        values = 0.5 + 0.1 * np.sin(times / (5 + index % 7)) + \
+            0.02 * rand.randn(sample_size)
+        series_list.append(('container_cpu', 'series{}'.format(index),
+                            np.column_stack((times, values))))
+    return series_list
+
+
+def run(log, executor, measurement_conf, granularity_conf, series_list):
+    '''Predict all series and return the elapsed seconds.'''
+
+    start = time.time()
+    predicted_map = predict_by_series_data(
+        log, measurement_conf, granularity_conf, series_list,
+        executor=executor)
+    elapsed = time.time() - start
+    assert len(predicted_map) == len(series_list)
+    return elapsed
+
+
+def main():
+    '''Compare sequential, thread and process series executors.'''
+
+    warnings.simplefilter('ignore')
+    series_num = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    cpu_num = os.cpu_count() or 1
+
+    log = Logger(name='benchmark',
+                 logfile=os.path.join(tempfile.gettempdir(), 'benchmark.log'))
+    measurement_conf, granularity_conf = load_config()
+    series_list = generate_series(series_num, granularity_conf)
+
+    executors = [
+        ('sequential', PredictionWorkerPool(log, 1, WorkerMode.THREAD)),
+        ('thread x{}'.format(series_num),
+         PredictionWorkerPool(log, series_num, WorkerMode.THREAD)),
+        ('process x{}'.format(cpu_num),
+         PredictionWorkerPool(log, cpu_num, WorkerMode.PROCESS)),
+    ]
+
+    print('{} series of {} samples, {} CPU cores'.format(
+        series_num, len(series_list[0][2]), cpu_num))
+    baseline = None
+    for name, executor in executors:
+        # Warm up the workers so that the pool start is not measured.
+        run(log, executor, measurement_conf, granularity_conf,
+            series_list[:1])
+        elapsed = run(log, executor, measurement_conf, granularity_conf,
+                      series_list)
+        executor.close()
+        baseline = baseline or elapsed
+        print('{:<16}{:>8.2f}s{:>8.2f}x'.format(
+            name, elapsed, baseline / elapsed))
+
+
+if __name__ == '__main__':
+    main()
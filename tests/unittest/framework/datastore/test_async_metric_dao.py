@@ -0,0 +1,194 @@
+'''Unit test for AsyncMetricDAO class.'''
+
+import asyncio
+import logging
+import unittest
+from unittest.mock import Mock, patch
+
+import grpc
+import numpy as np
+
+from framework.datastore.async_metric_dao import AsyncMetricDAO
+from framework.datastore.channel_pool import ChannelPool
+from framework.datastore.local_operator import LocalOperatorService
+from framework.datastore.metric_dao import MetricDAO
+
+
+class UnavailableError(grpc.RpcError):
+    '''RPC error of an unavailable server.'''
+
+    def code(self):
+        return grpc.StatusCode.UNAVAILABLE
+
+
+class AsyncMetricDAOTestCase(unittest.TestCase):
+    '''Unit test for AsyncMetricDAO class.'''
+
+    PREDICTION = {"uid": "uid", "namespace": "default", "pod_name": "router",
+                  "containers": []}
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        logging.disable(logging.CRITICAL)  # suppress log
+        patcher = patch('framework.datastore.async_metric_dao.server_pb2_grpc')
+        self.stub_class = patcher.start().OperatorServiceStub
+        self.stub = self.stub_class.return_value
+        self.addCleanup(patcher.stop)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        self.testitem = AsyncMetricDAO(max_concurrency=2)
+        self.addCleanup(self.testitem.close)
+
+    def tearDown(self):
+        '''Clean unittest environment.'''
+
+        logging.disable(logging.NOTSET)
+
+    async def _call(self, req, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        response = Mock(metrics=[])
+        response.status.code = 0
+        return response
+
+    def test_concurrent_fetch(self):
+        '''Test get_pods_observed_data() function.
+
+        Test target:
+            Requests of the namespaces are in flight together, up to the
+            concurrency limit.
+        '''
+
+        self.stub.ListMetrics.side_effect = self._call
+        result = self.testitem.get_pods_observed_data(
+            ['cpu'], [('ns{}'.format(index), 'router') for index in range(5)],
+            7200)
+
+        self.assertEqual(self.stub.ListMetrics.call_count, 5)
+        self.assertEqual(self.max_in_flight, 2)
+        self.assertEqual(result[('cpu', 'ns3', 'router')], [])
+
+    def test_reconnect(self):
+        '''Test get_container_observed_data() function on a lost channel.
+
+        Test target:
+            A call failed as unavailable is sent again on a new channel.
+        '''
+
+        calls = [UnavailableError()]
+        self.testitem.logger = Mock()
+
+        async def call(req, **kwargs):
+            if calls:
+                raise calls.pop()
+            return await self._call(req, **kwargs)
+
+        self.stub.ListMetrics.side_effect = call
+        result = self.testitem.get_container_observed_data(
+            'cpu', 'default', 'router', 7200)
+
+        self.assertEqual(result, [])
+        self.assertEqual(self.stub.ListMetrics.call_count, 2)
+        self.assertEqual(self.stub_class.call_count, 2)
+        self.testitem.logger.warning.assert_called_once()
+
+    def test_write_behind(self):
+        '''Test write_container_prediction_data() function.
+
+        Test target:
+            Writes return before they are done, and flush() waits for them.
+        '''
+
+        self.stub.CreatePredictResult.side_effect = self._call
+        self.testitem.write_container_prediction_data(self.PREDICTION)
+        self.testitem.write_container_recommendation_result(self.PREDICTION)
+
+        self.assertEqual(self.testitem.flush(), 0)
+        self.assertEqual(self.stub.CreatePredictResult.call_count, 2)
+        self.assertEqual(self.in_flight, 0)
+
+
+class AsyncMetricDAOServerTestCase(unittest.TestCase):
+    '''Unit test for AsyncMetricDAO class with a local operator service.'''
+
+    START_TIME = 1540970511
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        logging.disable(logging.CRITICAL)  # suppress log
+        self.service = LocalOperatorService(
+            clock=lambda: self.START_TIME + 120)
+        samples = [(self.START_TIME + 30 * i, 0.1 * i) for i in range(4)]
+        for index in range(4):
+            for metric_type in ['CONTAINER_CPU_USAGE_TOTAL',
+                                'CONTAINER_MEMORY_USAGE']:
+                self.service.add_series(
+                    metric_type, {"namespace": "ns{}".format(index % 2),
+                                  "pod_name": "pod{}".format(index),
+                                  "container_name": "container"},
+                    samples)
+        server, port = self.service.serve()
+        self.addCleanup(server.stop, None)
+
+        config = {"metric_server": "127.0.0.1:{}".format(port)}
+        self.testitem = AsyncMetricDAO(config, max_concurrency=2)
+        self.addCleanup(self.testitem.close)
+        channel_pool = ChannelPool()
+        self.addCleanup(channel_pool.close)
+        self.metric_dao = MetricDAO(config, channel_pool=channel_pool)
+
+    def tearDown(self):
+        '''Clean unittest environment.'''
+
+        logging.disable(logging.NOTSET)
+
+    def test_get_pods_observed_series(self):
+        '''Test get_pods_observed_series() function.
+
+        Test target:
+            The series of the concurrent requests per namespace and metric
+            type are those of MetricDAO.
+        '''
+
+        pods = [('ns0', 'pod0'), ('ns1', 'pod1'), ('ns1', 'pod3')]
+        result = self.testitem.get_pods_observed_series(
+            ['cpu', 'memory'], pods, 60)
+        self.assertEqual(self.service.list_metrics_count, 4)
+
+        expected = self.metric_dao.get_pods_observed_series(
+            ['cpu', 'memory'], pods, 60)
+        self.assertEqual(sorted(result), sorted(expected))
+        for key, series_map in expected.items():
+            self.assertEqual(list(result[key]), list(series_map))
+            for label_key, (times, values) in series_map.items():
+                np.testing.assert_array_equal(result[key][label_key][0],
+                                              times)
+                np.testing.assert_array_equal(result[key][label_key][1],
+                                              values)
+        self.assertEqual(len(times), 2)
+
+    def test_write_behind(self):
+        '''Test write_container_prediction_data() function.
+
+        Test target:
+            The results sent without waiting reach the service by flush().
+        '''
+
+        for index in range(3):
+            self.testitem.write_container_prediction_data(
+                dict(AsyncMetricDAOTestCase.PREDICTION,
+                     pod_name="pod{}".format(index)))
+
+        self.assertEqual(self.testitem.flush(), 0)
+        self.assertEqual(
+            sorted(pod.name for pod in self.service.predict_pods),
+            ['pod0', 'pod1', 'pod2'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
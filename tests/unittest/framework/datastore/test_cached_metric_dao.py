@@ -0,0 +1,140 @@
+'''Unit test for CachedMetricDAO class.'''
+
+import logging
+import unittest
+from unittest.mock import Mock
+
+from framework.datastore.cached_metric_dao import CachedMetricDAO
+from framework.datastore.metric_dao import metrics_to_series
+
+
+class CachedMetricDAOTestCase(unittest.TestCase):
+    '''Unit test for CachedMetricDAO class.'''
+
+    LABELS = {"namespace": "default", "pod_name": "router",
+              "container_name": "router1"}
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        logging.disable(logging.CRITICAL)  # suppress log
+        self.now = 1540970511 + 30 * 240
+        self.dao = Mock()
+        self.dao.get_container_observed_series.side_effect = \
+            lambda *args: metrics_to_series(self._query(*args))
+        self.testitem = CachedMetricDAO(self.dao, clock=lambda: self.now)
+
+    def tearDown(self):
+        '''Clean unittest environment.'''
+
+        logging.disable(logging.NOTSET)
+
+    def _query(self, metric_type, namespace, pod_name, duration):
+        data = [{"time": time, "value": float(time)}
+                for time in range(1540970511, self.now + 1, 30)
+                if time >= self.now - duration]
+        return [{"labels": dict(self.LABELS), "data": data}]
+
+    def test_incremental_fetch(self):
+        '''Test get_container_observed_data() function.
+
+        Test target:
+            Later queries fetch only the new samples, and return the same
+            window as a full query.
+        '''
+
+        self.testitem.get_container_observed_data(
+            'cpu', 'default', 'router', 7200)
+        self.now += 60
+        result = self.testitem.get_container_observed_data(
+            'cpu', 'default', 'router', 7200)
+
+        self.dao.get_container_observed_series.assert_called_with(
+            'cpu', 'default', 'router', 90)
+        self.assertEqual(result, self._query('cpu', 'default', 'router', 7200))
+
+    def test_longer_duration(self):
+        '''Test get_container_observed_data() function.
+
+        Test target:
+            A query longer than the cached window fetches the full window.
+        '''
+
+        self.testitem.get_container_observed_data(
+            'cpu', 'default', 'router', 600)
+        result = self.testitem.get_container_observed_data(
+            'cpu', 'default', 'router', 7200)
+
+        self.dao.get_container_observed_series.assert_called_with(
+            'cpu', 'default', 'router', 7200)
+        self.assertEqual(len(result[0]['data']), 241)
+
+    def test_bulk_incremental_fetch(self):
+        '''Test get_pods_observed_data() function.
+
+        Test target:
+            Pods are fetched in bulk since their oldest cached sample.
+        '''
+
+        self.dao.get_pods_observed_series.side_effect = \
+            lambda metric_types, pods, duration: {
+                (metric_types[0], namespace, pod_name): metrics_to_series(
+                    self._query(metric_types[0], namespace, pod_name,
+                                duration))
+                for namespace, pod_name in pods}
+        self.testitem.get_container_observed_data(
+            'cpu', 'default', 'router', 7200)
+        self.now += 60
+        result = self.testitem.get_pods_observed_data(
+            ['cpu'], [('default', 'router')], 7200)
+
+        self.dao.get_pods_observed_series.assert_called_once_with(
+            ['cpu'], [('default', 'router')], 90)
+        self.assertEqual(result[('cpu', 'default', 'router')],
+                         self._query('cpu', 'default', 'router', 7200))
+
+    def test_bulk_no_pods(self):
+        '''Test get_pods_observed_data() function without pods.
+
+        Test target:
+            Nothing is queried for an empty pod list.
+        '''
+
+        self.assertEqual(self.testitem.get_pods_observed_data(
+            ['cpu'], [], 7200), {})
+        self.dao.get_pods_observed_series.assert_not_called()
+
+    def test_stale_window(self):
+        '''Test get_container_observed_data() function of a stalled pod.
+
+        Test target:
+            Samples older than the last duration seconds are not returned
+            after the pod stops reporting.
+        '''
+
+        self.testitem.get_container_observed_data(
+            'cpu', 'default', 'router', 7200)
+        self.now += 86400
+        self.dao.get_container_observed_series.side_effect = None
+        self.dao.get_container_observed_series.return_value = {}
+        result = self.testitem.get_container_observed_data(
+            'cpu', 'default', 'router', 7200)
+
+        self.assertEqual(result, [])
+        self.dao.get_container_observed_series.assert_called_with(
+            'cpu', 'default', 'router', 7200)
+
+    def test_delegate_write(self):
+        '''Test delegated write_container_prediction_data() function.
+
+        Test target:
+            Writes go to the wrapped DAO.
+        '''
+
+        self.testitem.write_container_prediction_data({'uid': 'uid'})
+        self.dao.write_container_prediction_data.assert_called_once_with(
+            {'uid': 'uid'})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
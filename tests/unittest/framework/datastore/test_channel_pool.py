@@ -0,0 +1,87 @@
+'''Unit test for ChannelPool class.'''
+
+import logging
+import unittest
+from unittest.mock import Mock, patch
+
+import grpc
+
+from framework.datastore.channel_pool import ChannelPool
+from framework.datastore.metric_dao import MetricDAO
+
+
+class UnavailableError(grpc.RpcError):
+    '''RPC error of an unavailable server.'''
+
+    def code(self):  # pylint: disable=no-self-use
+        '''Status code of the error.'''
+        return grpc.StatusCode.UNAVAILABLE
+
+
+class ChannelPoolTestCase(unittest.TestCase):
+    '''Unit test for ChannelPool class.'''
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        logging.disable(logging.CRITICAL)  # suppress log
+        self.testitem = ChannelPool()
+
+    def tearDown(self):
+        '''Clean unittest environment.'''
+
+        logging.disable(logging.NOTSET)
+        self.testitem.close()
+
+    def test_shared_channel(self):
+        '''Test get_channel() function.
+
+        Test target:
+            Calls to the same target share one channel until it is reset.
+        '''
+
+        channel = self.testitem.get_channel('127.0.0.1:50050')
+        self.assertIs(self.testitem.get_channel('127.0.0.1:50050'), channel)
+
+        self.testitem.reset('127.0.0.1:50050')
+        self.assertIsNot(self.testitem.get_channel('127.0.0.1:50050'),
+                         channel)
+
+    def test_forked_process(self):
+        '''Test get_channel() function in a forked process.
+
+        Test target:
+            Channels of the parent process are not reused.
+        '''
+
+        channel = self.testitem.get_channel('127.0.0.1:50050')
+        with patch('os.getpid', return_value=-1):
+            self.assertIsNot(self.testitem.get_channel('127.0.0.1:50050'),
+                             channel)
+
+    @patch('framework.datastore.metric_dao.server_pb2_grpc')
+    def test_reconnect_unavailable(self, server_pb2_grpc):
+        '''Test MetricDAO calls to an unavailable server.
+
+        Test target:
+            The call is sent again on a new channel, with its deadline.
+        '''
+
+        response = Mock()
+        response.status.code = 0
+        response.metrics = []
+        stub = server_pb2_grpc.OperatorServiceStub.return_value
+        stub.ListMetrics.side_effect = [UnavailableError(), response]
+        channel_pool = Mock()
+        dao = MetricDAO({'metric_server': 'operator:50050', 'timeout_sec': 5},
+                        channel_pool=channel_pool)
+
+        self.assertEqual(dao.get_container_observed_data(
+            'cpu', 'default', 'router', 7200), [])
+        channel_pool.reset.assert_called_once_with('operator:50050')
+        self.assertEqual(stub.ListMetrics.call_count, 2)
+        self.assertEqual(stub.ListMetrics.call_args[1], {'timeout': 5})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
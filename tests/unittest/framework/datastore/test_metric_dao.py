@@ -0,0 +1,144 @@
+'''Unit test for MetricDAO class.'''
+
+import logging
+import unittest
+
+import numpy as np
+
+from framework.datastore.channel_pool import ChannelPool
+from framework.datastore.local_operator import LocalOperatorService
+from framework.datastore.metric_dao import \
+    MetricDAO, get_label_key, series_to_metrics
+
+
+class MetricDAOTestCase(unittest.TestCase):
+    '''Unit test for MetricDAO class.'''
+
+    START_TIME = 1540970511
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        logging.disable(logging.CRITICAL)  # suppress log
+        self.service = LocalOperatorService(
+            clock=lambda: self.START_TIME + 120)
+        samples = [(self.START_TIME + 30 * i, 0.1 * i) for i in range(4)]
+        for pod_name, container_name in [('router', 'router1'),
+                                         ('router', 'router2'),
+                                         ('other', 'other1')]:
+            for metric_type in ['CONTAINER_CPU_USAGE_TOTAL',
+                                'CONTAINER_MEMORY_USAGE']:
+                self.service.add_series(
+                    metric_type, {"namespace": "default",
+                                  "pod_name": pod_name,
+                                  "container_name": container_name},
+                    samples)
+        server, port = self.service.serve()
+        self.addCleanup(server.stop, None)
+
+        channel_pool = ChannelPool()
+        self.addCleanup(channel_pool.close)
+        self.testitem = MetricDAO(
+            {"metric_server": "127.0.0.1:{}".format(port)},
+            channel_pool=channel_pool)
+
+    def tearDown(self):
+        '''Clean unittest environment.'''
+
+        logging.disable(logging.NOTSET)
+
+    def test_get_pods_observed_data(self):
+        '''Test get_pods_observed_data() function.
+
+        Test target:
+            One request per namespace and metric type, with the metrics of
+            the requested pods grouped by series key.
+        '''
+
+        result = self.testitem.get_pods_observed_data(
+            ['cpu', 'memory'], [('default', 'router'), ('default', 'idle')],
+            7200)
+
+        self.assertEqual(self.service.list_metrics_count, 2)
+        self.assertEqual(
+            [metric['labels']['container_name'] for metric
+             in result[('cpu', 'default', 'router')]], ['router1', 'router2'])
+        self.assertEqual(result[('memory', 'default', 'idle')], [])
+        self.assertNotIn(('cpu', 'default', 'other'), result)
+
+    def test_get_pods_observed_series(self):
+        '''Test get_pods_observed_series() function.
+
+        Test target:
+            The series of the requested pods are those of the per-pod
+            query, within the duration.
+        '''
+
+        result = self.testitem.get_pods_observed_series(
+            ['cpu', 'memory'], [('default', 'router'), ('default', 'other')],
+            60)
+
+        self.assertEqual(self.service.list_metrics_count, 2)
+        for metric_type in ['cpu', 'memory']:
+            for pod_name in ['router', 'other']:
+                series_map = self.testitem.get_container_observed_series(
+                    metric_type, 'default', pod_name, 60)
+                bulk_series_map = result[(metric_type, 'default', pod_name)]
+                self.assertEqual(list(bulk_series_map), list(series_map))
+                for label_key, (times, values) in series_map.items():
+                    np.testing.assert_array_equal(
+                        bulk_series_map[label_key][0], times)
+                    np.testing.assert_array_equal(
+                        bulk_series_map[label_key][1], values)
+
+        times, _ = result[('cpu', 'default', 'other')][get_label_key(
+            {"namespace": "default", "pod_name": "other",
+             "container_name": "other1"})]
+        self.assertEqual(times.tolist(),
+                         [self.START_TIME + 60, self.START_TIME + 90])
+
+    def test_get_container_observed_series(self):
+        '''Test get_container_observed_series() function.
+
+        Test target:
+            Samples are decoded into int64 time and float64 value arrays by
+            label key, equal to the dict format.
+        '''
+
+        result = self.testitem.get_container_observed_series(
+            'cpu', 'default', 'router', 7200)
+
+        times, values = result[get_label_key(
+            {"namespace": "default", "pod_name": "router",
+             "container_name": "router1"})]
+        self.assertEqual(times.dtype, np.int64)
+        self.assertEqual(values.dtype, np.float64)
+        self.assertEqual(series_to_metrics(result),
+                         self.testitem.get_container_observed_data(
+                             'cpu', 'default', 'router', 7200))
+
+    def test_write_pods_prediction_data(self):
+        '''Test write_pods_prediction_data() function.
+
+        Test target:
+            The results of the pods are written in one request.
+        '''
+
+        self.testitem.write_pods_prediction_data([
+            {"uid": pod_name, "namespace": "default", "pod_name": pod_name,
+             "containers": [{"container_name": "{}1".format(pod_name),
+                             "raw_predict": {"cpu": [
+                                 {"time": self.START_TIME, "value": "0.5"}]}}]}
+            for pod_name in ['router', 'other']])
+
+        self.assertEqual([pod.name for pod in self.service.predict_pods],
+                         ['router', 'other'])
+        predict_data = self.service.predict_pods[0].predict_containers[0]. \
+            row_predict_data['cpu'].predict_data
+        self.assertEqual(
+            [(data.time.seconds, data.value) for data in predict_data],
+            [(self.START_TIME, "0.5")])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
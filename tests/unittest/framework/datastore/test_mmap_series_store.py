@@ -0,0 +1,123 @@
+'''Unit test for MmapSeriesStore class.'''
+
+import logging
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+from framework.datastore.cached_metric_dao import CachedMetricDAO
+from framework.datastore.metric_dao import metrics_to_series
+from framework.datastore.mmap_series_store import MmapSeriesStore
+
+
+class MmapSeriesStoreTestCase(unittest.TestCase):
+    '''Unit test for MmapSeriesStore class.'''
+
+    KEY = ('container_cpu', (('container_name', 'router1'),), '1h')
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        logging.disable(logging.CRITICAL)  # suppress log
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        '''Clean unittest environment.'''
+
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(self.temp_dir)
+
+    def test_reopen(self):
+        '''Test MmapSeriesStore() after a restart.
+
+        Test target:
+            Series are restored from their files, and readers see the
+            samples appended later.
+        '''
+
+        store = MmapSeriesStore(self.temp_dir, capacity=4)
+        store.extend(self.KEY, [0, 3600, 7200], [[1.], [2.], [3.]])
+        store.flush()
+
+        reader = MmapSeriesStore(self.temp_dir, capacity=4, readonly=True)
+        store.extend(self.KEY, [10800, 14400], [[4.], [5.]])
+
+        times, values = reader.window(self.KEY)
+        np.testing.assert_array_equal(times, [3600, 7200, 10800, 14400])
+        np.testing.assert_array_equal(values[:, 0], [2, 3, 4, 5])
+        self.assertIsInstance(values.base, np.memmap)
+
+    def test_layout_mismatch(self):
+        '''Test MmapSeriesStore() of another layout.
+
+        Test target:
+            Stores of another capacity are not mapped.
+        '''
+
+        MmapSeriesStore(self.temp_dir, capacity=4).append(self.KEY, 0, 1.)
+        with self.assertRaises(ValueError):
+            MmapSeriesStore(self.temp_dir, capacity=8)
+
+    def test_remove(self):
+        '''Test remove() function.
+
+        Test target:
+            The series and its file are removed from the index.
+        '''
+
+        store = MmapSeriesStore(self.temp_dir, capacity=4)
+        store.append(self.KEY, 0, 1.)
+        store.remove(self.KEY)
+
+        self.assertEqual(
+            len(MmapSeriesStore(self.temp_dir, capacity=4)), 0)
+
+    def test_batched_index(self):
+        '''Test index writes of many new series.
+
+        Test target:
+            Series created within the index interval are indexed by
+            flush().
+        '''
+
+        store = MmapSeriesStore(self.temp_dir, capacity=4)
+        for index in range(100):
+            store.append(('container_cpu', index), 0, 1.)
+        self.assertEqual(len(MmapSeriesStore(self.temp_dir, capacity=4)), 1)
+
+        store.flush()
+        self.assertEqual(
+            len(MmapSeriesStore(self.temp_dir, capacity=4)), 100)
+
+    def test_cached_dao_restart(self):
+        '''Test CachedMetricDAO with a restored store.
+
+        Test target:
+            Cached windows are only updated after a restart.
+        '''
+
+        data = [{"time": 1540970511 + 30 * i, "value": float(i)}
+                for i in range(240)]
+        dao = Mock()
+        dao.get_container_observed_series.return_value = metrics_to_series([
+            {"data": data, "labels": {"container_name": "router1"}}])
+        clock = Mock(return_value=data[-1]['time'])
+        CachedMetricDAO(dao, clock=clock, store=MmapSeriesStore(
+            self.temp_dir, capacity=256)).get_container_observed_data(
+                'cpu', 'default', 'router', 7200)
+
+        cached_dao = CachedMetricDAO(dao, clock=clock, store=MmapSeriesStore(
+            self.temp_dir, capacity=256))
+        result = cached_dao.get_container_observed_data(
+            'cpu', 'default', 'router', 7200)
+
+        dao.get_container_observed_series.assert_called_with(
+            'cpu', 'default', 'router', 30)
+        self.assertEqual(result[0]['data'], data)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
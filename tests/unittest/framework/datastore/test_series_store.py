@@ -0,0 +1,65 @@
+'''Unit test for SeriesStore class.'''
+
+import unittest
+
+import numpy as np
+
+from framework.datastore.series_store import SeriesStore
+
+
+class SeriesStoreTestCase(unittest.TestCase):
+    '''Unit test for SeriesStore class.'''
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        self.testitem = SeriesStore(capacity=4)
+
+    def test_append_over_capacity(self):
+        '''Test append() function.
+
+        Test target:
+            The last samples up to the capacity are kept in order.
+        '''
+
+        for index in range(6):
+            self.testitem.append('key', 1000 + 30 * index, float(index))
+
+        times, values = self.testitem.window('key')
+        np.testing.assert_array_equal(times, [60, 90, 120, 150])
+        np.testing.assert_array_equal(values[:, 0], [2, 3, 4, 5])
+        self.assertEqual(times.dtype, np.int32)
+        self.assertEqual(self.testitem.get('key').last_time, 1150)
+
+    def test_window_view(self):
+        '''Test window() function.
+
+        Test target:
+            Windows of a wrapped ring are views from the start time.
+        '''
+
+        self.testitem.extend('key', [0, 10, 20], [[0.], [1.], [2.]])
+        self.testitem.extend('key', [30, 40], [[3.], [4.]])
+
+        times, values = self.testitem.window('key', start_time=20)
+        np.testing.assert_array_equal(times, [20, 30, 40])
+        np.testing.assert_array_equal(values[:, 0], [2, 3, 4])
+        self.assertIsNotNone(values.base)
+
+    def test_trim(self):
+        '''Test trim() function.
+
+        Test target:
+            Samples before the start time are dropped.
+        '''
+
+        self.testitem.extend('key', [0, 10, 20, 30], np.arange(4.))
+        series = self.testitem.get('key')
+        series.trim(15)
+
+        self.assertEqual(len(series), 2)
+        np.testing.assert_array_equal(series.window()[0], [20, 30])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
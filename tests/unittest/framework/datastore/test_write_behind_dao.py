@@ -0,0 +1,138 @@
+'''Unit test for WriteBehindDAO class.'''
+
+import logging
+import time
+import unittest
+from unittest.mock import Mock
+
+from framework.datastore.write_behind_dao import WriteBehindDAO
+
+
+class WriteBehindDAOTestCase(unittest.TestCase):
+    '''Unit test for WriteBehindDAO class.'''
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        logging.disable(logging.CRITICAL)  # suppress log
+        self.dao = Mock()
+
+    def tearDown(self):
+        '''Clean unittest environment.'''
+
+        logging.disable(logging.NOTSET)
+
+    @staticmethod
+    def _get_result(pod_name, **container):
+        container["container_name"] = "router1"
+        return {"uid": pod_name, "namespace": "default",
+                "pod_name": pod_name, "containers": [container]}
+
+    def _get_written_pods(self):
+        return [batch[0][0] for batch
+                in self.dao.write_pods_prediction_data.call_args_list]
+
+    def test_merge_pod_results(self):
+        '''Test writes of the same pod.
+
+        Test target:
+            Prediction and recommendation of a pod are merged, and results
+            of the same metric are kept apart.
+        '''
+
+        testitem = WriteBehindDAO(self.dao, flush_interval_sec=60)
+        testitem.write_container_prediction_data(
+            self._get_result("router", raw_predict={"cpu": [1]}))
+        testitem.write_container_recommendation_result(
+            self._get_result("router", recommendations=[2]))
+        testitem.write_container_prediction_data(
+            self._get_result("router", raw_predict={"cpu": [3]}))
+        testitem.close()
+
+        pods = self._get_written_pods()
+        self.assertEqual(len(pods), 1)
+        self.assertEqual(pods[0][0]["containers"], [
+            {"container_name": "router1", "raw_predict": {"cpu": [1]},
+             "recommendations": [2]}])
+        self.assertEqual(pods[0][1]["containers"][0]["raw_predict"],
+                         {"cpu": [3]})
+
+    def test_merge_recommendations(self):
+        '''Test recommendation writes of the same pod.
+
+        Test target:
+            Recommendations of a container are kept apart, rather than
+            appended to the recommendations already queued.
+        '''
+
+        testitem = WriteBehindDAO(self.dao, flush_interval_sec=60)
+        testitem.write_container_prediction_data(
+            self._get_result("router", raw_predict={"cpu": [1]}))
+        testitem.write_container_recommendation_result(
+            self._get_result("router", recommendations=[2]))
+        testitem.write_container_recommendation_result(
+            self._get_result("router", recommendations=[3]))
+        testitem.close()
+
+        pods = self._get_written_pods()
+        self.assertEqual(len(pods), 1)
+        self.assertEqual(pods[0][0]["containers"], [
+            {"container_name": "router1", "raw_predict": {"cpu": [1]},
+             "recommendations": [2]}])
+        self.assertEqual(pods[0][1]["containers"], [
+            {"container_name": "router1", "recommendations": [3]}])
+
+    def test_batch_size(self):
+        '''Test writes of many pods.
+
+        Test target:
+            Requests have up to max_batch_pods pods.
+        '''
+
+        testitem = WriteBehindDAO(self.dao, max_batch_pods=2,
+                                  flush_interval_sec=60)
+        for index in range(5):
+            testitem.write_container_prediction_data(
+                self._get_result("pod{}".format(index)))
+        testitem.flush()
+
+        self.assertEqual([len(pods) for pods in self._get_written_pods()],
+                         [2, 2, 1])
+        testitem.close()
+
+    def test_retry(self):
+        '''Test a failed write.
+
+        Test target:
+            The request is retried after a backoff.
+        '''
+
+        self.dao.write_pods_prediction_data.side_effect = [
+            Exception("unavailable"), None]
+        testitem = WriteBehindDAO(self.dao, backoff_sec=0)
+        testitem.write_container_prediction_data(self._get_result("router"))
+        testitem.close()
+
+        self.assertEqual(self.dao.write_pods_prediction_data.call_count, 2)
+        self.assertEqual(testitem.dropped_pods, 0)
+
+    def test_backpressure(self):
+        '''Test writes to a full queue.
+
+        Test target:
+            Writers wait until a batch is taken off the queue.
+        '''
+
+        testitem = WriteBehindDAO(self.dao, max_queue_pods=1,
+                                  flush_interval_sec=0.1)
+        start = time.monotonic()
+        testitem.write_container_prediction_data(self._get_result("pod0"))
+        testitem.write_container_prediction_data(self._get_result("pod1"))
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        testitem.close()
+        self.assertEqual(len(self._get_written_pods()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,88 @@
+'''Unit test for BatchSARIMAX class.'''
+
+import unittest
+import warnings
+
+import numpy as np
+import statsmodels.api as sm
+
+from services.arima.workload_prediction.batch_sarimax import BatchSARIMAX
+
+
+class BatchSARIMAXTestCase(unittest.TestCase):
+    '''Unit test for BatchSARIMAX class.'''
+
+    ORDER = (1, 0, 0)
+    SEASONAL_ORDER = (1, 1, 0, 16)
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        rand = np.random.RandomState(0)
+        times = np.arange(160)
+        self.endog = np.array([
+            1 + 0.2 * np.sin(times / 2.5 + phase) + 0.05 * rand.randn(160)
+            for phase in rand.rand(4) * 6])
+        self.testitem = BatchSARIMAX(self.ORDER, self.SEASONAL_ORDER)
+
+    def test_integrate(self):
+        '''Test difference() and integrate() functions.
+
+        Test target:
+            Integrated differences restore the series.
+        '''
+
+        testitem = BatchSARIMAX((0, 1, 0), (0, 1, 0, 4))
+        diffed = testitem.difference(self.endog)
+        self.assertEqual(diffed.shape, (4, 155))
+        np.testing.assert_allclose(
+            testitem.integrate(self.endog[:, :100], diffed[:, 95:]),
+            self.endog[:, 100:])
+
+    def test_same_as_statsmodels(self):
+        '''Test fit() and filter() functions.
+
+        Test target:
+            Parameters, log-likelihood and forecasts of each series are close
+            to the ones of statsmodels SARIMAX.
+        '''
+
+        params = self.testitem.fit(self.endog)
+        loglike, forecasts = self.testitem.filter(self.endog, params, 10)
+        self.assertEqual(forecasts.shape, (4, 10))
+
+        for index, endog in enumerate(self.endog):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                result = sm.tsa.statespace.SARIMAX(
+                    endog, order=self.ORDER,
+                    seasonal_order=self.SEASONAL_ORDER,
+                    enforce_stationarity=False,
+                    enforce_invertibility=False).fit(disp=0)
+            np.testing.assert_allclose(params[index], result.params,
+                                       atol=1e-3)
+            self.assertAlmostEqual(loglike[index], result.llf, places=2)
+            np.testing.assert_allclose(
+                forecasts[index], result.get_forecast(10).predicted_mean,
+                atol=1e-3)
+
+    def test_moving_average(self):
+        '''Test fit() function with moving average orders.
+
+        Test target:
+            The fit does not decrease the log-likelihood of the start.
+        '''
+
+        testitem = BatchSARIMAX((1, 1, 1), (0, 1, 1, 16))
+        params = testitem.fit(self.endog)
+        self.assertTrue(np.isfinite(params).all())
+
+        start_params = params.copy()
+        start_params[:, :-1] = 0
+        fitted, _ = testitem.filter(self.endog, params)
+        start, _ = testitem.filter(self.endog, start_params)
+        self.assertTrue((fitted >= start).all())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
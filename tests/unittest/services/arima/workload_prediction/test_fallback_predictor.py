@@ -0,0 +1,82 @@
+'''Unit test for FallbackPredictor class.'''
+
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+from services.arima.workload_prediction.fallback_predictor \
+    import FallbackPredictor, FallbackCase, SeasonalNaiveForecaster, \
+    EWMAForecaster, HoltWintersForecaster
+
+
+class FallbackPredictorTestCase(unittest.TestCase):
+    '''Unit test for FallbackPredictor class.'''
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        self.values = np.array([np.arange(8.), np.ones(8)])
+
+    def test_seasonal_naive(self):
+        '''Test SeasonalNaiveForecaster.forecast() function.
+
+        Test target:
+            The last season is repeated.
+        '''
+
+        forecasts = SeasonalNaiveForecaster(season=3).forecast(self.values, 4)
+        np.testing.assert_array_equal(forecasts,
+                                      [[5., 6., 7., 5.], [1., 1., 1., 1.]])
+
+    def test_ewma(self):
+        '''Test EWMAForecaster.forecast() function.
+
+        Test target:
+            The forecast is the exponentially weighted moving average.
+        '''
+
+        forecasts = EWMAForecaster(alpha=0.5).forecast(self.values, 2)
+        level = self.values[:, 0]
+        for step in range(1, 8):
+            level = 0.5 * self.values[:, step] + 0.5 * level
+        np.testing.assert_allclose(forecasts, np.column_stack((level, level)))
+
+    def test_holt_winters(self):
+        '''Test HoltWintersForecaster.forecast() function.
+
+        Test target:
+            Seasonal series are continued, and constant series stay
+            constant.
+        '''
+
+        values = np.array([np.tile([1., 2., 3., 4.], 6), np.full(24, 2.)])
+        forecasts = HoltWintersForecaster(season=4).forecast(values, 4)
+        np.testing.assert_allclose(forecasts,
+                                   [[1., 2., 3., 4.], [2., 2., 2., 2.]],
+                                   atol=1e-6)
+        self.assertEqual(
+            HoltWintersForecaster(season=16).forecast(values, 3).shape,
+            (2, 3))
+
+    def test_predict_batch(self):
+        '''Test predict_batch() function.
+
+        Test target:
+            Series of different lengths are predicted after their last time.
+        '''
+
+        predictor = FallbackPredictor(log=Mock())
+        observed_list = [
+            {'times': np.arange(8), 'values': self.values[0].reshape(-1, 1)},
+            {'times': np.arange(3), 'values': np.ones((3, 1))},
+        ]
+        results = predictor.predict_batch(observed_list, [2, 1],
+                                          FallbackCase.SHORT)
+        np.testing.assert_array_equal(results[0]['times'], [8, 9])
+        np.testing.assert_array_equal(results[1]['times'], [3])
+        np.testing.assert_allclose(results[1]['values'], [[1.]])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
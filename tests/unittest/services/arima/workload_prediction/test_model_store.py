@@ -0,0 +1,54 @@
+'''Unit test for ModelStore class.'''
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from services.arima.workload_prediction.model_store import ModelStore
+
+
+class ModelStoreTestCase(unittest.TestCase):
+    '''Unit test for ModelStore class.'''
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.temp_dir, '30s/cpu/series')
+        self.testitem = ModelStore()
+
+    def tearDown(self):
+        '''Clean unittest environment.'''
+
+        shutil.rmtree(self.temp_dir)
+
+    def test_save_load(self):
+        '''Test save() and load() functions.
+
+        Test target:
+            Stored arrays are loaded with the same version.
+        '''
+
+        self.testitem.save(self.model_path, 'v1', params=np.array([0.5, 1.]))
+        stored = self.testitem.load(self.model_path, 'v1')
+        np.testing.assert_array_equal(stored['params'], [0.5, 1.])
+        self.assertEqual(os.listdir(os.path.dirname(self.model_path)),
+                         ['series.npz'])
+
+    def test_load_other_version(self):
+        '''Test load() function.
+
+        Test target:
+            Models of another version or missing models are not loaded.
+        '''
+
+        self.testitem.save(self.model_path, 'v1', params=np.array([0.5]))
+        self.assertIsNone(self.testitem.load(self.model_path, 'v2'))
+        self.assertIsNone(self.testitem.load(self.model_path + '_', 'v1'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,143 @@
+'''Unit test for Preprocessor class.'''
+
+import unittest
+
+import numpy as np
+
+from services.arima.workload_prediction.preprocessor \
+    import Preprocessor, ImputePolicy
+
+
+class PreprocessorTestCase(unittest.TestCase):
+    '''Unit test for Preprocessor class.'''
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        self.testitem = Preprocessor()
+        self.values = np.array([[np.nan, np.nan, 1.0],
+                                [1.0, np.nan, np.nan],
+                                [np.nan, np.nan, 3.0],
+                                [2.0, np.nan, np.nan]])
+
+    def _impute(self, policy):
+        return self.testitem.impute_missing_fields(self.values.copy(), policy)
+
+    def test_impute_all_missing_field(self):
+        '''Test impute_missing_fields() function.
+
+        Test target:
+            Fields missing in every sample are zero-filled by any policy.
+        '''
+
+        values = self._impute(ImputePolicy.NONE)
+        np.testing.assert_array_equal(values[:, 1], [0, 0, 0, 0])
+        self.assertTrue(np.isnan(values[:, [0, 2]]).any())
+
+    def test_impute_zero(self):
+        '''Test impute_missing_fields() function with zero policy.'''
+
+        np.testing.assert_array_equal(
+            self._impute(ImputePolicy.ZERO),
+            [[0, 0, 1], [1, 0, 0], [0, 0, 3], [2, 0, 0]])
+
+    def test_impute_mean(self):
+        '''Test impute_missing_fields() function with mean policy.'''
+
+        np.testing.assert_array_equal(
+            self._impute(ImputePolicy.MEAN),
+            [[1.5, 0, 1], [1, 0, 2], [1.5, 0, 3], [2, 0, 2]])
+
+    def test_impute_ffill(self):
+        '''Test impute_missing_fields() function with ffill policy.
+
+        Test target:
+            Leading missing samples take the first observed value.
+        '''
+
+        np.testing.assert_array_equal(
+            self._impute(ImputePolicy.FFILL),
+            [[1, 0, 1], [1, 0, 1], [1, 0, 3], [2, 0, 3]])
+
+    def test_impute_in_place(self):
+        '''Test impute_missing_fields() function.
+
+        Test target:
+            Values of a view are imputed in the underlying array.
+        '''
+
+        data = np.column_stack((np.arange(4), self.values))
+        self.testitem.impute_missing_fields(data[:, 1:], ImputePolicy.ZERO)
+        self.assertFalse(np.isnan(data).any())
+
+    def test_impute_interpolate(self):
+        '''Test impute_missing_fields() function with interpolate policy.
+
+        Test target:
+            Inner missing samples are interpolated, and the edges take the
+            nearest observed value.
+        '''
+
+        np.testing.assert_array_equal(
+            self._impute(ImputePolicy.INTERPOLATE),
+            [[1, 0, 1], [1, 0, 2], [1.5, 0, 3], [2, 0, 3]])
+
+    def test_impute_missing_value(self):
+        '''Test impute_missing_value() function.
+
+        Test target:
+            Empty cells of file data are imputed by the field mean.
+        '''
+
+        data = np.array([['1.0', ''], ['', '2.0'], ['2.0', '4.0']])
+        np.testing.assert_array_equal(
+            self.testitem.impute_missing_value(data),
+            [[1, 3], [1.5, 2], [2, 4]])
+
+    def test_resample_series(self):
+        '''Test resample_series() function.
+
+        Test target:
+            Samples of each series are sorted onto the grid, duplicates are
+            averaged and gaps are NaN.
+        '''
+
+        times = np.array([10.2, 13.0, 10.9, 11.0, 5.0, 6.0])
+        values = np.array([[1.0], [4.0], [3.0], [2.0], [7.0], [np.nan]])
+        grid_times, grid_values, offsets, gaps = \
+            self.testitem.resample_series(times, values, [0, 4, 4, 6])
+
+        np.testing.assert_array_equal(grid_times, [10, 11, 12, 13, 5, 6])
+        np.testing.assert_array_equal(grid_values[:, 0],
+                                      [2, 2, np.nan, 4, 7, np.nan])
+        np.testing.assert_array_equal(offsets, [0, 4, 4, 6])
+        np.testing.assert_array_equal(
+            gaps, [False, False, True, False, False, False])
+
+    def test_downsample_mean(self):
+        '''Test downsample_mean() function.
+
+        Test target:
+            Buckets end at the last sample and keep its time.
+        '''
+
+        times, values = self.testitem.downsample_mean(
+            np.arange(7), np.arange(7.).reshape(-1, 1), 3)
+        np.testing.assert_array_equal(times, [3, 6])
+        np.testing.assert_array_equal(values, [[2], [5]])
+
+    def test_downsample_lttb(self):
+        '''Test downsample_lttb() function.
+
+        Test target:
+            The edges and the extreme of each bucket are kept.
+        '''
+
+        values = np.array([0, 1, 0, 0, 5, 0, 0, -4, 0, 0.]).reshape(-1, 1)
+        times, kept = self.testitem.downsample_lttb(np.arange(10), values, 4)
+        np.testing.assert_array_equal(times, [0, 4, 7, 9])
+        np.testing.assert_array_equal(kept[:, 0], [0, 5, -4, 0])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,133 @@
+'''Unit test for SARIMAXPredictor class.'''
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+from services.arima.workload_prediction.sarimax_predictor \
+    import SARIMAXPredictor
+
+
+class SARIMAXPredictorTestCase(unittest.TestCase):
+    '''Unit test for SARIMAXPredictor class.'''
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        logging.disable(logging.CRITICAL)  # suppress log
+        self.temp_dir = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.temp_dir, 'series')
+        self.times = np.arange(120)
+        rand = np.random.RandomState(0)
+        self.values = (1 + 0.2 * np.sin(self.times / 4.0) +
+                       0.01 * rand.randn(120)).reshape(-1, 1)
+
+    def tearDown(self):
+        '''Clean unittest environment.'''
+
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(self.temp_dir)
+
+    def _predict(self, values=None, steps=10):
+        predictor = SARIMAXPredictor(log=Mock())
+        observed_data = {'times': self.times.copy(),
+                         'values': (self.values if values is None
+                                    else values).copy()}
+        result = predictor.predict(observed_data, steps, self.model_path)
+        return result, predictor.model_store.load(
+            self.model_path, predictor._get_model_version(  # pylint: disable=W0212
+                (1, 0, 0), (1, 1, 0, 16)))
+
+    def test_predict(self):
+        '''Test predict() function.
+
+        Test target:
+            Predicted times follow the observed times.
+        '''
+
+        result, _ = self._predict()
+        np.testing.assert_array_equal(result['times'], np.arange(120, 130))
+        self.assertEqual(result['values'].shape, (10, 1))
+
+    def test_filter_between_refits(self):
+        '''Test predict() function.
+
+        Test target:
+            Stored parameters are reused without refit until the refit
+            interval.
+        '''
+
+        _, stored = self._predict()
+        self.assertEqual(int(stored['refit_age']), 0)
+        params = stored['params']
+
+        _, stored = self._predict()
+        self.assertEqual(int(stored['refit_age']), 1)
+        np.testing.assert_array_equal(stored['params'], params)
+
+    def test_refit_on_drift(self):
+        '''Test predict() function.
+
+        Test target:
+            A forecast drifting from new observations forces a refit.
+        '''
+
+        self._predict()
+        self.times = self.times + 5
+        _, stored = self._predict(values=self.values * 3)
+        self.assertEqual(int(stored['refit_age']), 0)
+
+    def test_predict_batch(self):
+        '''Test predict_batch() function.
+
+        Test target:
+            Series of different lengths are predicted close to predict(), and
+            the stored parameters are exchangeable with it.
+        '''
+
+        predictor = SARIMAXPredictor(log=Mock())
+        observed_list = [
+            {'times': self.times.copy(), 'values': self.values.copy()},
+            {'times': self.times[:60].copy(),
+             'values': self.values[:60].copy()},
+            {'times': self.times.copy(), 'values': self.values.copy() * 2},
+        ]
+        results = predictor.predict_batch(
+            observed_list, [10, 5, 10], [self.model_path, None, None])
+
+        self.assertEqual([len(r['values']) for r in results], [10, 5, 10])
+        np.testing.assert_array_equal(results[1]['times'], np.arange(60, 65))
+        expected, stored = self._predict()
+        np.testing.assert_allclose(results[0]['values'], expected['values'],
+                                   atol=1e-3)
+        np.testing.assert_allclose(results[2]['values'],
+                                   expected['values'] * 2, atol=1e-2)
+        self.assertEqual(int(stored['refit_age']), 1)
+
+    def test_fit_deadline(self):
+        '''Test predict() function with a passed deadline.
+
+        Test target:
+            The fit is abandoned, the series is predicted by the fallback
+            forecaster and no model is stored.
+        '''
+
+        predictor = SARIMAXPredictor(log=Mock())
+        observed_data = {'times': self.times.copy(),
+                         'values': self.values.copy()}
+        result = predictor.predict(observed_data, 10, self.model_path,
+                                   deadline=time.monotonic())
+
+        self.assertTrue(predictor.deadline_missed)
+        self.assertEqual(result['values'].shape, (10, 1))
+        self.assertFalse(os.path.exists(self.model_path + '.npz'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
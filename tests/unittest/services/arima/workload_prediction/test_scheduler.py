@@ -0,0 +1,76 @@
+'''Unit test for PredictionScheduler class.'''
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from services.arima.workload_prediction.scheduler import PredictionScheduler
+
+
+class PredictionSchedulerTestCase(unittest.TestCase):
+    '''Unit test for PredictionScheduler class.'''
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        self.log = Mock()
+        self.testitem = PredictionScheduler(self.log, period_sec=60,
+                                            max_concurrent_pods=4)
+
+    def tearDown(self):
+        '''Clean unittest environment.'''
+
+        self.testitem.close()
+
+    def test_run_cycle_concurrently(self):
+        '''Test run_cycle() function.
+
+        Test target:
+            Pods are predicted concurrently up to max_concurrent_pods.
+        '''
+
+        barrier = threading.Barrier(4, timeout=5)
+        predicted = []
+
+        def predict(pod):
+            barrier.wait()
+            predicted.append(pod)
+
+        self.testitem.run_cycle([1, 2, 3, 4], predict)
+        self.assertEqual(sorted(predicted), [1, 2, 3, 4])
+
+    def test_run_cycle_error(self):
+        '''Test run_cycle() function.
+
+        Test target:
+            A failing pod is logged and does not stop the other pods.
+        '''
+
+        predicted = []
+
+        def predict(pod):
+            if pod == 1:
+                raise ValueError('bad pod')
+            time.sleep(0.01)
+            predicted.append(pod)
+
+        self.testitem.run_cycle([1, 2], predict)
+        self.assertEqual(predicted, [2])
+        self.log.error.assert_called_once()
+
+    def test_get_next_start(self):
+        '''Test _get_next_start() function.
+
+        Test target:
+            Cycles start on period boundaries measured from cycle start.
+        '''
+
+        # pylint: disable=protected-access
+        self.assertEqual(self.testitem._get_next_start(100, 130), 160)
+        self.assertEqual(self.testitem._get_next_start(100, 160), 160)
+        self.assertEqual(self.testitem._get_next_start(100, 175), 220)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
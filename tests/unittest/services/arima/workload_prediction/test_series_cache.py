@@ -0,0 +1,69 @@
+'''Unit test for SeriesCache class.'''
+
+import unittest
+
+import numpy as np
+
+from services.arima.workload_prediction.series_cache import SeriesCache
+from services.arima.workload_prediction.workload_utils \
+    import get_series_fingerprint
+
+
+class SeriesCacheTestCase(unittest.TestCase):
+    '''Unit test for SeriesCache class.'''
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        self.config = {'name': 'container_cpu', 'granularity': '30s'}
+        self.data = np.column_stack((np.arange(10.), np.arange(10.) * 2))
+        self.testitem = SeriesCache(capacity=2)
+
+    def test_get_put(self):
+        '''Test get() and put() functions.
+
+        Test target:
+            Outputs are reused only while the fingerprint is unchanged.
+        '''
+
+        fingerprint = get_series_fingerprint(self.data, self.config)
+        self.assertIsNone(self.testitem.get('a', fingerprint))
+        self.testitem.put('a', fingerprint, prediction=self.data)
+        self.assertIs(self.testitem.get('a', fingerprint)['prediction'],
+                      self.data)
+
+        self.data[-1, 1] += 1
+        self.assertIsNone(self.testitem.get(
+            'a', get_series_fingerprint(self.data, self.config)))
+        self.assertEqual(self.testitem.hit_rate, 1 / 3)
+
+    def test_capacity(self):
+        '''Test put() function.
+
+        Test target:
+            The least recently used series is evicted.
+        '''
+
+        for key in ['a', 'b']:
+            self.testitem.put(key, key, prediction=None)
+        self.testitem.get('a', 'a')
+        self.testitem.put('c', 'c', prediction=None)
+        self.assertEqual(len(self.testitem), 2)
+        self.assertIsNone(self.testitem.get('b', 'b'))
+        self.assertIsNotNone(self.testitem.get('a', 'a'))
+
+    def test_fingerprint_config(self):
+        '''Test get_series_fingerprint() function.
+
+        Test target:
+            The fingerprint depends on the configuration of the series.
+        '''
+
+        self.assertNotEqual(
+            get_series_fingerprint(self.data, self.config),
+            get_series_fingerprint(self.data, dict(self.config,
+                                                   granularity='1h')))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
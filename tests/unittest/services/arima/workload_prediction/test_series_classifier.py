@@ -0,0 +1,90 @@
+'''Unit test for SeriesClassifier class.'''
+
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+from services.arima.workload_prediction import process_threading
+from services.arima.workload_prediction.series_classifier \
+    import SeriesClassifier, SeriesClass
+
+
+class SeriesClassifierTestCase(unittest.TestCase):
+    '''Unit test for SeriesClassifier class.'''
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        self.testitem = SeriesClassifier(log=Mock())
+
+    def test_classify(self):
+        '''Test classify() function.
+
+        Test target:
+            Flat and step series are classified with their last level.
+        '''
+
+        times = np.arange(20)
+        values = np.array([
+            np.zeros(20),
+            np.full(20, 0.5),
+            0.5 + 0.001 * np.sin(times),
+            np.where(times < 12, 0.2, 0.4),
+            np.where(times < 18, 0.2, 0.4),
+            0.5 + 0.1 * np.sin(times),
+        ])
+        classes, levels = self.testitem.classify(values)
+
+        self.assertEqual(list(classes), [
+            SeriesClass.ZERO, SeriesClass.CONSTANT,
+            SeriesClass.NEAR_CONSTANT, SeriesClass.STEP,
+            SeriesClass.REGULAR, SeriesClass.REGULAR])
+        np.testing.assert_allclose(levels[:4],
+                                   [0, 0.5, np.mean(values[2]), 0.4])
+
+    def test_predict_batch(self):
+        '''Test predict_batch() function.
+
+        Test target:
+            Flat series are predicted, while regular series and series with
+            missing values are left.
+        '''
+
+        observed_list = [
+            {'times': np.arange(10), 'values': np.ones((10, 1))},
+            {'times': np.arange(10),
+             'values': np.arange(10.).reshape(-1, 1)},
+            {'times': np.arange(8),
+             'values': np.array([[1.]] * 7 + [[np.nan]])},
+        ]
+        results = self.testitem.predict_batch(observed_list, [3, 3, 3])
+
+        np.testing.assert_array_equal(results[0]['times'], [10, 11, 12])
+        np.testing.assert_array_equal(results[0]['values'], np.ones((3, 1)))
+        self.assertEqual(results[1:], [None, None])
+
+    @patch.object(process_threading, '_WORKER_PREDICTORS', threading.local())
+    @patch.object(process_threading, 'SeriesClassifier')
+    def test_worker_classifier(self, classifier_class):
+        '''Test the classifier of the series predictions.
+
+        Test target:
+            The classifier, and so its configuration file, is created once
+            per thread rather than once per pod cycle.
+        '''
+
+        classifier_class.return_value.predict_batch.return_value = [None]
+        series_args = [({'times': np.arange(20), 'values': np.zeros(20)},
+                        'file', None, {'prediction_steps': 3})]
+        for _ in range(2):
+            process_threading._predict_classified(Mock(), Mock(), series_args)
+
+        classifier_class.assert_called_once()
+        self.assertEqual(
+            classifier_class.return_value.predict_batch.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
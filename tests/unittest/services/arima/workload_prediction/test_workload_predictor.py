@@ -0,0 +1,357 @@
+'''Unit test for WorkloadPredictor class.'''
+
+import logging
+import math
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+from framework.datastore.metric_dao import metrics_to_series
+from framework.datastore.series_store import SeriesStore
+from framework.log.logger import Logger
+from services.arima.workload_prediction import workload_predictor
+from services.arima.workload_prediction.workload_predictor \
+    import WorkloadPredictor
+
+
+class WorkloadPredictorTestCase(unittest.TestCase):
+    '''Unit test for WorkloadPredictor class.'''
+
+    POD = {"namespace": "default", "uid": "uid", "pod_name": "router",
+           "type": "POD", "policy": "COMPACT"}
+
+    def setUp(self):
+        '''Setup unittest environment.'''
+
+        logging.disable(logging.CRITICAL)  # suppress log
+        self.cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+
+        self.log = Logger('unittest', os.path.join(self.temp_dir, 'ut.log'))
+        self.dao = Mock()
+        self.dao.get_container_observed_series.return_value = \
+            metrics_to_series(self._get_observed_data())
+
+    def tearDown(self):
+        '''Clean unittest environment.'''
+
+        logging.disable(logging.NOTSET)
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir)
+
+    @staticmethod
+    def _get_observed_data():
+        data = [{"time": 1540970511 + 30 * i,
+                 "value": 0.12 + 0.01 * math.sin(i / 3.0)}
+                for i in range(90)]
+        return [
+            {"data": data,
+             "labels": {"namespace": "default", "pod_name": "router",
+                        "container_name": "router1"}},
+            {"data": data[:3],
+             "labels": {"namespace": "default", "pod_name": "router",
+                        "container_name": "router2"}},
+        ]
+
+    @staticmethod
+    def _get_hourly_series(hours, first_step=0):
+        start_time = 1540970511 // 3600 * 3600
+        data = [{"time": start_time + 30 * i,
+                 "value": 0.12 + 0.01 * math.sin(i / 3.0)}
+                for i in range(first_step, 120 * hours)]
+        return metrics_to_series([
+            {"data": data,
+             "labels": {"namespace": "default", "pod_name": "router",
+                        "container_name": "router1"}}])
+
+    def _predict(self, **kwargs):
+        predictor = WorkloadPredictor(log=self.log, dao=self.dao,
+                                      recommender=Mock(), **kwargs)
+        predictor.predict(self.POD)
+        predictor.close()
+        self.dao.write_container_prediction_data.assert_called_once()
+        return self.dao.write_container_prediction_data.call_args[0][0]
+
+    def test_predict_in_memory(self):
+        '''Test predict() function in memory.
+
+        Test target:
+            Series with enough samples are predicted, new containers are
+            predicted by the fallback forecaster, and no file is written.
+        '''
+
+        result = self._predict(in_memory=True)
+        self.assertFalse(os.path.exists('bridge'))
+
+        containers = {c['container_name']: c for c in result['containers']}
+        self.assertEqual(list(containers), ['router1', 'router2'])
+        self.assertEqual(sorted(containers['router1']['raw_predict']),
+                         ['cpu', 'memory'])
+        self.assertEqual(
+            len(containers['router1']['raw_predict']['cpu']), 45)
+        self.assertEqual(
+            len(containers['router2']['raw_predict']['cpu']), 1)
+
+    def test_predict_in_memory_same_as_files(self):
+        '''Test predict() function in memory.
+
+        Test target:
+            Prediction result is the same as the one through files.
+        '''
+
+        file_result = self._predict()
+        self.dao.reset_mock()
+        memory_result = self._predict(in_memory=True)
+
+        for container in memory_result['containers']:
+            self.assertIn(container, file_result['containers'])
+
+    def test_predict_in_worker_pool(self):
+        '''Test predict() function with several workers.
+
+        Test target:
+            Series predicted in concurrent chunks are all written.
+        '''
+
+        result = self._predict(in_memory=True, worker_num=2)
+        self.assertEqual([c['container_name'] for c in result['containers']],
+                         ['router1', 'router2'])
+
+    def test_predict_identical_series(self):
+        '''Test predict() function with replicated containers.
+
+        Test target:
+            Series with identical data are fitted once and all written.
+        '''
+
+        observed_data = self._get_observed_data()
+        observed_data[1]['data'] = observed_data[0]['data']
+        self.dao.get_container_observed_series.return_value = \
+            metrics_to_series(observed_data)
+
+        result = self._predict(in_memory=True)
+        router1, router2 = result['containers']
+        self.assertEqual(router1['raw_predict'], router2['raw_predict'])
+
+        model_files = [name for _, _, names in os.walk('models')
+                       for name in names]
+        self.assertEqual(len(model_files), 2)
+
+    def test_predict_over_deadline(self):
+        '''Test predict() function after the deadline.
+
+        Test target:
+            Series are predicted by the fast fallback forecaster without
+            fitting any model.
+        '''
+
+        predictor = WorkloadPredictor(log=self.log, dao=self.dao,
+                                      recommender=Mock(), in_memory=True)
+        predictor.predict(self.POD, deadline=0)
+        predictor.close()
+
+        result = self.dao.write_container_prediction_data.call_args[0][0]
+        self.assertEqual(
+            len(result['containers'][0]['raw_predict']['cpu']), 45)
+        self.assertFalse(os.path.exists('models'))
+
+    def test_predict_flat_series(self):
+        '''Test predict() function with idle containers.
+
+        Test target:
+            Flat series are predicted by their level without fitting any
+            model.
+        '''
+
+        observed_data = self._get_observed_data()
+        observed_data[0]['data'] = [dict(point, value=0.25)
+                                    for point in observed_data[0]['data']]
+        self.dao.get_container_observed_series.return_value = \
+            metrics_to_series(observed_data)
+
+        result = self._predict(in_memory=True)
+        values = {point['value'] for point
+                  in result['containers'][0]['raw_predict']['cpu']}
+        self.assertEqual(values, {'0.25'})
+        self.assertFalse(os.path.exists('models'))
+
+    def test_predict_training_window(self):
+        '''Test predict() function with a bounded training window.
+
+        Test target:
+            Downsampled series are predicted on the original time grid.
+        '''
+
+        predictor = WorkloadPredictor(log=self.log, dao=self.dao,
+                                      recommender=Mock(), in_memory=True)
+        predictor.granularity_conf = dict(predictor.granularity_conf,
+                                          training_steps=40,
+                                          training_downsample='mean')
+        predictor.predict(self.POD)
+        predictor.close()
+
+        result = self.dao.write_container_prediction_data.call_args[0][0]
+        times = [point['time'] for point
+                 in result['containers'][0]['raw_predict']['cpu']]
+        self.assertEqual(len(times), 45)
+        self.assertEqual(set(np.diff(times)), {30})
+
+    def test_predict_stalled_series(self):
+        '''Test predict() function without new samples.
+
+        Test target:
+            Series whose oldest samples slid out of the window, but without
+            any newer sample, are not fitted again.
+        '''
+
+        self.dao.get_container_observed_series.return_value = \
+            self._get_hourly_series(2)
+        predictor = WorkloadPredictor(log=self.log, dao=self.dao,
+                                      recommender=Mock(), in_memory=True)
+        with patch.object(workload_predictor, 'predict_by_series_data',
+                          wraps=workload_predictor.predict_by_series_data) \
+                as predict_by_series_data:
+            predictor.predict(self.POD)
+            self.dao.get_container_observed_series.return_value = \
+                self._get_hourly_series(2, first_step=5)
+            predictor.predict(self.POD)
+        predictor.close()
+
+        first_call, second_call = predict_by_series_data.call_args_list
+        self.assertEqual(len(first_call[0][3]), 2)
+        self.assertEqual(second_call[0][3], [])
+        self.assertEqual(predictor.series_cache.hits, 2)
+        first_result, second_result = [
+            call[0][0] for call
+            in self.dao.write_container_prediction_data.call_args_list]
+        self.assertEqual(first_result, second_result)
+
+    def test_predict_rollup_granularity(self):
+        '''Test predict() function with a rolled up granularity.
+
+        Test target:
+            Completed buckets of the queried series are rolled up and kept,
+            later cycles append the new buckets only, and coarser series are
+            predicted on their own grid once per schedule period, under
+            keys apart from the base granularity.
+        '''
+
+        self.dao.get_container_observed_series.return_value = \
+            self._get_hourly_series(2)
+        recommender = Mock()
+        predictor = WorkloadPredictor(log=self.log, dao=self.dao,
+                                      recommender=recommender, in_memory=True,
+                                      granularities=('30s', '1h'))
+        predictor.predict(self.POD)
+        predictor.predict(self.POD)
+        self.dao.get_container_observed_series.return_value = \
+            self._get_hourly_series(3)
+        predictor.predict(self.POD)
+        predictor.close()
+
+        self.assertEqual(
+            {call[0][3] for call
+             in self.dao.get_container_observed_series.call_args_list},
+            {7200})
+        self.assertEqual([len(predictor.rollup_store.get(key))
+                          for key in predictor.rollup_store.keys()], [3, 3])
+        calls = self.dao.write_container_prediction_data.call_args_list
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(recommender.recommend_series.call_count, 3)
+
+        self.assertEqual(
+            [sorted(call[0][0]['containers'][0]['raw_predict'])
+             for call in calls],
+            [['cpu', 'memory'], ['cpu_1h', 'memory_1h'], ['cpu', 'memory'],
+             ['cpu', 'memory']])
+        times = [point['time'] for point
+                 in calls[1][0][0]['containers'][0]['raw_predict']['cpu_1h']]
+        self.assertTrue(times)
+        self.assertEqual({time % 3600 for time in times}, {0})
+
+    def test_predict_rollup_retry(self):
+        '''Test predict() function with a rolled up granularity without data.
+
+        Test target:
+            A granularity without any prediction written is due again in the
+            same schedule period.
+        '''
+
+        predictor = WorkloadPredictor(log=self.log, dao=self.dao,
+                                      recommender=Mock(), in_memory=True,
+                                      granularities=('30s', '1h'))
+        predictor.predict(self.POD)
+        self.assertEqual(predictor.predicted_slots, {})
+
+        self.dao.get_container_observed_series.return_value = \
+            self._get_hourly_series(2)
+        predictor.predict(self.POD)
+        predictor.close()
+
+        self.assertEqual(
+            self.dao.write_container_prediction_data.call_count, 3)
+        self.assertEqual(list(predictor.predicted_slots), [('uid', '1h')])
+
+    def test_predict_keeps_observed_series(self):
+        '''Test _predict_granularity() function with missing values.
+
+        Test target:
+            Imputation does not change the series shared by the
+            granularities.
+        '''
+
+        series = np.column_stack((np.arange(240.), np.full(240, 0.1)))
+        series[100:110, 1] = np.nan
+        predictor = WorkloadPredictor(log=self.log, dao=self.dao,
+                                      recommender=Mock(), in_memory=True)
+        predictor._predict_granularity(
+            self.POD, predictor.granularity_conf,
+            {'container_cpu': {'file': series}},
+            {'file': ',container_name=router1,mid=30s'})
+        predictor.close()
+
+        self.assertTrue(np.isnan(series[100:110, 1]).all())
+
+    def test_rollup_store_capacity(self):
+        '''Test WorkloadPredictor() with a small rollup store.
+
+        Test target:
+            A store which does not cover the rolled up data amount is
+            rejected.
+        '''
+
+        with self.assertRaises(ValueError):
+            WorkloadPredictor(log=self.log, dao=self.dao, recommender=Mock(),
+                              in_memory=True, granularities=('30s', '1h'),
+                              rollup_store=SeriesStore(100))
+
+    def test_predict_prefetched(self):
+        '''Test predict() function after prefetch().
+
+        Test target:
+            Pods prefetched in bulk are predicted without querying them.
+        '''
+
+        self.dao.get_pods_observed_series.return_value = {
+            (measurement, 'default', 'router'):
+                metrics_to_series(self._get_observed_data())
+            for measurement in ('cpu', 'memory')}
+        predictor = WorkloadPredictor(log=self.log, dao=self.dao,
+                                      recommender=Mock(), in_memory=True)
+        predictor.prefetch([self.POD])
+        predictor.predict(self.POD)
+        predictor.close()
+
+        self.dao.get_pods_observed_series.assert_called_once_with(
+            ['cpu', 'memory'], [('default', 'router')], 7200)
+        self.dao.get_container_observed_series.assert_not_called()
+        self.dao.write_container_prediction_data.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)